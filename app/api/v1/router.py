@@ -9,7 +9,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
 from app.core.security import create_access_token, get_current_user
 from app.core.redis import RedisClient
-from app.core.queue import RabbitMQClient
+from app.core.queue import QUEUE_HIGH_PRIORITY, RabbitMQClient
+from app.core.backpressure import backpressure
 from app.modules.identity.models import User, AgentTrace
 
 # Init Router
@@ -79,6 +80,16 @@ async def trigger_agent(
     Cost: 10 Energy Units.
     """
     COST = 10
+    queue_name = QUEUE_HIGH_PRIORITY # User triggers are always high priority
+
+    # 0. Backpressure: fail fast (before charging energy) if workers can't serve this in time
+    rejection = await backpressure.check(queue_name)
+    if rejection:
+        raise HTTPException(
+            status_code=rejection.status_code,
+            detail=rejection.detail,
+            headers={"Retry-After": str(rejection.retry_after)}
+        )
     
     # 1. Cost Governor (Redis)
     energy = await RedisClient.check_energy(str(current_user.id))
@@ -98,7 +109,6 @@ async def trigger_agent(
     
     # 3. Push to RabbitMQ
     trace_id = str(uuid.uuid4())
-    queue_name = "queue.high_priority" # User triggers are always high priority
     
     message = {
         "trace_id": trace_id,
@@ -0,0 +1,141 @@
+"""
+Runtime backpressure from RabbitMQ queue depth.
+
+Samples depth and consumer count of the wake queues with passive declares
+(cached for BACKPRESSURE_SAMPLE_SECONDS) and turns them into admission
+decisions for producers:
+- below the low watermark a queue is open
+- between the watermarks the ticker releases a shrinking fraction
+- at the high watermark the queue is paused until it drains back below the
+  low watermark (hysteresis); so is a backlog nobody consumes
+The ticker defers what it may not release; the API answers 429 / 503 with
+Retry-After instead of enqueueing work that can't be served in time.
+"""
+import asyncio
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Set
+
+from app.core.config import settings
+from app.core.queue import QUEUE_HIGH_PRIORITY, QUEUE_LOW_PRIORITY, RabbitMQClient
+
+logger = logging.getLogger("qoneqt.backpressure")
+
+
+@dataclass
+class QueueSample:
+    depth: int
+    consumers: int
+    sampled_at: float
+
+
+@dataclass
+class Rejection:
+    status_code: int   # 429 = overloaded, 503 = nobody consuming
+    retry_after: int   # Seconds
+    detail: str
+
+
+class BackpressureController:
+
+    def __init__(
+        self,
+        queues: Iterable[str] = (QUEUE_HIGH_PRIORITY, QUEUE_LOW_PRIORITY),
+        high_watermark: int = settings.BACKPRESSURE_HIGH_WATERMARK,
+        low_watermark: int = settings.BACKPRESSURE_LOW_WATERMARK,
+        sample_interval: float = settings.BACKPRESSURE_SAMPLE_SECONDS,
+        consumer_rate: float = settings.BACKPRESSURE_CONSUMER_RATE,
+        max_retry_after: int = settings.BACKPRESSURE_MAX_RETRY_AFTER_SECONDS,
+        enabled: bool = settings.BACKPRESSURE_ENABLED
+    ):
+        self.queues = list(queues)
+        self.high_watermark = high_watermark
+        self.low_watermark = min(low_watermark, high_watermark)
+        self.sample_interval = sample_interval
+        self.consumer_rate = consumer_rate
+        self.max_retry_after = max_retry_after
+        self.enabled = enabled
+        self.samples: Dict[str, QueueSample] = {}
+        self.paused: Set[str] = set()
+        self._sampled_at = 0.0
+        self._lock = asyncio.Lock()
+        self._channel = None
+
+    async def refresh(self):
+        """Re-samples the queues if the cached sample is stale."""
+        if not self.enabled or time.monotonic() - self._sampled_at < self.sample_interval:
+            return
+        async with self._lock:
+            if time.monotonic() - self._sampled_at < self.sample_interval:
+                return
+            try:
+                for queue_name in self.queues:
+                    self._update(queue_name, await self._sample(queue_name))
+            except Exception as e:
+                # Fail open: without a sample, publishing decides (and fails loudly if the broker is down)
+                logger.warning(f"Queue depth sampling failed: {e}")
+                self.samples.clear()
+                self.paused.clear()
+            self._sampled_at = time.monotonic()
+
+    async def _sample(self, queue_name: str) -> QueueSample:
+        # Own channel: a passive declare of a missing queue closes the channel it runs on
+        if self._channel is None or self._channel.is_closed:
+            connection = await RabbitMQClient.get_connection()
+            self._channel = await connection.channel()
+        try:
+            queue = await self._channel.declare_queue(queue_name, passive=True)
+        except Exception:
+            self._channel = None
+            # Not declared yet: nothing is waiting in it
+            return QueueSample(0, 0, time.time())
+        result = queue.declaration_result
+        return QueueSample(result.message_count, result.consumer_count, time.time())
+
+    def _update(self, queue_name: str, sample: QueueSample):
+        self.samples[queue_name] = sample
+        was_paused = queue_name in self.paused
+        if sample.depth >= self.high_watermark or (sample.consumers == 0 and sample.depth > self.low_watermark):
+            self.paused.add(queue_name)
+        elif sample.depth <= self.low_watermark:
+            self.paused.discard(queue_name)
+
+        if (queue_name in self.paused) != was_paused:
+            state = "PAUSED" if queue_name in self.paused else "RESUMED"
+            logger.warning(f"Backpressure {state} {queue_name}: depth {sample.depth}, {sample.consumers} consumer(s)")
+
+    async def release_fraction(self, queue_name: str) -> float:
+        """Share of due work the ticker may publish to this queue right now (0 to 1)."""
+        await self.refresh()
+        sample = self.samples.get(queue_name)
+        if queue_name in self.paused:
+            return 0.0
+        if sample is None or sample.depth <= self.low_watermark:
+            return 1.0
+        return max(0.0, (self.high_watermark - sample.depth) / (self.high_watermark - self.low_watermark))
+
+    def retry_after(self, queue_name: str) -> int:
+        """Seconds until the backlog should be back under the low watermark."""
+        sample = self.samples.get(queue_name)
+        if sample is None:
+            return 1
+        if sample.consumers == 0:
+            return self.max_retry_after
+        excess = max(0, sample.depth - self.low_watermark)
+        drain_seconds = excess / (sample.consumers * self.consumer_rate)
+        return int(min(self.max_retry_after, max(1, math.ceil(drain_seconds))))
+
+    async def check(self, queue_name: str) -> Optional[Rejection]:
+        """None if a new message for this queue is admitted, else why not (API path)."""
+        await self.refresh()
+        if queue_name not in self.paused:
+            return None
+        sample = self.samples[queue_name]
+        if sample.consumers == 0:
+            return Rejection(503, self.retry_after(queue_name), "No workers are consuming agent wake-ups. Try again later.")
+        return Rejection(429, self.retry_after(queue_name), "Agents are busy. Try again later.")
+
+
+backpressure = BackpressureController()
@@ -28,7 +28,106 @@ class Settings(BaseSettings):
     # Ollama LLM
     OLLAMA_HOST: str = "http://localhost:11434"
     OLLAMA_MODEL: str = "qwen2.5:7b"
-    
+    # Keep the model (and its prompt KV cache) resident between requests.
+    # num_ctx must be identical across callers: a different value forces a model reload.
+    OLLAMA_KEEP_ALIVE: str = "30m"
+    OLLAMA_NUM_CTX: int = 4096
+
+    # Worker
+    # In-flight messages per worker; the adaptive limiter decides how many reach the LLM
+    WORKER_PREFETCH: int = 16
+    # Free-tier wake-ups (low-priority queue) get their own, smaller share so they can't crowd out pro work
+    WORKER_LOW_PRIORITY_PREFETCH: int = 4
+    WORKER_METRICS_PORT: int = 9101
+
+    # Inference backend pool (router). Comma-separated base URLs; prefix a URL with
+    # "openai+" for OpenAI-compatible servers (vLLM). Empty = OLLAMA_HOST only.
+    # e.g. "http://gpu1:11434,http://gpu2:11434,openai+http://vllm:8000"
+    LLM_BACKENDS: str = ""
+    LLM_ROUTER_MAX_ATTEMPTS: int = 2
+    LLM_BACKEND_FAILURE_THRESHOLD: int = 3
+    LLM_HEALTH_CHECK_INTERVAL_SECONDS: float = 10.0
+    OPENAI_API_KEY: Optional[str] = None
+
+    # Adaptive concurrency limiter + circuit breaker around LLM calls
+    LLM_CONCURRENCY_INITIAL: int = 4
+    LLM_CONCURRENCY_MIN: int = 1
+    LLM_CONCURRENCY_MAX: int = 64
+    LLM_TARGET_LATENCY_SECONDS: float = 15.0   # Well under the 30s HTTP timeout
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 5
+    LLM_BREAKER_RESET_SECONDS: float = 30.0
+
+    # Telemetry: a load_duration above this counts as a model cold load
+    LLM_COLD_LOAD_THRESHOLD_SECONDS: float = 1.0
+
+    # Model residency (preload + keep-alive pings timed to scheduler demand)
+    RESIDENCY_PING_INTERVAL_SECONDS: float = 60.0
+    RESIDENCY_LOOKAHEAD_SECONDS: float = 600.0
+    RESIDENCY_MIN_UPCOMING_WAKES: int = 1
+
+    # Streaming early-exit decoding (token budgets per stage, via num_predict)
+    BRAIN_STREAMING_ENABLED: bool = True
+    BRAIN_DECISION_NUM_PREDICT: int = 192   # Stage 1: decision + confidence + reasoning
+    BRAIN_MESSAGE_NUM_PREDICT: int = 128    # Stage 2: connection message (ACCEPT only)
+
+    # Decision cascade (cheap stages before the main model)
+    CASCADE_ENABLED: bool = True
+    CASCADE_REJECT_BELOW: float = 0.5                 # Screener rule: REJECT if match score < 0.5
+    CASCADE_RULE_ACCEPT_AT: Optional[float] = None    # e.g. 0.7 (screener rule); message still LLM-written
+    CASCADE_SMALL_MODEL: Optional[str] = None         # e.g. "qwen2.5:1.5b"
+    CASCADE_SMALL_MODEL_MIN_CONFIDENCE: float = 0.85
+
+    # Decision Cache (Content-addressed, Redis)
+    DECISION_CACHE_ENABLED: bool = True
+    DECISION_CACHE_TTL_SECONDS: int = 6 * 60 * 60
+
+    # Auditor (incremental: each run only reads traces still PENDING audit)
+    AUDIT_BATCH_SIZE: int = 50          # Traces fetched per page
+    AUDIT_CONCURRENCY: int = 8          # Audit prompts in flight at once
+    AUDIT_TRACES_PER_PROMPT: int = 1    # >1 = batched mode (one prompt, a list of verdicts)
+    # Audit queue: the worker publishes one event per trace, the consumer audits as they arrive
+    AUDIT_QUEUE_ENABLED: bool = True
+    AUDIT_CONSUMER_PREFETCH: int = 32
+    AUDIT_RETRY_DELAY_SECONDS: float = 5.0
+    # Risk-weighted sampling: audit every high-risk trace, a random fraction of the rest.
+    # Feature weights are calibrated for a 0.5 threshold: one strong signal or two weak ones
+    AUDIT_SAMPLING_ENABLED: bool = True
+    AUDIT_SAMPLE_RATE: float = 0.05
+    AUDIT_HIGH_RISK_SCORE: float = 0.5
+    AUDIT_LOW_CONFIDENCE: float = 0.7
+    AUDIT_NEW_AGENT_DAYS: int = 7
+
+    # Scheduler
+    SCHEDULER_PLAN_CHUNK_SIZE: int = 5000   # Agents per planner page (one Redis pipeline each)
+    SCHEDULER_RNG_SEED: Optional[int] = None  # Set for reproducible plans (seeded per hour)
+    # Ticker: adaptive claim batch, sleep-until-next-due (capped), claim lease for crash recovery
+    SCHEDULER_TICKER_MIN_BATCH: int = 50
+    SCHEDULER_TICKER_MAX_BATCH: int = 5000
+    SCHEDULER_TICKER_MAX_SLEEP_SECONDS: float = 5.0
+    SCHEDULER_CLAIM_LEASE_SECONDS: int = 60
+    # Sharding: agent-ID ranges owned by scheduler instances through Redis leases
+    SCHEDULER_NUM_SHARDS: int = 16          # Fixed for a deployment (changing it re-keys the schedule)
+    SCHEDULER_LEASE_TTL_SECONDS: float = 15.0
+    SCHEDULER_HEARTBEAT_SECONDS: float = 5.0
+    # Timing wheel: per-minute bucket keys expire this long after their minute
+    SCHEDULER_BUCKET_TTL_SECONDS: int = 6 * 3600
+    # Load shaping: wake-ups per minute the workers + LLM sustain (all shards; 0 = uniform jitter).
+    # Work that doesn't fit the hour spills up to SPILL_MINUTES later; serendipity wakes are shed first
+    SCHEDULER_CAPACITY_PER_MINUTE: int = 0
+    SCHEDULER_SPILL_MINUTES: int = 120
+    # Idempotent planning: per-shard planned-hour watermark, bounded catch-up of missed hours
+    SCHEDULER_PLANNER_POLL_SECONDS: float = 60.0
+    SCHEDULER_CATCHUP_MAX_HOURS: int = 6
+    SCHEDULER_CATCHUP_SPREAD_MINUTES: int = 120
+
+    # Backpressure: wake queue depth (sampled via passive declares) gates the ticker and the API
+    BACKPRESSURE_ENABLED: bool = True
+    BACKPRESSURE_HIGH_WATERMARK: int = 5000      # Pause releases / reject triggers at this depth
+    BACKPRESSURE_LOW_WATERMARK: int = 1000       # Full speed again below this depth
+    BACKPRESSURE_SAMPLE_SECONDS: float = 2.0
+    BACKPRESSURE_CONSUMER_RATE: float = 1.0      # Messages/sec one consumer drains (Retry-After estimate)
+    BACKPRESSURE_MAX_RETRY_AFTER_SECONDS: int = 300
+
     # HuggingFace (optional, for vLLM)
     HF_TOKEN: Optional[str] = None
 
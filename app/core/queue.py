@@ -1,9 +1,18 @@
 import aio_pika
+import asyncio
+import json
 import logging
+from typing import List
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Agent wake-ups (scheduler / API -> workers)
+QUEUE_HIGH_PRIORITY = "queue.high_priority"
+QUEUE_LOW_PRIORITY = "queue.low_priority"
+# Trace audit events (worker -> auditor consumer)
+QUEUE_AUDIT = "queue.audit"
+
 class RabbitMQClient:
     _connection = None
     _channel = None
@@ -47,6 +56,31 @@ class RabbitMQClient:
             routing_key=queue_name
         )
 
+    @staticmethod
+    async def publish_batch(queue_name: str, messages: List[dict]):
+        """
+        Publish many JSON messages to one queue. The queue is declared once and
+        all publishes are in flight together, so their publisher confirms are
+        awaited as one pipelined round instead of one per message. Raises if
+        any message was not confirmed.
+        """
+        if not messages:
+            return
+
+        channel = await RabbitMQClient.get_channel()
+        await channel.declare_queue(queue_name, durable=True)
+
+        await asyncio.gather(*(
+            channel.default_exchange.publish(
+                aio_pika.Message(
+                    body=json.dumps(message).encode(),
+                    delivery_mode=aio_pika.DeliveryMode.PERSISTENT
+                ),
+                routing_key=queue_name
+            )
+            for message in messages
+        ))
+
 # Helper dependency
 async def get_rabbitmq():
     return await RabbitMQClient.get_channel()
\ No newline at end of file
@@ -0,0 +1,132 @@
+"""
+Content-addressed cache for screening decisions.
+
+The key is a hash of everything that can change the model's answer:
+model name, prompt template version and the canonicalized profile fields
+that are actually rendered into the prompt. Anything else (debug info,
+recency timestamps) is ignored so redeliveries and re-wakes hit the cache.
+"""
+import hashlib
+import json
+import logging
+from typing import Any, Dict, Iterable, Optional
+
+from app.core.config import settings
+from app.core.redis import RedisClient
+from app.modules.agent_brain.schemas import AgentDecision
+
+logger = logging.getLogger("qoneqt.brain.cache")
+
+REDIS_KEY_PREFIX = "brain:decision:"
+
+# Only the fields the screener prompt renders take part in the key
+AGENT_PROFILE_FIELDS = ("full_name", "bio", "location", "skills")
+CANDIDATE_PROFILE_FIELDS = ("full_name", "bio", "location", "skills", "match_score")
+
+
+def canonicalize_profile(profile: Dict[str, Any], fields: Iterable[str]) -> Dict[str, Any]:
+    """
+    Normalizes a profile dict so semantically identical profiles hash the same.
+    - Strings: whitespace collapsed
+    - Lists: cleaned and sorted (skill order does not change the verdict)
+    - Floats: rounded to 2 decimals (match_score jitter from recency decay)
+    """
+    canonical = {}
+    for field in fields:
+        value = profile.get(field)
+
+        if isinstance(value, str):
+            value = " ".join(value.split())
+        elif isinstance(value, (list, tuple)) or (value is None and field == "skills"):
+            value = sorted(" ".join(str(v).split()) for v in (value or []) if v)
+        elif isinstance(value, float):
+            value = round(value, 2)
+
+        canonical[field] = value
+    return canonical
+
+
+class DecisionCache:
+    """
+    Stores validated AgentDecision JSON in Redis with a TTL.
+    A cache hit costs exactly one Redis GET.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = settings.DECISION_CACHE_TTL_SECONDS,
+        enabled: bool = settings.DECISION_CACHE_ENABLED
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+
+        # Process-local counters (exposed via stats())
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @staticmethod
+    def make_key(
+        model_name: str,
+        prompt_version: str,
+        agent_profile: Dict[str, Any],
+        candidate_profile: Dict[str, Any]
+    ) -> str:
+        material = {
+            "model": model_name,
+            "prompt": prompt_version,
+            "agent": canonicalize_profile(agent_profile, AGENT_PROFILE_FIELDS),
+            "candidate": canonicalize_profile(candidate_profile, CANDIDATE_PROFILE_FIELDS),
+        }
+        blob = json.dumps(material, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        digest = hashlib.sha256(blob.encode("utf-8")).hexdigest()
+        return f"{REDIS_KEY_PREFIX}{digest}"
+
+    async def get(self, key: str) -> Optional[AgentDecision]:
+        if not self.enabled:
+            return None
+
+        try:
+            cached = await RedisClient.get_instance().get(key)
+        except Exception as e:
+            # Cache is an optimization: never fail the decision because of it
+            self.errors += 1
+            logger.warning(f"Decision cache read failed: {e}")
+            return None
+
+        if cached is None:
+            self.misses += 1
+            return None
+
+        try:
+            decision = AgentDecision.model_validate_json(cached)
+        except Exception:
+            # Stale / incompatible entry: treat as a miss
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return decision
+
+    async def set(self, key: str, decision: AgentDecision):
+        if not self.enabled:
+            return
+
+        try:
+            await RedisClient.get_instance().set(
+                key,
+                decision.model_dump_json(),
+                ex=self.ttl_seconds
+            )
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Decision cache write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,95 @@
+"""
+Cheap-first decision cascade.
+
+Stage 1 (this module) applies the screener's own hard rules deterministically:
+- match score < CASCADE_REJECT_BELOW -> REJECT  (SYSTEM_SCREENER: "Match score < 0.5")
+- bot / spam heuristics on the bio    -> REJECT
+- match score >= CASCADE_RULE_ACCEPT_AT -> ACCEPT (SYSTEM_SCREENER: "Match score >= 0.7")
+Everything in between is left to the LLM stages in InferenceService.
+"""
+import re
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.modules.agent_brain.schemas import AgentDecision
+
+# Strong signals: one hit is enough
+SPAM_PATTERNS = [
+    r"\b(buy|cheap|free)\s+(followers|likes|subscribers)\b",
+    r"\bdm\s+me\b",
+    r"\b(guaranteed|passive)\s+(returns|income|profits?)\b",
+    r"\b(crypto|forex|trading)\s+signals\b",
+    r"\bclick\s+(the\s+)?link\b",
+    r"\b(whatsapp|telegram)\s*(me|us|\+?\d)",
+    r"\bfollow\s+for\s+follow\b|\bf4f\b",
+    r"\bmarketing\s+services\b",
+]
+_SPAM_RE = [re.compile(p, re.IGNORECASE) for p in SPAM_PATTERNS]
+_URL_RE = re.compile(r"https?://|www\.", re.IGNORECASE)
+
+
+def spam_signals(bio: Optional[str]) -> List[str]:
+    """
+    Returns the spam heuristics a bio trips (empty list = looks human).
+    """
+    if not bio:
+        return []
+
+    hits = [p.pattern for p in _SPAM_RE if p.search(bio)]
+
+    if len(_URL_RE.findall(bio)) >= 2:
+        hits.append("multiple_links")
+
+    letters = [c for c in bio if c.isalpha()]
+    if len(letters) >= 20 and sum(c.isupper() for c in letters) / len(letters) > 0.6:
+        hits.append("shouting")
+
+    return hits
+
+
+class RuleGate:
+    """
+    Deterministic screening rules. Returns a decision for clear-cut
+    candidates and None when the case needs a model.
+    """
+
+    def __init__(
+        self,
+        reject_below: float = settings.CASCADE_REJECT_BELOW,
+        accept_at: Optional[float] = settings.CASCADE_RULE_ACCEPT_AT
+    ):
+        self.reject_below = reject_below
+        self.accept_at = accept_at
+
+    def evaluate(self, candidate_profile: Dict[str, Any]) -> Optional[AgentDecision]:
+        signals = spam_signals(candidate_profile.get("bio"))
+        if signals:
+            return self._decision(
+                "REJECT", 0.95,
+                f"Candidate profile looks like a bot or spam account ({len(signals)} spam signal(s) in bio)."
+            )
+
+        score = candidate_profile.get("match_score")
+        if score is None:
+            return None  # No score: nothing clear-cut about it
+
+        if score < self.reject_below:
+            return self._decision(
+                "REJECT", 0.9,
+                f"Match score {score:.2f} is below the {self.reject_below:.2f} relevance threshold."
+            )
+
+        if self.accept_at is not None and score >= self.accept_at:
+            # The connection message is still written by the model
+            return self._decision(
+                "ACCEPT", 0.8,
+                f"Match score {score:.2f} meets the {self.accept_at:.2f} acceptance threshold and the profile shows no spam signals."
+            )
+
+        return None
+
+    @staticmethod
+    def _decision(decision: str, confidence: float, reasoning: str) -> AgentDecision:
+        result = AgentDecision(decision=decision, confidence_score=confidence, reasoning=reasoning)
+        result.meta.stage = "rules"
+        return result
@@ -1,8 +1,13 @@
 """
-Ollama-based LLM inference client for agent brain.
+LLM inference clients for agent brain.
+- OllamaClient: native Ollama API (/api/chat)
+- OpenAICompatibleClient: vLLM / any OpenAI-compatible server (/v1/chat/completions)
+Both return Ollama-shaped responses so callers don't care which backend answered.
 """
+import json
 import httpx
-from typing import AsyncGenerator, Optional
+from contextlib import aclosing
+from typing import Any, AsyncGenerator, Optional, Union
 from app.core.config import settings
 
 
@@ -13,7 +18,7 @@ class OllamaClient:
         self,
         base_url: str = settings.OLLAMA_HOST,
         model: str = settings.OLLAMA_MODEL,
-        timeout: float = 120.0
+        timeout: Union[float, httpx.Timeout] = 120.0
     ):
         self.base_url = base_url.rstrip("/")
         self.model = model
@@ -32,9 +37,11 @@ class OllamaClient:
             "model": self.model,
             "prompt": prompt,
             "stream": stream,
+            "keep_alive": settings.OLLAMA_KEEP_ALIVE,
             "options": {
                 "temperature": temperature,
                 "num_predict": max_tokens,
+                "num_ctx": settings.OLLAMA_NUM_CTX,
             }
         }
         if system:
@@ -48,23 +55,63 @@ class OllamaClient:
             response.raise_for_status()
             return response.json()["response"]
     
-    async def chat(
+    async def load_model(
+        self,
+        model: Optional[str] = None,
+        keep_alive: Union[str, int] = settings.OLLAMA_KEEP_ALIVE
+    ) -> dict:
+        """
+        Loads the model into memory (or refreshes its keep-alive) without generating.
+        The response carries `load_duration` (ns), ~0 if it was already resident.
+        """
+        payload = {
+            "model": model or self.model,
+            "keep_alive": keep_alive,
+            "options": {"num_ctx": settings.OLLAMA_NUM_CTX},
+        }
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            response = await client.post(
+                f"{self.base_url}/api/generate",
+                json=payload
+            )
+            response.raise_for_status()
+            return response.json()
+
+    def _chat_payload(
         self,
         messages: list[dict],
-        temperature: float = 0.7,
-        max_tokens: int = 2048,
-        stream: bool = False
-    ) -> str:
-        """Chat completion with message history."""
+        temperature: float,
+        max_tokens: int,
+        stream: bool,
+        format: Optional[Any] = None,
+        options: Optional[dict] = None
+    ) -> dict:
         payload = {
             "model": self.model,
             "messages": messages,
             "stream": stream,
+            "keep_alive": settings.OLLAMA_KEEP_ALIVE,
             "options": {
                 "temperature": temperature,
                 "num_predict": max_tokens,
+                "num_ctx": settings.OLLAMA_NUM_CTX,
+                **(options or {}),
             }
         }
+        if format:
+            payload["format"] = format
+        return payload
+
+    async def chat_raw(
+        self,
+        messages: list[dict],
+        temperature: float = 0.7,
+        max_tokens: int = 2048,
+        format: Optional[Any] = None,
+        options: Optional[dict] = None
+    ) -> dict:
+        """Chat completion returning the full Ollama response (content + eval stats)."""
+        payload = self._chat_payload(messages, temperature, max_tokens, False, format, options)
         
         async with httpx.AsyncClient(timeout=self.timeout) as client:
             response = await client.post(
@@ -72,24 +119,35 @@ class OllamaClient:
                 json=payload
             )
             response.raise_for_status()
-            return response.json()["message"]["content"]
-    
-    async def chat_stream(
+            return response.json()
+
+    async def chat(
         self,
         messages: list[dict],
         temperature: float = 0.7,
-        max_tokens: int = 2048
-    ) -> AsyncGenerator[str, None]:
-        """Stream chat completion tokens."""
-        payload = {
-            "model": self.model,
-            "messages": messages,
-            "stream": True,
-            "options": {
-                "temperature": temperature,
-                "num_predict": max_tokens,
-            }
-        }
+        max_tokens: int = 2048,
+        stream: bool = False,
+        format: Optional[Any] = None,
+        options: Optional[dict] = None
+    ) -> str:
+        """Chat completion with message history."""
+        result = await self.chat_raw(messages, temperature, max_tokens, format, options)
+        return result["message"]["content"]
+
+    async def chat_stream_raw(
+        self,
+        messages: list[dict],
+        temperature: float = 0.7,
+        max_tokens: int = 2048,
+        format: Optional[Any] = None,
+        options: Optional[dict] = None
+    ) -> AsyncGenerator[dict, None]:
+        """
+        Stream raw Ollama chunks (the final chunk carries `done` and eval stats).
+        Closing the generator early closes the HTTP stream, which makes Ollama
+        abort generation for this request.
+        """
+        payload = self._chat_payload(messages, temperature, max_tokens, True, format, options)
         
         async with httpx.AsyncClient(timeout=self.timeout) as client:
             async with client.stream(
@@ -100,10 +158,22 @@ class OllamaClient:
                 response.raise_for_status()
                 async for line in response.aiter_lines():
                     if line:
-                        import json
-                        data = json.loads(line)
-                        if "message" in data and "content" in data["message"]:
-                            yield data["message"]["content"]
+                        yield json.loads(line)
+
+    async def chat_stream(
+        self,
+        messages: list[dict],
+        temperature: float = 0.7,
+        max_tokens: int = 2048,
+        format: Optional[Any] = None,
+        options: Optional[dict] = None
+    ) -> AsyncGenerator[str, None]:
+        """Stream chat completion tokens."""
+        stream = self.chat_stream_raw(messages, temperature, max_tokens, format, options)
+        async with aclosing(stream):
+            async for data in stream:
+                if "message" in data and "content" in data["message"]:
+                    yield data["message"]["content"]
     
     async def health_check(self) -> bool:
         """Check if Ollama is running and model is available."""
@@ -117,5 +187,159 @@ class OllamaClient:
             return False
 
 
+class OpenAICompatibleClient:
+    """
+    Async client for OpenAI-compatible servers (e.g. vLLM).
+    Mirrors the OllamaClient chat interface and normalizes responses to the
+    Ollama shape: {"message": {"content": ...}, "prompt_eval_count", "eval_count"}.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        model: str = settings.OLLAMA_MODEL,
+        timeout: Union[float, httpx.Timeout] = 120.0,
+        api_key: Optional[str] = settings.OPENAI_API_KEY
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.timeout = timeout
+        self.headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+
+    def _chat_payload(
+        self,
+        messages: list[dict],
+        temperature: float,
+        max_tokens: int,
+        stream: bool,
+        format: Optional[Any] = None,
+        options: Optional[dict] = None
+    ) -> dict:
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "stream": stream,
+            "temperature": temperature,
+            "max_tokens": (options or {}).get("num_predict", max_tokens),
+        }
+        if stream:
+            payload["stream_options"] = {"include_usage": True}
+
+        # Translate Ollama's `format` into `response_format`
+        if format == "json":
+            payload["response_format"] = {"type": "json_object"}
+        elif isinstance(format, dict):
+            payload["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": format.get("title", "output"), "schema": format}
+            }
+        return payload
+
+    @staticmethod
+    def _usage_stats(usage: Optional[dict]) -> dict:
+        usage = usage or {}
+        return {
+            "prompt_eval_count": usage.get("prompt_tokens", 0),
+            "eval_count": usage.get("completion_tokens", 0),
+        }
+
+    async def chat_raw(
+        self,
+        messages: list[dict],
+        temperature: float = 0.7,
+        max_tokens: int = 2048,
+        format: Optional[Any] = None,
+        options: Optional[dict] = None
+    ) -> dict:
+        """Chat completion, normalized to the Ollama response shape."""
+        payload = self._chat_payload(messages, temperature, max_tokens, False, format, options)
+
+        async with httpx.AsyncClient(timeout=self.timeout, headers=self.headers) as client:
+            response = await client.post(
+                f"{self.base_url}/v1/chat/completions",
+                json=payload
+            )
+            response.raise_for_status()
+            data = response.json()
+
+        return {
+            "model": data.get("model", self.model),
+            "message": {"role": "assistant", "content": data["choices"][0]["message"]["content"]},
+            "done": True,
+            **self._usage_stats(data.get("usage")),
+        }
+
+    async def chat(
+        self,
+        messages: list[dict],
+        temperature: float = 0.7,
+        max_tokens: int = 2048,
+        stream: bool = False,
+        format: Optional[Any] = None,
+        options: Optional[dict] = None
+    ) -> str:
+        """Chat completion with message history."""
+        result = await self.chat_raw(messages, temperature, max_tokens, format, options)
+        return result["message"]["content"]
+
+    async def chat_stream_raw(
+        self,
+        messages: list[dict],
+        temperature: float = 0.7,
+        max_tokens: int = 2048,
+        format: Optional[Any] = None,
+        options: Optional[dict] = None
+    ) -> AsyncGenerator[dict, None]:
+        """Stream SSE chunks, normalized to Ollama-shaped stream chunks."""
+        payload = self._chat_payload(messages, temperature, max_tokens, True, format, options)
+
+        async with httpx.AsyncClient(timeout=self.timeout, headers=self.headers) as client:
+            async with client.stream(
+                "POST",
+                f"{self.base_url}/v1/chat/completions",
+                json=payload
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    body = line[len("data:"):].strip()
+                    if body == "[DONE]":
+                        break
+                    data = json.loads(body)
+                    if data.get("usage"):
+                        yield {"done": True, **self._usage_stats(data["usage"])}
+                    for choice in data.get("choices", []):
+                        content = (choice.get("delta") or {}).get("content")
+                        if content:
+                            yield {"message": {"role": "assistant", "content": content}, "done": False}
+
+    async def chat_stream(
+        self,
+        messages: list[dict],
+        temperature: float = 0.7,
+        max_tokens: int = 2048,
+        format: Optional[Any] = None,
+        options: Optional[dict] = None
+    ) -> AsyncGenerator[str, None]:
+        """Stream chat completion tokens."""
+        stream = self.chat_stream_raw(messages, temperature, max_tokens, format, options)
+        async with aclosing(stream):
+            async for data in stream:
+                if "message" in data and "content" in data["message"]:
+                    yield data["message"]["content"]
+
+    async def health_check(self) -> bool:
+        """Check if the server is up and serving the model."""
+        try:
+            async with httpx.AsyncClient(timeout=5.0, headers=self.headers) as client:
+                response = await client.get(f"{self.base_url}/v1/models")
+                response.raise_for_status()
+                models = response.json().get("data", [])
+                return any(m.get("id") == self.model for m in models)
+        except Exception:
+            return False
+
+
 # Default client instance
 llm_client = OllamaClient()
@@ -0,0 +1,194 @@
+"""
+Overload protection for LLM calls.
+
+- AdaptiveLimiter: AIMD concurrency limit that discovers the backend's sweet
+  spot from observed latency, so requests wait in *our* queue (cheap, cancellable)
+  instead of piling up inside Ollama until they hit the HTTP timeout.
+- CircuitBreaker: fails fast while the backend is down and lets one probe
+  through after a cool-down.
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger("qoneqt.brain.limiter")
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the backend while the circuit is open."""
+
+
+class _Permit:
+    """Handed out by AdaptiveLimiter.acquire(); mark it dropped on overload failures."""
+
+    def __init__(self):
+        self.dropped = False
+
+    def drop(self):
+        self.dropped = True
+
+
+class AdaptiveLimiter:
+    """
+    Additive-increase / multiplicative-decrease concurrency limit.
+
+    A sample is "congested" when the call failed from overload (timeout, 5xx)
+    or its latency exceeds either the absolute target or `tolerance` x the
+    no-load baseline latency (the gradient signal: latency growing with
+    concurrency means the server is queueing).
+    """
+
+    def __init__(
+        self,
+        initial: int = settings.LLM_CONCURRENCY_INITIAL,
+        min_limit: int = settings.LLM_CONCURRENCY_MIN,
+        max_limit: int = settings.LLM_CONCURRENCY_MAX,
+        target_latency: float = settings.LLM_TARGET_LATENCY_SECONDS,
+        tolerance: float = 2.0,
+        backoff: float = 0.75,
+        window: int = 200,
+        baseline_drift: float = 1.02
+    ):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.window = window
+        self.baseline_drift = baseline_drift
+
+        self.in_flight = 0
+        self._cond = asyncio.Condition()
+        self._min_latency: Optional[float] = None
+        self._window_min: Optional[float] = None
+        self._samples = 0
+        self._last_decrease = 0.0
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[_Permit]:
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+        permit = _Permit()
+        started = time.monotonic()
+        try:
+            yield permit
+        finally:
+            latency = time.monotonic() - started
+            async with self._cond:
+                self.in_flight -= 1
+                self._on_sample(latency, permit.dropped)
+                self._cond.notify_all()
+
+    def _on_sample(self, latency: float, dropped: bool):
+        # Track the no-load baseline (minimum latency)
+        self._samples += 1
+        self._window_min = latency if self._window_min is None else min(self._window_min, latency)
+        if self._min_latency is None or latency < self._min_latency:
+            self._min_latency = latency
+        if self._samples % self.window == 0:
+            # Let the baseline drift up slowly (model / hardware changes), but not
+            # jump to the window min: under sustained overload every sample is slow
+            self._min_latency = min(self._window_min, self._min_latency * self.baseline_drift)
+            self._window_min = None
+
+        congested = dropped or latency > self.target_latency or (
+            self._min_latency is not None and latency > self._min_latency * self.tolerance
+        )
+
+        now = time.monotonic()
+        if congested:
+            # At most one decrease per observed round-trip, or a burst of slow
+            # responses from the same overload would collapse the limit to 1
+            if now - self._last_decrease >= latency:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._last_decrease = now
+                logger.info(f"LLM concurrency limit ↓ {self.limit:.1f} (latency {latency:.2f}s)")
+        elif self.in_flight + 1 >= int(self.limit):
+            # Only grow when the current limit is actually being used
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    def stats(self) -> dict:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "min_latency": round(self._min_latency, 4) if self._min_latency is not None else None,
+        }
+
+
+class CircuitBreaker:
+    """
+    CLOSED -> (N consecutive failures) -> OPEN -> (reset timeout) -> HALF_OPEN
+    HALF_OPEN lets a single probe through: success closes, failure re-opens.
+    """
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    HALF_OPEN = "HALF_OPEN"
+
+    def __init__(
+        self,
+        failure_threshold: int = settings.LLM_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = settings.LLM_BREAKER_RESET_SECONDS
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == self.OPEN and self._remaining() > 0
+
+    def _remaining(self) -> float:
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def before_call(self) -> bool:
+        """
+        Raises CircuitOpenError if the call must not reach the backend.
+        Returns True if the call is the half-open probe.
+        """
+        if self.state == self.CLOSED:
+            return False
+        if self.state == self.OPEN:
+            if self._remaining() > 0:
+                raise CircuitOpenError(f"LLM circuit open ({self._remaining():.0f}s left)")
+            self.state = self.HALF_OPEN
+        # HALF_OPEN: exactly one probe
+        if self._probe_in_flight:
+            raise CircuitOpenError("LLM circuit half-open (probe in flight)")
+        self._probe_in_flight = True
+        return True
+
+    def abort_probe(self):
+        """The probe ended without an outcome (cancelled): let the next call probe."""
+        self._probe_in_flight = False
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info("✅ LLM circuit closed")
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"⛔ LLM circuit opened after {self.failures} failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    async def wait_until_available(self):
+        """Blocks while the circuit is open (used to pause queue consumption)."""
+        while self.is_open or (self.state == self.HALF_OPEN and self._probe_in_flight):
+            # While a probe is in flight, poll until it settles the state
+            await asyncio.sleep(self._remaining() or 0.5)
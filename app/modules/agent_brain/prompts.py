@@ -1,9 +1,18 @@
 import json
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
 
 class PromptTemplates:
-    
-    SYSTEM_SCREENER_V1 = """You are an autonomous AI Agent in the Qoneqt Professional Network.
+
+    # Bump whenever the screener prompt changes (invalidates the decision cache)
+    SCREENER_VERSION = "screener-v2"
+    SCREENER_STRICTNESS = 7
+
+    # Prompt layout is ordered for KV prefix reuse on the backend:
+    #   [static instructions] -> [per-agent context] -> [candidate]
+    # Everything before the candidate is byte-identical across an agent's
+    # candidates, so Ollama only has to evaluate the candidate tokens.
+    SYSTEM_SCREENER_V2 = """You are an autonomous AI Agent in the Qoneqt Professional Network.
 Your goal is to evaluate a potential connection (Candidate) for your user (Me) based on our professional goals.
 
 You must reply with ONLY a valid JSON object. Do not add markdown blocks or conversational filler.
@@ -16,9 +25,6 @@ Your Output Schema is:
     "generated_message": "Hello [Name], I saw..." (Only if ACCEPT)
 }}
 
-My Profile:
-{user_context}
-
 Evaluation Criteria:
 1. STRICTNESS LEVEL: {strictness}/10
 2. **ACCEPT if the candidate:**
@@ -41,6 +47,45 @@ Evaluation Criteria:
    - Keep it professional and genuine
 """
 
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def screener_instructions(strictness: int = SCREENER_STRICTNESS) -> str:
+        """Static part of the system prompt (formatted once per strictness level)."""
+        return PromptTemplates.SYSTEM_SCREENER_V2.format(strictness=strictness)
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _agent_system_prompt(
+        full_name: Optional[str],
+        bio: Optional[str],
+        location: Optional[str],
+        skills: Tuple[str, ...],
+        strictness: int
+    ) -> str:
+        user_context_str = (
+            f"Name: {full_name}\n"
+            f"Bio: {bio}\n"
+            f"Location: {location}\n"
+            f"Skills: {', '.join(skills)}"
+        )
+        return f"{PromptTemplates.screener_instructions(strictness)}\nMy Profile:\n{user_context_str}\n"
+
+    @staticmethod
+    def build_agent_prefix(
+        user_profile: Dict[str, Any],
+        strictness: int = SCREENER_STRICTNESS
+    ) -> str:
+        """
+        Memoized per-agent system prompt (static instructions + My Profile).
+        """
+        return PromptTemplates._agent_system_prompt(
+            user_profile.get('full_name'),
+            user_profile.get('bio'),
+            user_profile.get('location'),
+            tuple(user_profile.get('skills') or []),
+            strictness
+        )
+
     @staticmethod
     def build_screener_prompt(
         user_profile: Dict[str, Any],
@@ -49,30 +94,22 @@ Evaluation Criteria:
         """
         Constructs the ChatML messages list for Qwen.
         """
-        # 1. Format the User Context for the System Prompt
-        user_context_str = (
-            f"Name: {user_profile.get('full_name')}\n"
-            f"Bio: {user_profile.get('bio')}\n"
-            f"Location: {user_profile.get('location')}\n"
-            f"Skills: {', '.join(user_profile.get('skills', []))}"
-        )
+        # 1. Cached prefix: static instructions + agent context
+        system_prompt = PromptTemplates.build_agent_prefix(user_profile)
         
-        # 2. Format the Candidate for the User Prompt
+        # 2. Format the Candidate for the User Prompt (the only per-call tokens)
         candidate_str = (
             f"Candidate Name: {candidate_profile.get('full_name')}\n"
             f"Bio: {candidate_profile.get('bio')}\n"
             f"Location: {candidate_profile.get('location')}\n"
             f"Match Score: {candidate_profile.get('match_score')}\n"
-            f"Skills: {', '.join(candidate_profile.get('skills', []))}"
+            f"Skills: {', '.join(candidate_profile.get('skills') or [])}"
         )
 
         messages = [
             {
                 "role": "system", 
-                "content": PromptTemplates.SYSTEM_SCREENER_V1.format(
-                    user_context=user_context_str,
-                    strictness=7  # Default strictness
-                )
+                "content": system_prompt
             },
             {
                 "role": "user", 
@@ -81,6 +118,27 @@ Evaluation Criteria:
         ]
         
         return messages
+
+    @staticmethod
+    def build_message_prompt(
+        user_profile: Dict[str, Any],
+        candidate_profile: Dict[str, Any],
+        reasoning: str
+    ) -> list:
+        """
+        Follow-up prompt that only writes the connection message for an ACCEPT.
+        Shares the screener prefix so the backend reuses its KV cache.
+        """
+        messages = PromptTemplates.build_screener_prompt(user_profile, candidate_profile)
+        messages.append({
+            "role": "user",
+            "content": (
+                f"You decided to ACCEPT this candidate because: {reasoning}\n"
+                "Now write ONLY the personalized connection message (2-3 sentences). "
+                "Reply with the plain message text, no JSON and no quotes."
+            )
+        })
+        return messages
     
 
     SYSTEM_AUDITOR_V1 = """You are the Chief AI Auditor for the Qoneqt Network.
@@ -113,7 +171,7 @@ OUTPUT JSON:
             {
                 "role": "system", 
                 "content": PromptTemplates.SYSTEM_AUDITOR_V1.format(
-                    agent_context=trace_data.get('agent_bio', 'Unknown'),
+                    agent_context=trace_data.get('agent_context', 'Unknown'),
                     candidate_context=trace_data.get('candidate_context', 'Unknown'),
                     decision=trace_data.get('decision'),
                     reasoning=trace_data.get('reasoning_log')
@@ -123,4 +181,44 @@ OUTPUT JSON:
                 "role": "user", 
                 "content": "Audit this interaction."
             }
+        ]
+
+    SYSTEM_AUDITOR_BATCH_V1 = """You are the Chief AI Auditor for the Qoneqt Network.
+Your job is to review the actions of autonomous agents to ensure they are safe, polite, and logical.
+
+You will receive several numbered interactions. Audit each one independently:
+1. **Hallucination Check**: Did the agent make up facts not in the profile?
+2. **Safety Check**: Was the reasoning rude, biased, or aggressive?
+3. **Logic Check**: Does the decision make sense given the profiles?
+
+OUTPUT JSON (exactly one verdict per interaction):
+{
+    "verdicts": [
+        {
+            "status": "PASS" | "FLAGGED",
+            "risk_level": "LOW" | "MEDIUM" | "HIGH",
+            "audit_reasoning": "Explanation of your verdict...",
+            "trace_index": <number of the interaction>
+        }
+    ]
+}
+"""
+
+    @staticmethod
+    def build_batch_auditor_prompt(traces_data: List[Dict[str, Any]]) -> list:
+        """
+        One prompt auditing several traces (amortizes the system prompt and
+        per-request overhead). Interactions are numbered from 0.
+        """
+        interactions = "\n\n".join(
+            f"[{i}]\n"
+            f"- Agent Profile: {trace_data.get('agent_context', 'Unknown')}\n"
+            f"- Candidate Profile: {trace_data.get('candidate_context', 'Unknown')}\n"
+            f"- Agent's Decision: {trace_data.get('decision')}\n"
+            f"- Agent's Reasoning: {trace_data.get('reasoning_log')}"
+            for i, trace_data in enumerate(traces_data)
+        )
+        return [
+            {"role": "system", "content": PromptTemplates.SYSTEM_AUDITOR_BATCH_V1},
+            {"role": "user", "content": f"Audit these {len(traces_data)} interactions.\n\n{interactions}"}
         ]
\ No newline at end of file
@@ -0,0 +1,114 @@
+"""
+Model residency manager.
+
+Keeps the screening models loaded on every Ollama backend so cold loads
+(often longer than the 30s request timeout) never land on the request path:
+- Preloads the configured models when the worker starts
+- Sends keep-alive pings while the scheduler has wake-ups coming up, and
+  ahead of each hourly planning burst
+- Reports `load_duration` spikes (a ping that had to load = the model had been evicted)
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from app.core.config import settings
+from app.modules.agent_brain.inference import OllamaClient
+from app.modules.agent_brain.router import InferenceRouter
+from app.modules.agent_brain import telemetry
+from app.modules.scheduler.store import RedisScheduleStore
+
+logger = logging.getLogger("qoneqt.brain.residency")
+
+
+class ModelResidencyManager:
+
+    def __init__(
+        self,
+        routers: List[InferenceRouter],
+        models: Optional[List[str]] = None,
+        ping_interval: float = settings.RESIDENCY_PING_INTERVAL_SECONDS,
+        lookahead: float = settings.RESIDENCY_LOOKAHEAD_SECONDS,
+        min_upcoming_wakes: int = settings.RESIDENCY_MIN_UPCOMING_WAKES
+    ):
+        self.routers = routers
+        self.models = models or sorted({r.model for r in routers})
+        self.ping_interval = ping_interval
+        self.lookahead = lookahead
+        self.min_upcoming_wakes = min_upcoming_wakes
+        self.schedule_store = RedisScheduleStore()
+
+    def _ollama_clients(self) -> List[OllamaClient]:
+        # vLLM / OpenAI-compatible servers keep their model resident by design
+        seen, clients = set(), []
+        for router in self.routers:
+            for backend in router.backends:
+                client = backend.client
+                if isinstance(client, OllamaClient) and client.base_url not in seen:
+                    seen.add(client.base_url)
+                    clients.append(client)
+        return clients
+
+    async def _ping(self, client: OllamaClient, model: str):
+        started = time.perf_counter()
+        try:
+            result = await client.load_model(model)
+        except Exception as e:
+            logger.warning(f"Keep-alive ping failed for {model} @ {client.base_url}: {e}")
+            return
+
+        load_s = (result.get("load_duration") or 0) / telemetry.NS
+        if load_s:
+            telemetry.record_model_load(model, load_s)
+        if load_s >= settings.LLM_COLD_LOAD_THRESHOLD_SECONDS:
+            logger.warning(
+                f"🧊 Cold load of {model} @ {client.base_url}: {load_s:.1f}s "
+                f"(ping took {time.perf_counter() - started:.1f}s, absorbed off the request path)"
+            )
+
+    async def ping_all(self):
+        await asyncio.gather(*(
+            self._ping(client, model)
+            for client in self._ollama_clients()
+            for model in self.models
+        ))
+
+    async def preload(self):
+        """Called once at worker start, before consuming."""
+        logger.info(f"Preloading models {self.models} on {len(self._ollama_clients())} backend(s)...")
+        await self.ping_all()
+
+    async def upcoming_wakes(self) -> int:
+        now = time.time()
+        return await self.schedule_store.count_between(
+            list(range(settings.SCHEDULER_NUM_SHARDS)), now, now + self.lookahead
+        )
+
+    def _planning_burst_soon(self) -> bool:
+        # The planner schedules a new batch at the top of every hour
+        now = datetime.now(timezone.utc)
+        seconds_into_hour = now.minute * 60 + now.second
+        return 3600 - seconds_into_hour <= self.lookahead
+
+    async def should_stay_resident(self) -> bool:
+        if self._planning_burst_soon():
+            return True
+        try:
+            return await self.upcoming_wakes() >= self.min_upcoming_wakes
+        except Exception as e:
+            logger.warning(f"Could not read wake density, keeping models warm: {e}")
+            return True
+
+    async def run(self):
+        """
+        Runs forever: pings while demand is expected, otherwise lets keep_alive lapse.
+        """
+        while True:
+            try:
+                if await self.should_stay_resident():
+                    await self.ping_all()
+            except Exception as e:
+                logger.error(f"Residency loop error: {e}")
+            await asyncio.sleep(self.ping_interval)
@@ -0,0 +1,271 @@
+"""
+Multi-backend inference router.
+
+Spreads chat requests over a pool of Ollama / OpenAI-compatible endpoints:
+- Routing: fewest outstanding requests first, lowest recent latency (EWMA) as tie-break
+- Ejection: a backend is ejected after N consecutive failures
+- Re-admission: a background loop runs each backend's `health_check`
+- Retries: a failed request is retried on a *different* backend
+"""
+import asyncio
+import logging
+import time
+from contextlib import aclosing
+from typing import Any, AsyncGenerator, List, Optional, Union
+
+import httpx
+
+from app.core.config import settings
+from app.modules.agent_brain.inference import OllamaClient, OpenAICompatibleClient
+
+logger = logging.getLogger("qoneqt.brain.router")
+
+OPENAI_PREFIX = "openai+"
+EWMA_ALPHA = 0.3
+
+
+class NoBackendAvailable(Exception):
+    """Raised when every backend in the pool has been tried and failed."""
+
+
+class Backend:
+    """One inference endpoint plus its live load / health bookkeeping."""
+
+    def __init__(self, client: Union[OllamaClient, OpenAICompatibleClient]):
+        self.client = client
+        self.name = client.base_url
+        self.outstanding = 0
+        self.ewma_latency: Optional[float] = None
+        self.healthy = True
+        self.consecutive_failures = 0
+
+    def record_success(self, latency: float):
+        self.consecutive_failures = 0
+        if self.ewma_latency is None:
+            self.ewma_latency = latency
+        else:
+            self.ewma_latency = EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * self.ewma_latency
+
+    def record_failure(self, threshold: int):
+        self.consecutive_failures += 1
+        if self.healthy and self.consecutive_failures >= threshold:
+            self.healthy = False
+            logger.warning(f"🔌 Ejected backend {self.name} after {self.consecutive_failures} failures")
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, httpx.HTTPStatusError):
+        # Overloaded / broken server: try elsewhere. Other 4xx are our fault.
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+class InferenceRouter:
+    """
+    Drop-in replacement for OllamaClient (chat_raw / chat / chat_stream_raw /
+    chat_stream / health_check) that load-balances over a pool of backends.
+    """
+
+    def __init__(
+        self,
+        backends: List[Backend],
+        max_attempts: int = settings.LLM_ROUTER_MAX_ATTEMPTS,
+        failure_threshold: int = settings.LLM_BACKEND_FAILURE_THRESHOLD,
+        health_check_interval: float = settings.LLM_HEALTH_CHECK_INTERVAL_SECONDS
+    ):
+        if not backends:
+            raise ValueError("InferenceRouter needs at least one backend")
+        self.backends = backends
+        self.max_attempts = max(1, max_attempts)
+        self.failure_threshold = failure_threshold
+        self.health_check_interval = health_check_interval
+
+    @classmethod
+    def from_urls(
+        cls,
+        urls: List[str],
+        model: str = settings.OLLAMA_MODEL,
+        timeout: Union[float, httpx.Timeout] = 120.0,
+        **kwargs
+    ) -> "InferenceRouter":
+        backends = []
+        for url in urls:
+            url = url.strip()
+            if not url:
+                continue
+            if url.startswith(OPENAI_PREFIX):
+                client = OpenAICompatibleClient(url[len(OPENAI_PREFIX):], model=model, timeout=timeout)
+            else:
+                client = OllamaClient(url, model=model, timeout=timeout)
+            backends.append(Backend(client))
+        return cls(backends, **kwargs)
+
+    @classmethod
+    def from_settings(
+        cls,
+        model: str = settings.OLLAMA_MODEL,
+        timeout: Union[float, httpx.Timeout] = 120.0
+    ) -> "InferenceRouter":
+        urls = settings.LLM_BACKENDS.split(",") if settings.LLM_BACKENDS else [settings.OLLAMA_HOST]
+        return cls.from_urls(urls, model=model, timeout=timeout)
+
+    @property
+    def model(self) -> str:
+        return self.backends[0].client.model
+
+    # -------------------------------------------------------------------------
+    # Routing
+    # -------------------------------------------------------------------------
+    def _pick(self, exclude: List[Backend]) -> Backend:
+        candidates = [b for b in self.backends if b.healthy and b not in exclude]
+        if not candidates:
+            # Everything is ejected: fail open rather than refusing all work
+            candidates = [b for b in self.backends if b not in exclude]
+        if not candidates:
+            raise NoBackendAvailable(f"All {len(self.backends)} backends failed")
+
+        # Unknown latency sorts first so fresh backends get probed
+        return min(candidates, key=lambda b: (b.outstanding, b.ewma_latency or 0.0))
+
+    async def chat_raw(
+        self,
+        messages: list[dict],
+        temperature: float = 0.7,
+        max_tokens: int = 2048,
+        format: Optional[Any] = None,
+        options: Optional[dict] = None
+    ) -> dict:
+        tried: List[Backend] = []
+        last_error: Optional[Exception] = None
+
+        for _ in range(min(self.max_attempts, len(self.backends))):
+            backend = self._pick(tried)
+            tried.append(backend)
+            backend.outstanding += 1
+            started = time.perf_counter()
+            try:
+                result = await backend.client.chat_raw(messages, temperature, max_tokens, format, options)
+                backend.record_success(time.perf_counter() - started)
+                return result
+            except Exception as e:
+                if not _is_retryable(e):
+                    raise
+                backend.record_failure(self.failure_threshold)
+                last_error = e
+                logger.warning(f"Backend {backend.name} failed ({type(e).__name__}), retrying elsewhere")
+            finally:
+                backend.outstanding -= 1
+
+        raise NoBackendAvailable(f"Inference failed on {len(tried)} backend(s): {last_error}")
+
+    async def chat(
+        self,
+        messages: list[dict],
+        temperature: float = 0.7,
+        max_tokens: int = 2048,
+        stream: bool = False,
+        format: Optional[Any] = None,
+        options: Optional[dict] = None
+    ) -> str:
+        result = await self.chat_raw(messages, temperature, max_tokens, format, options)
+        return result["message"]["content"]
+
+    async def chat_stream_raw(
+        self,
+        messages: list[dict],
+        temperature: float = 0.7,
+        max_tokens: int = 2048,
+        format: Optional[Any] = None,
+        options: Optional[dict] = None
+    ) -> AsyncGenerator[dict, None]:
+        """
+        Streams from one backend. Retries on another backend only if the
+        failure happened before the first chunk (a half-sent stream can't be replayed).
+        """
+        tried: List[Backend] = []
+        last_error: Optional[Exception] = None
+
+        for _ in range(min(self.max_attempts, len(self.backends))):
+            backend = self._pick(tried)
+            tried.append(backend)
+            backend.outstanding += 1
+            started = time.perf_counter()
+            yielded = False
+            try:
+                stream = backend.client.chat_stream_raw(messages, temperature, max_tokens, format, options)
+                async with aclosing(stream):
+                    async for chunk in stream:
+                        yielded = True
+                        yield chunk
+                backend.record_success(time.perf_counter() - started)
+                return
+            except GeneratorExit:
+                # Consumer hung up early (e.g. early-exit decoding): not a failure
+                backend.record_success(time.perf_counter() - started)
+                raise
+            except Exception as e:
+                if yielded or not _is_retryable(e):
+                    backend.record_failure(self.failure_threshold)
+                    raise
+                backend.record_failure(self.failure_threshold)
+                last_error = e
+                logger.warning(f"Backend {backend.name} failed ({type(e).__name__}), retrying elsewhere")
+            finally:
+                backend.outstanding -= 1
+
+        raise NoBackendAvailable(f"Inference stream failed on {len(tried)} backend(s): {last_error}")
+
+    async def chat_stream(
+        self,
+        messages: list[dict],
+        temperature: float = 0.7,
+        max_tokens: int = 2048,
+        format: Optional[Any] = None,
+        options: Optional[dict] = None
+    ) -> AsyncGenerator[str, None]:
+        stream = self.chat_stream_raw(messages, temperature, max_tokens, format, options)
+        async with aclosing(stream):
+            async for data in stream:
+                if "message" in data and "content" in data["message"]:
+                    yield data["message"]["content"]
+
+    # -------------------------------------------------------------------------
+    # Health
+    # -------------------------------------------------------------------------
+    async def health_check(self) -> bool:
+        """True if at least one backend is serving the model."""
+        await self.check_backends()
+        return any(b.healthy for b in self.backends)
+
+    async def check_backends(self):
+        results = await asyncio.gather(*(b.client.health_check() for b in self.backends))
+        for backend, ok in zip(self.backends, results):
+            if ok and not backend.healthy:
+                logger.info(f"✅ Re-admitted backend {backend.name}")
+            elif not ok and backend.healthy:
+                logger.warning(f"🔌 Ejected backend {backend.name} (health check failed)")
+            backend.healthy = ok
+            if ok:
+                backend.consecutive_failures = 0
+
+    async def run_health_loop(self):
+        """
+        Runs forever: ejects dead backends and re-admits recovered ones.
+        """
+        while True:
+            try:
+                await self.check_backends()
+            except Exception as e:
+                logger.error(f"Health check loop error: {e}")
+            await asyncio.sleep(self.health_check_interval)
+
+    def stats(self) -> List[dict]:
+        return [
+            {
+                "backend": b.name,
+                "healthy": b.healthy,
+                "outstanding": b.outstanding,
+                "ewma_latency": round(b.ewma_latency, 4) if b.ewma_latency is not None else None,
+            }
+            for b in self.backends
+        ]
@@ -1,10 +1,22 @@
-from pydantic import BaseModel, Field, validator
-from typing import Optional, List, Literal
+from functools import lru_cache
+from pydantic import BaseModel, Field, PrivateAttr, validator
+from typing import Optional, List, Literal, Type
+
+class DecisionMeta(BaseModel):
+    """
+    How a decision was produced. Not part of the LLM output schema.
+    """
+    stage: Literal["rules", "cache", "small_model", "main_model"] = "main_model"
+    model: Optional[str] = None
+    # Per-call telemetry summaries (see telemetry.record_inference)
+    calls: List[dict] = []
 
 class AgentDecision(BaseModel):
     """
     Structured output from the Agent's Brain.
     """
+    _meta: DecisionMeta = PrivateAttr(default_factory=DecisionMeta)
+
     decision: Literal["ACCEPT", "REJECT", "HOLD"] = Field(
         ..., 
         description="The binary decision on whether to engage with this candidate."
@@ -26,4 +38,53 @@ class AgentDecision(BaseModel):
     def check_score(cls, v):
         if not (0.0 <= v <= 1.0):
             raise ValueError("Confidence score must be between 0.0 and 1.0")
-        return v
\ No newline at end of file
+        return v
+
+    @property
+    def meta(self) -> DecisionMeta:
+        return self._meta
+
+
+class AuditVerdict(BaseModel):
+    """
+    Structured output from the Auditor.
+    """
+    status: Literal["PASS", "FLAGGED"] = Field(
+        ...,
+        description="PASS if the agent behaved correctly, FLAGGED if it needs review."
+    )
+    risk_level: Literal["LOW", "MEDIUM", "HIGH"] = Field(
+        ...,
+        description="Severity of the issues found (LOW if none)."
+    )
+    audit_reasoning: str = Field(
+        ...,
+        description="Explanation of the verdict."
+    )
+
+
+class BatchAuditItem(AuditVerdict):
+    """
+    One verdict of a batched audit, tied back to its interaction.
+    """
+    trace_index: int = Field(
+        ...,
+        description="Index of the audited interaction, as numbered in the prompt."
+    )
+
+
+class AuditBatch(BaseModel):
+    """
+    Structured output from a batched audit (one verdict per interaction).
+    """
+    verdicts: List[BatchAuditItem]
+
+
+@lru_cache(maxsize=None)
+def llm_output_schema(model: Type[BaseModel]) -> dict:
+    """
+    JSON schema handed to the backend for constrained decoding
+    (Ollama `format`, OpenAI `response_format`). Field order is kept,
+    so `decision` is always generated first.
+    """
+    return model.model_json_schema()
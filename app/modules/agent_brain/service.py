@@ -1,11 +1,21 @@
+import asyncio
 import json
 import logging
 import httpx
 import re
-from typing import Dict, Any, Optional
+import time
+from contextlib import aclosing
+from typing import Awaitable, Dict, Any, List, Optional
 from app.core.config import settings
-from app.modules.agent_brain.schemas import AgentDecision
+from pydantic import ValidationError
+from app.modules.agent_brain.schemas import AgentDecision, llm_output_schema
 from app.modules.agent_brain.prompts import PromptTemplates
+from app.modules.agent_brain.cache import DecisionCache
+from app.modules.agent_brain.router import InferenceRouter, NoBackendAvailable
+from app.modules.agent_brain.limiter import AdaptiveLimiter, CircuitBreaker, CircuitOpenError
+from app.modules.agent_brain.streaming import IncrementalJSONParser
+from app.modules.agent_brain.cascade import RuleGate
+from app.modules.agent_brain import telemetry
 
 logger = logging.getLogger("qoneqt.brain")
 
@@ -15,59 +25,340 @@ class InferenceService:
     """
     
     def __init__(self):
-        # Ensure we hit the chat endpoint
-        self.model_url = f"{settings.OLLAMA_HOST}/api/chat"
         self.model_name = settings.OLLAMA_MODEL
         # 30s is usually enough for local GPU inference
         self.timeout = httpx.Timeout(30.0, connect=5.0)
+        # Load-balanced pool of backends (single OLLAMA_HOST unless LLM_BACKENDS is set)
+        self.client = InferenceRouter.from_settings(model=self.model_name, timeout=self.timeout)
+        self.decision_cache = DecisionCache()
+        # Overload protection: bounded, latency-adaptive concurrency + fail-fast breaker
+        self.limiter = AdaptiveLimiter()
+        self.breaker = CircuitBreaker()
+        self.streaming = settings.BRAIN_STREAMING_ENABLED
+        # Structured-output health: parsed first pass / needed repair / lost (+ tokens burnt)
+        self.parse_stats = {"parsed": 0, "repaired": 0, "failed": 0, "wasted_tokens": 0}
+
+        # Decision cascade: rules -> small model (optional) -> main model
+        self.rule_gate = RuleGate() if settings.CASCADE_ENABLED else None
+        self.small_client = (
+            InferenceRouter.from_settings(model=settings.CASCADE_SMALL_MODEL, timeout=self.timeout)
+            if settings.CASCADE_ENABLED and settings.CASCADE_SMALL_MODEL else None
+        )
+        self.small_model_min_confidence = settings.CASCADE_SMALL_MODEL_MIN_CONFIDENCE
+        # Cached verdicts depend on every model that may have produced them
+        self.cache_model_key = "+".join(
+            m for m in (self.small_client and self.small_client.model, self.model_name) if m
+        )
+
+        # Options shared by every screening call (keeps the prefix cache valid)
+        self.options = {
+            "num_gpu": -1       # Force all layers to GPU
+        }
 
     async def decide_on_candidate(
         self, 
         agent_profile: Dict[str, Any], 
-        candidate_profile: Dict[str, Any]
+        candidate_profile: Dict[str, Any],
+        bypass_cache: bool = False
     ) -> Optional[AgentDecision]:
+        """
+        Screens a candidate for an agent through the cascade:
+        rules -> cache -> small model (optional) -> main model.
+        Set `bypass_cache` to force a fresh evaluation (the result still refreshes the cache).
+        The deciding stage is available as `decision.meta.stage`, and per-call
+        token / latency summaries as `decision.meta.calls`.
+        """
+        # Compact telemetry for every LLM call made for this decision
+        calls: List[dict] = []
         try:
-            # 1. Build Prompt
+            # 1. Cascade stage 1: deterministic rules (pure CPU, cheaper than a cache GET)
+            if self.rule_gate:
+                ruled = self.rule_gate.evaluate(candidate_profile)
+                if ruled:
+                    if ruled.decision == "ACCEPT":
+                        ruled.generated_message = await self._guarded(
+                            self._write_message(self.client, agent_profile, candidate_profile, ruled.reasoning, calls)
+                        )
+                        ruled.meta.calls = calls
+                    logger.info(f"⚖️ Rule Decision: {ruled.decision}")
+                    return ruled
+
+            # 2. Content-addressed cache (one Redis GET on a hit)
+            cache_key = self.decision_cache.make_key(
+                self.cache_model_key,
+                PromptTemplates.SCREENER_VERSION,
+                agent_profile,
+                candidate_profile
+            )
+            if not bypass_cache:
+                cached = await self.decision_cache.get(cache_key)
+                if cached:
+                    cached.meta.stage = "cache"
+                    logger.info(f"⚡ Cached Decision: {cached.decision}")
+                    return cached
+
+            # 3. Build Prompt
             messages = PromptTemplates.build_screener_prompt(agent_profile, candidate_profile)
-            
-            # 2. Call Ollama
-            payload = {
-                "model": self.model_name,
-                "messages": messages,
-                "stream": False,
-                "format": "json",  # Forces JSON mode
-                "options": {
-                    "temperature": 0.2, # Lower temp = more consistent JSON
-                    "num_ctx": 4096,    # Context window
-                    "num_gpu": -1       # Force all layers to GPU
-                }
-            }
-
-            logger.info(f"Brain Thinking... (Model: {self.model_name})")
-            
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(self.model_url, json=payload)
-                response.raise_for_status()
-                
-            result_json = response.json()
-            raw_content = result_json.get('message', {}).get('content', '')
 
-            # DEBUG: Print what the model actually said
-            print(f"\nRAW MODEL OUTPUT:\n{raw_content}\n")
+            # 4. Cascade stage 2: small model, trusted only when it is confident
+            validated_decision = None
+            if self.small_client:
+                validated_decision = await self._try_small_model(messages, calls)
 
-            # 3. Robust Parsing
-            decision_data = self._clean_and_parse_json(raw_content)
-            
-            # 4. Validate with Pydantic
-            validated_decision = AgentDecision(**decision_data)
+            # 5. Cascade stage 3: main model for everything still uncertain
+            if validated_decision is None:
+                logger.info(f"Brain Thinking... (Model: {self.model_name})")
+                validated_decision = await self._run_model(self.client, messages, calls)
+                validated_decision.meta.stage = "main_model"
+
+            # 6. ACCEPT without a message (early-exit stream): written only now that
+            #    the final stage has decided, by that stage's model
+            if validated_decision.decision == "ACCEPT" and not validated_decision.generated_message:
+                writer = self.small_client if validated_decision.meta.stage == "small_model" else self.client
+                validated_decision.generated_message = await self._guarded(
+                    self._write_message(writer, agent_profile, candidate_profile, validated_decision.reasoning, calls)
+                )
+
+            validated_decision.meta.calls = calls
+
+            await self.decision_cache.set(cache_key, validated_decision)
             
-            logger.info(f"✅ Decision: {validated_decision.decision}")
+            logger.info(f"✅ Decision: {validated_decision.decision} ({validated_decision.meta.stage})")
             return validated_decision
 
+        except CircuitOpenError:
+            # Let the caller pause / requeue instead of burning the message
+            raise
         except Exception as e:
             logger.error(f"❌ Brain Failure: {e}")
             return None
 
+    async def _try_small_model(self, messages: list, calls: List[dict]) -> Optional[AgentDecision]:
+        """
+        Returns the small model's decision if it is decisive enough, else None (escalate).
+        """
+        try:
+            decision = await self._run_model(self.small_client, messages, calls)
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            logger.warning(f"Small model failed, escalating: {e}")
+            return None
+
+        if decision.decision == "HOLD" or decision.confidence_score < self.small_model_min_confidence:
+            logger.info(
+                f"Small model unsure ({decision.decision} @ {decision.confidence_score:.2f}), escalating"
+            )
+            return None
+
+        decision.meta.stage = "small_model"
+        return decision
+
+    async def _run_model(self, client: InferenceRouter, messages: list, calls: List[dict]) -> AgentDecision:
+        """
+        One screening call (behind the breaker and the adaptive limiter), validated.
+        """
+        if self.streaming:
+            decision = await self._guarded(self._decide_streaming(client, messages, calls))
+        else:
+            decision = await self._guarded(self._decide_blocking(client, messages, calls))
+
+        decision.meta.model = client.model
+        return decision
+
+    def _record_parse_failure(self, model: str, wasted_tokens: int):
+        self.parse_stats["failed"] += 1
+        self.parse_stats["wasted_tokens"] += wasted_tokens
+        telemetry.record_parse_failure(model, "screener", wasted_tokens)
+
+    @staticmethod
+    def _is_backend_failure(error: Exception) -> bool:
+        """Overload / outage errors (as opposed to bad model output)."""
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code == 429 or error.response.status_code >= 500
+        return isinstance(error, (httpx.TransportError, NoBackendAvailable, asyncio.TimeoutError))
+
+    async def _guarded(self, call: Awaitable):
+        """
+        Runs an LLM call under the circuit breaker and the adaptive limiter.
+        Only backend failures count against the breaker / shrink the limit.
+        """
+        try:
+            is_probe = self.breaker.before_call()
+        except CircuitOpenError:
+            call.close()  # Never awaited: avoid the "coroutine was never awaited" warning
+            raise
+
+        settled = False
+        try:
+            async with self.limiter.acquire() as permit:
+                try:
+                    result = await call
+                except Exception as e:
+                    settled = True
+                    if self._is_backend_failure(e):
+                        permit.drop()
+                        self.breaker.record_failure()
+                    else:
+                        self.breaker.record_success()
+                    raise
+                settled = True
+                self.breaker.record_success()
+                return result
+        finally:
+            if not settled:
+                # Cancelled (in the call or while waiting for a permit): no verdict on
+                # the backend, but a half-open probe must not stay in flight forever
+                call.close()
+                if is_probe:
+                    self.breaker.abort_probe()
+
+    async def _decide_blocking(
+        self,
+        client: InferenceRouter,
+        messages: list,
+        calls: List[dict]
+    ) -> AgentDecision:
+        """
+        Single non-streamed completion (decision + message in one go).
+        """
+        started = time.perf_counter()
+        result_json = await client.chat_raw(
+            messages,
+            temperature=0.2,  # Lower temp = more consistent JSON
+            max_tokens=settings.BRAIN_DECISION_NUM_PREDICT + settings.BRAIN_MESSAGE_NUM_PREDICT,
+            format=llm_output_schema(AgentDecision),  # Grammar-constrained to the schema
+            options=self.options
+        )
+        raw_content = result_json.get('message', {}).get('content', '')
+        calls.append(telemetry.record_inference(
+            client.model, "screener", result_json, wall_seconds=time.perf_counter() - started
+        ))
+        logger.debug(f"Raw model output: {raw_content}")
+
+        # Single-pass parse + validation (constrained decoding makes this the normal path)
+        try:
+            decision = AgentDecision.model_validate_json(raw_content)
+            self.parse_stats["parsed"] += 1
+            return decision
+        except ValidationError:
+            pass
+
+        # Fallback: repair (e.g. a backend that ignored the schema)
+        try:
+            decision = AgentDecision(**self._clean_and_parse_json(raw_content))
+            self.parse_stats["repaired"] += 1
+            return decision
+        except Exception:
+            self._record_parse_failure(client.model, result_json.get("eval_count", 0))
+            raise
+
+    async def _decide_streaming(
+        self,
+        client: InferenceRouter,
+        messages: list,
+        calls: List[dict]
+    ) -> AgentDecision:
+        """
+        Two-stage early-exit decoding.
+        Stage 1 streams the decision JSON and hangs up as soon as a REJECT/HOLD
+        verdict and its reasoning are known (most candidates), so the message is
+        never generated. Stage 2 (`_write_message`) writes the connection message
+        for ACCEPT when it did not arrive within the stage 1 budget; the caller
+        runs it once the cascade has settled, so an escalated small-model ACCEPT
+        never pays for a message that is thrown away.
+        """
+        parser = IncrementalJSONParser()
+        final_chunk = None
+        ttft = None
+        started = time.perf_counter()
+        stream = client.chat_stream_raw(
+            messages,
+            temperature=0.2,
+            max_tokens=settings.BRAIN_DECISION_NUM_PREDICT,
+            format=llm_output_schema(AgentDecision),
+            options=self.options
+        )
+
+        # aclosing() guarantees the HTTP stream is closed on break, which aborts generation
+        async with aclosing(stream):
+            async for chunk in stream:
+                if chunk.get("done"):
+                    final_chunk = chunk  # Carries the eval stats
+                    break
+
+                content = chunk.get("message", {}).get("content", "")
+                if content and ttft is None:
+                    ttft = time.perf_counter() - started
+                parser.feed(content)
+                if self._decision_complete(parser.fields):
+                    break
+
+        # Cancelled streams have no server stats: count the chunks we received instead
+        calls.append(telemetry.record_inference(
+            client.model, "screener", final_chunk,
+            ttft=ttft,
+            generated_tokens=parser.chunks_seen,
+            wall_seconds=time.perf_counter() - started,
+            early_exit=final_chunk is None
+        ))
+
+        fields = parser.fields
+        if fields.get("decision") is None or not self._has_rationale(fields):
+            self._record_parse_failure(client.model, parser.chunks_seen)
+            raise ValueError(f"Truncated decision stream after {parser.chunks_seen} chunks: {fields}")
+
+        try:
+            decision = AgentDecision(**fields)
+        except ValidationError:
+            self._record_parse_failure(client.model, parser.chunks_seen)
+            raise
+        self.parse_stats["parsed"] += 1
+
+        logger.info(f"Stage 1 generated ~{parser.chunks_seen} tokens ({decision.decision})")
+
+        if decision.decision != "ACCEPT":
+            decision.generated_message = None
+
+        return decision
+
+    async def _write_message(
+        self,
+        client: InferenceRouter,
+        agent_profile: Dict[str, Any],
+        candidate_profile: Dict[str, Any],
+        reasoning: str,
+        calls: List[dict]
+    ) -> str:
+        """
+        Message-only call for ACCEPT decisions (shares the screener prompt prefix).
+        """
+        message_prompt = PromptTemplates.build_message_prompt(agent_profile, candidate_profile, reasoning)
+        started = time.perf_counter()
+        result_json = await client.chat_raw(
+            message_prompt,
+            temperature=0.7,
+            max_tokens=settings.BRAIN_MESSAGE_NUM_PREDICT,
+            options=self.options
+        )
+        calls.append(telemetry.record_inference(
+            client.model, "message", result_json, wall_seconds=time.perf_counter() - started
+        ))
+        return result_json["message"]["content"].strip().strip('"')
+
+    @staticmethod
+    def _has_rationale(fields: Dict) -> bool:
+        return "confidence_score" in fields and "reasoning" in fields
+
+    def _decision_complete(self, fields: Dict) -> bool:
+        decision = fields.get("decision")
+        if decision is None or not self._has_rationale(fields):
+            return False
+        if decision != "ACCEPT":
+            return True
+        # ACCEPT: keep streaming only until the message itself is complete
+        return "generated_message" in fields
+
     def _clean_and_parse_json(self, raw_text: str) -> Dict:
         """
         Robustly extracts JSON, handling markdown blocks and messy output.
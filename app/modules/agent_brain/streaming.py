@@ -0,0 +1,159 @@
+"""
+Incremental JSON parsing for streamed LLM output.
+"""
+import json
+from typing import Any, Dict, List, Tuple
+
+# Parser states
+_EXPECT_OBJECT = "expect_object"
+_EXPECT_KEY = "expect_key"
+_IN_KEY = "in_key"
+_EXPECT_COLON = "expect_colon"
+_EXPECT_VALUE = "expect_value"
+_IN_STRING = "in_string"
+_IN_NESTED = "in_nested"
+_IN_SCALAR = "in_scalar"
+_DONE = "done"
+
+_SCALAR_TERMINATORS = ",}" + " \t\r\n"
+
+
+class IncrementalJSONParser:
+    """
+    Streaming parser for a single top-level JSON object.
+
+    Feed it chunks as they arrive; every top-level field is published in
+    `fields` as soon as its value is complete. This lets the caller act on
+    `decision` while the model is still generating the rest of the object.
+    Leading junk before the first '{' (e.g. a markdown fence) is skipped.
+    """
+
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self.chunks_seen = 0
+        self._state = _EXPECT_OBJECT
+        self._raw: List[str] = []
+        self._key = None
+        self._escape = False
+        self._depth = 0
+        self._nested_in_string = False
+
+    @property
+    def done(self) -> bool:
+        return self._state == _DONE
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        Consumes a chunk and returns the (key, value) pairs completed by it.
+        """
+        self.chunks_seen += 1
+        completed = []
+        for ch in chunk:
+            if self._state == _DONE:
+                break
+            pair = self._step(ch)
+            if pair:
+                completed.append(pair)
+        return completed
+
+    # -------------------------------------------------------------------------
+    # State machine
+    # -------------------------------------------------------------------------
+    def _step(self, ch: str):
+        state = self._state
+
+        if state == _EXPECT_OBJECT:
+            if ch == "{":
+                self._state = _EXPECT_KEY
+            return None
+
+        if state == _EXPECT_KEY:
+            if ch == '"':
+                self._raw = [ch]
+                self._escape = False
+                self._state = _IN_KEY
+            elif ch == "}":
+                self._state = _DONE
+            return None
+
+        if state == _IN_KEY:
+            self._raw.append(ch)
+            if self._closes_string(ch):
+                self._key = json.loads("".join(self._raw))
+                self._state = _EXPECT_COLON
+            return None
+
+        if state == _EXPECT_COLON:
+            if ch == ":":
+                self._state = _EXPECT_VALUE
+            return None
+
+        if state == _EXPECT_VALUE:
+            if ch.isspace():
+                return None
+            self._raw = [ch]
+            self._escape = False
+            if ch == '"':
+                self._state = _IN_STRING
+            elif ch in "{[":
+                self._depth = 1
+                self._nested_in_string = False
+                self._state = _IN_NESTED
+            else:
+                self._state = _IN_SCALAR
+            return None
+
+        if state == _IN_STRING:
+            self._raw.append(ch)
+            if self._closes_string(ch):
+                return self._complete()
+            return None
+
+        if state == _IN_NESTED:
+            self._raw.append(ch)
+            if self._nested_in_string:
+                if self._closes_string(ch):
+                    self._nested_in_string = False
+            elif ch == '"':
+                self._nested_in_string = True
+                self._escape = False
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    return self._complete()
+            return None
+
+        if state == _IN_SCALAR:
+            if ch in _SCALAR_TERMINATORS:
+                pair = self._complete()
+                if ch == "}":
+                    self._state = _DONE
+                return pair
+            self._raw.append(ch)
+            return None
+
+        return None
+
+    def _closes_string(self, ch: str) -> bool:
+        if self._escape:
+            self._escape = False
+            return False
+        if ch == "\\":
+            self._escape = True
+            return False
+        # The opening quote is the first char of _raw; only a later quote closes
+        return ch == '"' and len(self._raw) > 1
+
+    def _complete(self):
+        raw = "".join(self._raw)
+        self._raw = []
+        self._state = _EXPECT_KEY
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            # Malformed value: leave it out, final validation will catch it
+            return None
+        self.fields[self._key] = value
+        return (self._key, value)
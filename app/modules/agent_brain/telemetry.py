@@ -0,0 +1,143 @@
+"""
+Inference telemetry (Prometheus).
+
+Ollama reports per-request timings that tell us where GPU time goes:
+load_duration (model cold load), prompt_eval_* (prefill) and eval_* (decode),
+all in nanoseconds. We turn them into per-model / per-prompt-type metrics and
+a compact per-call summary that is stored with each AgentTrace.
+"""
+from typing import Any, Dict, Optional
+
+from prometheus_client import Counter, Histogram
+
+from app.core.config import settings
+
+NS = 1e9
+LABELS = ["model", "prompt_type"]
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+PROMPT_TOKENS = Counter(
+    "llm_prompt_tokens_total", "Prompt tokens evaluated (prefill)", LABELS
+)
+GENERATED_TOKENS = Counter(
+    "llm_generated_tokens_total", "Tokens generated (decode)", LABELS
+)
+REQUESTS = Counter(
+    "llm_requests_total", "LLM calls by outcome", LABELS + ["outcome"]
+)
+TOKENS_PER_SECOND = Histogram(
+    "llm_generation_tokens_per_second", "Decode throughput per call", LABELS,
+    buckets=(5, 10, 20, 30, 50, 75, 100, 150, 200, 400)
+)
+TIME_TO_FIRST_TOKEN = Histogram(
+    "llm_time_to_first_token_seconds", "Time until the first generated token", LABELS,
+    buckets=LATENCY_BUCKETS
+)
+PROMPT_EVAL_SECONDS = Histogram(
+    "llm_prompt_eval_seconds", "Server-side prompt evaluation (prefill) time", LABELS,
+    buckets=LATENCY_BUCKETS
+)
+GENERATION_SECONDS = Histogram(
+    "llm_generation_seconds", "Server-side generation (decode) time", LABELS,
+    buckets=LATENCY_BUCKETS
+)
+MODEL_LOAD_SECONDS = Histogram(
+    "llm_model_load_seconds", "Model load time reported by the backend", ["model"],
+    buckets=(0.01, 0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0)
+)
+COLD_LOADS = Counter(
+    "llm_model_cold_loads_total", "Calls that paid a model (re)load", ["model"]
+)
+PARSE_FAILURES = Counter(
+    "llm_parse_failures_total", "Outputs lost to malformed JSON / schema violations", LABELS
+)
+WASTED_TOKENS = Counter(
+    "llm_wasted_tokens_total", "Tokens generated for outputs that failed to parse", LABELS
+)
+
+
+def record_inference(
+    model: str,
+    prompt_type: str,
+    response: Optional[Dict[str, Any]] = None,
+    ttft: Optional[float] = None,
+    generated_tokens: Optional[int] = None,
+    wall_seconds: Optional[float] = None,
+    early_exit: bool = False
+) -> Dict[str, Any]:
+    """
+    Records one LLM call and returns its compact summary (for AgentTrace).
+
+    `response` is an Ollama-shaped response / final stream chunk (may be None
+    when a stream was cancelled early). `ttft` is measured client-side for
+    streams; for blocking calls it is approximated as load + prefill time.
+    """
+    response = response or {}
+    labels = {"model": model, "prompt_type": prompt_type}
+
+    prompt_tokens = response.get("prompt_eval_count", 0) or 0
+    gen_tokens = response.get("eval_count") or generated_tokens or 0
+    prompt_s = (response.get("prompt_eval_duration") or 0) / NS
+    gen_s = (response.get("eval_duration") or 0) / NS
+    load_s = (response.get("load_duration") or 0) / NS
+
+    REQUESTS.labels(outcome="early_exit" if early_exit else "ok", **labels).inc()
+    PROMPT_TOKENS.labels(**labels).inc(prompt_tokens)
+    GENERATED_TOKENS.labels(**labels).inc(gen_tokens)
+
+    if prompt_s:
+        PROMPT_EVAL_SECONDS.labels(**labels).observe(prompt_s)
+    if gen_s:
+        GENERATION_SECONDS.labels(**labels).observe(gen_s)
+        TOKENS_PER_SECOND.labels(**labels).observe(gen_tokens / gen_s)
+
+    if ttft is None and (load_s or prompt_s):
+        ttft = load_s + prompt_s
+    if ttft is not None:
+        TIME_TO_FIRST_TOKEN.labels(**labels).observe(ttft)
+
+    if load_s:
+        record_model_load(model, load_s)
+
+    summary = {
+        "model": model,
+        "type": prompt_type,
+        "prompt_tokens": prompt_tokens,
+        "gen_tokens": gen_tokens,
+        "prompt_ms": round(prompt_s * 1000, 1),
+        "gen_ms": round(gen_s * 1000, 1),
+        "load_ms": round(load_s * 1000, 1),
+    }
+    if ttft is not None:
+        summary["ttft_ms"] = round(ttft * 1000, 1)
+    if wall_seconds is not None:
+        summary["wall_ms"] = round(wall_seconds * 1000, 1)
+    if early_exit:
+        summary["early_exit"] = True
+    return summary
+
+
+def record_model_load(model: str, load_seconds: float):
+    MODEL_LOAD_SECONDS.labels(model=model).observe(load_seconds)
+    if load_seconds >= settings.LLM_COLD_LOAD_THRESHOLD_SECONDS:
+        COLD_LOADS.labels(model=model).inc()
+
+
+def record_parse_failure(model: str, prompt_type: str, wasted_tokens: int):
+    labels = {"model": model, "prompt_type": prompt_type}
+    REQUESTS.labels(outcome="parse_failure", **labels).inc()
+    PARSE_FAILURES.labels(**labels).inc()
+    WASTED_TOKENS.labels(**labels).inc(wasted_tokens)
+
+
+def summarize_calls(calls: list) -> Dict[str, Any]:
+    """
+    Compact per-decision summary stored in AgentTrace.inference_stats.
+    """
+    return {
+        "calls": calls,
+        "prompt_tokens": sum(c.get("prompt_tokens", 0) for c in calls),
+        "gen_tokens": sum(c.get("gen_tokens", 0) for c in calls),
+        "wall_ms": round(sum(c.get("wall_ms", 0) for c in calls), 1),
+    }
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 from typing import List, Optional
-from sqlalchemy import String, Boolean, Float, DateTime, ARRAY, ForeignKey, Text, Index
+from sqlalchemy import String, Boolean, Float, DateTime, ARRAY, ForeignKey, Text, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from pgvector.sqlalchemy import Vector
@@ -30,6 +30,8 @@ class User(Base):
     
     # Scheduler
     activity_schedule: Mapped[Optional[List[float]]] = mapped_column(ARRAY(Float), nullable=True)    
+    # Plan tier: "pro" agents wake every active hour, "free" every 6 hours (+ serendipity)
+    tier: Mapped[str] = mapped_column(String, default="free", server_default="free")
     # Meta
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -54,8 +56,58 @@ class AgentTrace(Base):
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     agent_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"))
+    # Screened candidate (no FK: traces outlive deleted accounts)
+    candidate_id: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), index=True, nullable=True)
     interaction_type: Mapped[str] = mapped_column(String)
+    # What the agent saw: content-addressed, deduplicated profile snapshots
+    agent_snapshot_hash: Mapped[Optional[str]] = mapped_column(ForeignKey("profile_snapshots.hash"), nullable=True)
+    candidate_snapshot_hash: Mapped[Optional[str]] = mapped_column(ForeignKey("profile_snapshots.hash"), nullable=True)
+    # Pair-specific recsys score the agent saw (not part of the candidate snapshot)
+    match_score: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
     reasoning_log: Mapped[dict] = mapped_column(JSONB)
     decision: Mapped[str] = mapped_column(String)
+    # Cascade stage that produced the decision: rules | cache | small_model | main_model
+    decision_stage: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    # Compact token / latency summary of the LLM calls behind the decision
+    inference_stats: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)
+    # Auditor progress: PENDING -> AUDITED (verdict stored in agent_audits)
+    #                            | SKIPPED (not drawn by risk sampling) | FAILED (unparseable verdict)
+    audit_status: Mapped[str] = mapped_column(String, default="PENDING", server_default="PENDING")
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
-    agent: Mapped["User"] = relationship(back_populates="traces")
\ No newline at end of file
+    agent: Mapped["User"] = relationship(back_populates="traces")
+    audit: Mapped[Optional["AgentAudit"]] = relationship(back_populates="trace")
+
+    __table_args__ = (
+        # Only the unaudited tail is indexed: the auditor's keyset scan stays
+        # proportional to new traces, not to the whole history
+        Index(
+            'idx_agent_traces_audit_pending',
+            'created_at', 'id',
+            postgresql_where=text("audit_status = 'PENDING'")
+        ),
+    )
+
+
+class ProfileSnapshot(Base):
+    __tablename__ = "profile_snapshots"
+
+    # sha256 of the canonicalized profile: identical profiles are stored once
+    hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    profile: Mapped[dict] = mapped_column(JSONB)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class AgentAudit(Base):
+    __tablename__ = "agent_audits"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    trace_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("agent_traces.id"), unique=True)
+    status: Mapped[str] = mapped_column(String, index=True)  # PASS | FLAGGED
+    risk_level: Mapped[str] = mapped_column(String)          # LOW | MEDIUM | HIGH
+    audit_reasoning: Mapped[str] = mapped_column(Text)
+    model: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    # Risk sampling: feature score and inverse inclusion probability (for flag-rate estimates)
+    risk_score: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    sample_weight: Mapped[float] = mapped_column(Float, default=1.0, server_default="1.0")
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    trace: Mapped["AgentTrace"] = relationship(back_populates="audit")
\ No newline at end of file
@@ -0,0 +1,74 @@
+"""
+Content-addressed profile snapshots.
+
+Each trace references the agent and candidate profiles exactly as the agent
+saw them, by the hash of their canonical form. Identical profiles (the same
+agent waking up all day, a popular candidate) are stored once.
+"""
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Tuple
+
+from sqlalchemy.dialects.postgresql import insert
+
+from app.modules.agent_brain.cache import (
+    AGENT_PROFILE_FIELDS,
+    CANDIDATE_PROFILE_FIELDS,
+    canonicalize_profile,
+)
+from app.modules.identity.models import ProfileSnapshot
+
+# Candidates also carry the role shown in the feed. match_score belongs to the
+# agent-candidate pair and drifts, so it lives on the trace (agent_traces.match_score)
+CANDIDATE_SNAPSHOT_FIELDS = tuple(f for f in CANDIDATE_PROFILE_FIELDS if f != "match_score") + ("role",)
+
+
+def snapshot_profile(profile: Dict[str, Any], fields: Iterable[str]) -> Tuple[str, Dict[str, Any]]:
+    """Returns (sha256 hex, canonical profile)."""
+    canonical = canonicalize_profile(profile, fields)
+    material = json.dumps(canonical, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(material.encode()).hexdigest(), canonical
+
+
+def agent_snapshot(profile: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    return snapshot_profile(profile, AGENT_PROFILE_FIELDS)
+
+
+def candidate_snapshot(profile: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    return snapshot_profile(profile, CANDIDATE_SNAPSHOT_FIELDS)
+
+
+class SnapshotStore:
+    """
+    Writes snapshots with INSERT ... ON CONFLICT DO NOTHING, skipping hashes
+    this process already knows are persisted (no round-trip for repeats).
+    """
+
+    def __init__(self, max_known: int = 100_000):
+        self.max_known = max_known
+        self._known: "OrderedDict[str, None]" = OrderedDict()
+
+    async def ensure(self, session, snapshots: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """
+        Adds the missing snapshots to the session's transaction.
+        Call `remember()` with the returned hashes once it has committed.
+        """
+        rows = {h: p for h, p in snapshots if h not in self._known}
+        if rows:
+            await session.execute(
+                insert(ProfileSnapshot)
+                .values([{"hash": h, "profile": p} for h, p in rows.items()])
+                .on_conflict_do_nothing(index_elements=["hash"])
+            )
+        return [h for h, _ in snapshots]
+
+    def remember(self, hashes: Iterable[str]):
+        for h in hashes:
+            self._known[h] = None
+            self._known.move_to_end(h)
+        while len(self._known) > self.max_known:
+            self._known.popitem(last=False)
+
+
+snapshot_store = SnapshotStore()
@@ -0,0 +1,219 @@
+"""
+Vectorized wake planning.
+
+Decides a whole chunk of agents at once on an (N x 24) activity matrix:
+- awake mask: activity > 0 in the planned hour (0.0 = deep sleep)
+- wake probability: tier / slot base rate x the agent's activity in that
+  hour relative to its own peak hour, so the schedule values shape load
+  (a flat default schedule keeps the plain tier rates)
+- jitter: one uniform offset per woken agent, spreading the hour's load
+
+With a capacity model (SCHEDULER_CAPACITY_PER_MINUTE) the jitter is replaced
+by LoadShaper, which water-fills wake-ups into the least-loaded minutes of
+the window, spills what doesn't fit into later minutes and sheds serendipity
+wakes first.
+"""
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+HOURS = 24
+DEFAULT_ACTIVITY = 0.1
+
+# Base wake rates (before activity weighting)
+PRO_RATE = 1.0            # Pro: every active hour
+FREE_SLOT_RATE = 1.0      # Free: every 6 hours (0, 6, 12, 18)
+FREE_SERENDIPITY_RATE = 0.10  # Free, off-slot (Track C)
+FREE_SLOT_EVERY = 6
+
+MAX_JITTER_SECONDS = 3500  # 0 to 58 mins
+
+
+def make_rng(seed: Optional[int], plan_hour_ts: int) -> np.random.Generator:
+    """
+    Seeded runs are reproducible per planned hour; no seed = fresh entropy.
+    """
+    if seed is None:
+        return np.random.default_rng()
+    return np.random.default_rng([seed, plan_hour_ts])
+
+
+def schedules_matrix(schedules: Sequence[Optional[List[float]]]) -> np.ndarray:
+    """
+    (N x 24) float matrix; missing or malformed schedules get the flat default.
+    """
+    matrix = np.full((len(schedules), HOURS), DEFAULT_ACTIVITY, dtype=np.float32)
+    valid = [i for i, s in enumerate(schedules) if s is not None and len(s) == HOURS]
+    if valid:
+        matrix[valid] = np.asarray([schedules[i] for i in valid], dtype=np.float32)
+    return matrix
+
+
+def select_wakes(
+    schedules: np.ndarray,
+    is_pro: np.ndarray,
+    hour: int,
+    rng: np.random.Generator
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns (indices of agents to wake, mask of those that are serendipity
+    wakes, i.e. free tier off-slot / Track C).
+    """
+    activity = schedules[:, hour]
+    awake = activity > 0.0
+
+    # Activity relative to the agent's own peak hour, in (0, 1]
+    peak = schedules.max(axis=1)
+    weight = np.divide(activity, peak, out=np.zeros_like(activity), where=peak > 0)
+    np.clip(weight, 0.0, 1.0, out=weight)
+
+    if hour % FREE_SLOT_EVERY == 0:
+        free_rate = FREE_SLOT_RATE
+    else:
+        free_rate = FREE_SERENDIPITY_RATE
+    base = np.where(is_pro, PRO_RATE, free_rate)
+
+    wake = awake & (rng.random(len(activity)) < base * weight)
+    indices = np.flatnonzero(wake)
+    serendipity = np.zeros(len(indices), dtype=bool) if free_rate == FREE_SLOT_RATE else ~is_pro[indices]
+    return indices, serendipity
+
+
+def minute_capacity(first_minute: int, minutes: int, capacity_per_minute: int, share: int = 0, shares: int = 1) -> np.ndarray:
+    """
+    Whole wake-ups per minute for one of `shares` equal shares of
+    `capacity_per_minute` (e.g. a shard). The fraction is carried from minute
+    to minute (floor((m + 1) * c) - floor(m * c)) and each share is offset by
+    share / shares of a wake-up, so the shares of any minute add up to the
+    full capacity instead of each rounding down.
+    """
+    edges = np.arange(first_minute, first_minute + minutes + 1, dtype=np.int64) * capacity_per_minute + share
+    return np.diff(edges // shares)
+
+
+def water_fill(load: np.ndarray, capacity: np.ndarray, count: int) -> np.ndarray:
+    """
+    Spreads `count` items over slots with the given load, always topping up
+    the lowest slots first and never past `capacity`. Returns the per-slot
+    allocation (sums to less than `count` when the room runs out).
+    """
+    room = np.maximum(capacity - load, 0).astype(np.int64)
+    if count >= room.sum():
+        return room
+    if count <= 0:
+        return np.zeros_like(room)
+
+    # Water level: the highest h with sum(clip(h - load, 0, room)) <= count
+    low, high = float(load.min()), float((load + room).max())
+    for _ in range(64):
+        mid = (low + high) / 2
+        if np.clip(np.floor(mid - load), 0, room).sum() <= count:
+            low = mid
+        else:
+            high = mid
+    alloc = np.clip(np.floor(low - load), 0, room).astype(np.int64)
+
+    # Integer remainder: one more item each to the lowest slots with room left
+    remainder = count - int(alloc.sum())
+    while remainder > 0:
+        order = np.argsort(load + alloc, kind="stable")
+        order = order[alloc[order] < room[order]][:remainder]
+        alloc[order] += 1
+        remainder -= len(order)
+    return alloc
+
+
+class LoadShaper:
+    """
+    Capacity-aware wake placement for one planning window.
+
+    `load` is the wake-ups already scheduled per minute, from the window start
+    through the spill horizon. Callers place groups in priority order (pro,
+    then free slot, then serendipity); each group is water-filled into the
+    window's spare capacity, then into the spill minutes, and only then (if
+    it may not be shed) levelled over the whole horizon above capacity.
+    """
+
+    def __init__(
+        self,
+        window_start: float,
+        load: np.ndarray,
+        capacity_per_minute: Union[float, np.ndarray],
+        window_minutes: int,
+        rng: np.random.Generator,
+        not_before: Optional[float] = None
+    ):
+        self.window_start = window_start
+        self.load = load.astype(np.int64)
+        # A scalar, or per-minute capacities (see minute_capacity)
+        self.capacity = np.broadcast_to(np.asarray(capacity_per_minute, dtype=np.float64), len(load)).copy()
+        self.window_minutes = min(window_minutes, len(load))
+        self.rng = rng
+        self.not_before = not_before if not_before is not None else window_start
+        self.spilled = 0
+        self.shed = 0
+
+    def allocate(self, count: int, sheddable: bool = False, window_minutes: Optional[int] = None) -> np.ndarray:
+        """
+        Reserves room for `count` items without stamping them: the per-minute
+        allocation, with the number shed as one extra, last slot. `draw`
+        stamps it part by part. `window_minutes` overrides the window (e.g.
+        a wider one for catch-up work).
+        """
+        window_minutes = min(window_minutes or self.window_minutes, len(self.load))
+        window = slice(0, window_minutes)
+        alloc = np.zeros(len(self.load), dtype=np.int64)
+        alloc[window] = water_fill(self.load[window], self.capacity[window], count)
+        left = count - int(alloc.sum())
+        shed = 0
+
+        if left and sheddable:
+            shed = left
+            self.shed += left
+        elif left:
+            spill = slice(window_minutes, len(self.load))
+            alloc[spill] = water_fill(self.load[spill], self.capacity[spill], left)
+            self.spilled += int(alloc[spill].sum())
+            left = count - int(alloc.sum())
+            if left:
+                # Over capacity everywhere: level the rest over the whole horizon
+                level = self.load + alloc
+                alloc += water_fill(level, np.full(len(level), float(level.max() + left)), left)
+
+        self.load += alloc
+        return np.append(alloc, shed)
+
+    def place(self, count: int, sheddable: bool = False, window_minutes: Optional[int] = None) -> np.ndarray:
+        """
+        Returns wake timestamps for up to `count` items (fewer if some were
+        shed), in no particular order.
+        """
+        return self._stamps(self.allocate(count, sheddable, window_minutes)[:-1])
+
+    def draw(
+        self,
+        plan: np.ndarray,
+        count: int,
+        sheddable: bool = False,
+        window_minutes: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Stamps `count` items taken at random (without replacement) from an
+        `allocate` result, which is updated in place: a group counted in one
+        pass is placed chunk by chunk, and which items spill or are shed does
+        not depend on the chunk. Items beyond the allocation (the group grew
+        since it was counted) are placed now. Returns fewer stamps than
+        `count` when some were shed.
+        """
+        take = min(count, int(plan.sum()))
+        drawn = self.rng.multivariate_hypergeometric(plan, take)
+        plan -= drawn
+        alloc = drawn[:-1]
+        if count > take:
+            alloc = alloc + self.allocate(count - take, sheddable, window_minutes)[:-1]
+        return self._stamps(alloc)
+
+    def _stamps(self, alloc: np.ndarray) -> np.ndarray:
+        minutes = np.repeat(np.arange(len(alloc)), alloc)
+        stamps = self.window_start + (minutes + self.rng.random(len(minutes))) * 60.0
+        return np.maximum(stamps, self.not_before)
@@ -0,0 +1,165 @@
+"""
+Agent-ID-space sharding for the TimeEngine.
+
+The UUID space is split into SCHEDULER_NUM_SHARDS contiguous ranges. Each
+shard has its own schedule keys (see store.py), and is owned by at most one
+scheduler instance at a time through a Redis lease:
+
+- every instance heartbeats into `scheduler:instances`
+- the desired owner of a shard is picked by rendezvous hashing over the live
+  instances, so joins / leaves only move ~1/N of the shards
+- an instance acquires the leases of its desired shards (SET NX PX), renews
+  them on every heartbeat, and releases the ones it should no longer own
+- a crashed instance's leases simply expire and are picked up by the new
+  desired owner
+
+Deliberately free of DB imports (the brain's residency manager uses it).
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.redis import RedisClient
+
+logger = logging.getLogger("qoneqt.scheduler.shards")
+
+REDIS_KEY_INSTANCES = "scheduler:instances"
+UUID_SPACE = 1 << 128
+
+# Renew / release only if we still hold the lease. KEYS: lease. ARGV: owner, ttl ms
+RENEW_LEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_LEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def lease_key(shard: int) -> str:
+    return f"scheduler:lease:{shard}"
+
+
+def shard_for(agent_id, num_shards: int = settings.SCHEDULER_NUM_SHARDS) -> int:
+    value = agent_id.int if isinstance(agent_id, uuid.UUID) else uuid.UUID(str(agent_id)).int
+    return value * num_shards // UUID_SPACE
+
+
+def shard_range(shard: int, num_shards: int = settings.SCHEDULER_NUM_SHARDS) -> Tuple[uuid.UUID, Optional[uuid.UUID]]:
+    """
+    [low, high) UUID bounds of a shard (high is None for the last shard).
+    Postgres orders UUIDs bytewise, i.e. like their integer value.
+    """
+    low = -(-shard * UUID_SPACE // num_shards)  # ceil: first UUID mapped to this shard
+    high = -(-(shard + 1) * UUID_SPACE // num_shards)
+    return uuid.UUID(int=low), (uuid.UUID(int=high) if high < UUID_SPACE else None)
+
+
+def _rendezvous_score(shard: int, instance_id: str) -> int:
+    digest = hashlib.blake2b(f"{shard}:{instance_id}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+class ShardCoordinator:
+    """
+    Tracks which shards this scheduler instance owns. `owned_shards` is the
+    source of truth for the planner and the ticker.
+    """
+
+    def __init__(
+        self,
+        num_shards: int = settings.SCHEDULER_NUM_SHARDS,
+        lease_ttl: float = settings.SCHEDULER_LEASE_TTL_SECONDS,
+        heartbeat_interval: float = settings.SCHEDULER_HEARTBEAT_SECONDS,
+        instance_id: Optional[str] = None
+    ):
+        self.num_shards = num_shards
+        self.lease_ttl = lease_ttl
+        self.heartbeat_interval = heartbeat_interval
+        self.instance_id = instance_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.owned_shards: Set[int] = set()
+        self._renew = None
+        self._release = None
+
+    def _scripts(self, redis):
+        if self._renew is None:
+            self._renew = redis.register_script(RENEW_LEASE_LUA)
+            self._release = redis.register_script(RELEASE_LEASE_LUA)
+        return self._renew, self._release
+
+    async def live_instances(self) -> List[str]:
+        redis = RedisClient.get_instance()
+        now = time.time()
+        # Drop instances that stopped heartbeating
+        await redis.zremrangebyscore(REDIS_KEY_INSTANCES, "-inf", now - self.lease_ttl)
+        return await redis.zrangebyscore(REDIS_KEY_INSTANCES, now - self.lease_ttl, "+inf")
+
+    def desired_shards(self, instances: List[str]) -> Set[int]:
+        if self.instance_id not in instances:
+            instances = instances + [self.instance_id]
+        return {
+            shard for shard in range(self.num_shards)
+            if max(instances, key=lambda i: _rendezvous_score(shard, i)) == self.instance_id
+        }
+
+    async def heartbeat(self):
+        """One round: announce liveness, renew / acquire / release leases."""
+        redis = RedisClient.get_instance()
+        renew, release = self._scripts(redis)
+        ttl_ms = int(self.lease_ttl * 1000)
+
+        await redis.zadd(REDIS_KEY_INSTANCES, {self.instance_id: time.time()})
+        desired = self.desired_shards(await self.live_instances())
+
+        owned = set()
+        for shard in range(self.num_shards):
+            key = lease_key(shard)
+            if shard in self.owned_shards:
+                if shard not in desired:
+                    # Rebalance: hand the shard to its new desired owner
+                    await release(keys=[key], args=[self.instance_id])
+                    continue
+                if await renew(keys=[key], args=[self.instance_id, ttl_ms]):
+                    owned.add(shard)
+                    continue
+                logger.warning(f"Lost lease on shard {shard}")
+            if shard in desired and await redis.set(key, self.instance_id, nx=True, px=ttl_ms):
+                owned.add(shard)
+
+        if owned != self.owned_shards:
+            logger.info(
+                f"Shards owned by {self.instance_id}: {sorted(owned)} "
+                f"(+{sorted(owned - self.owned_shards)} -{sorted(self.owned_shards - owned)})"
+            )
+        self.owned_shards = owned
+
+    async def run(self):
+        """
+        Runs forever: heartbeats and rebalances every `heartbeat_interval`.
+        """
+        while True:
+            try:
+                await self.heartbeat()
+            except Exception as e:
+                # Leases keep their TTL: a short Redis blip does not lose ownership
+                logger.error(f"Shard heartbeat error: {e}")
+            await asyncio.sleep(self.heartbeat_interval)
+
+    async def release_all(self):
+        redis = RedisClient.get_instance()
+        _, release = self._scripts(redis)
+        for shard in self.owned_shards:
+            await release(keys=[lease_key(shard)], args=[self.instance_id])
+        await redis.zrem(REDIS_KEY_INSTANCES, self.instance_id)
+        self.owned_shards = set()
@@ -0,0 +1,178 @@
+"""
+Dry-run scheduler simulation in virtual time (no Redis, no RabbitMQ).
+
+Runs the planner's wake rules (planning.select_wakes, uniform jitter or the
+LoadShaper capacity model) hour by hour over a population, releases wake-ups
+at their due minute like the ticker, and pushes them through a fluid model of
+the workers to forecast load:
+- wake-ups per minute (and per track: pro / free slot / serendipity)
+- offered LLM concurrency (Little's law: arrivals x decision time)
+- LLM-seconds per hour
+- with a worker slot count: queue backlog and worst wait
+
+As in the schedule store (NX adds), an agent keeps at most one pending
+wake-up: planning it again before a spilled wake-up fires keeps the earlier one.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.modules.scheduler import planning
+
+MINUTES_PER_HOUR = 60
+TRACKS = ("pro", "slot", "serendipity")
+
+
+def synthetic_population(
+    agents: int,
+    pro_share: float = 0.1,
+    rng: Optional[np.random.Generator] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Agents with a diurnal activity curve around a random peak hour (weighted
+    towards one main region) and six hours of deep sleep opposite the peak.
+    """
+    rng = rng or np.random.default_rng()
+    # 70% of agents peak around 14:00 UTC (main market), the rest anywhere
+    main = rng.random(agents) < 0.7
+    peak = np.where(main, rng.normal(14, 2.5, agents), rng.uniform(0, 24, agents)) % 24
+
+    hours = np.arange(planning.HOURS)
+    distance = np.abs(hours[None, :] - peak[:, None])
+    distance = np.minimum(distance, planning.HOURS - distance)
+    schedules = 0.1 + 0.9 * np.exp(-(distance ** 2) / (2 * 3.0 ** 2))
+    schedules[distance > 9] = 0.0  # Asleep
+    return {
+        "schedules": schedules.astype(np.float32),
+        "is_pro": rng.random(agents) < pro_share,
+    }
+
+
+@dataclass
+class SimulationResult:
+    start_hour: int
+    decision_seconds: float
+    wakes: Dict[str, np.ndarray]           # Per track, per simulated minute
+    planned: Dict[str, int] = field(default_factory=dict)
+    shed: int = 0
+    spilled: int = 0
+    kept: int = 0                          # Re-planned while still pending (NX: not re-added)
+    backlog: Optional[np.ndarray] = None   # Queued decisions at each minute end (worker model)
+    max_wait_seconds: Optional[float] = None
+
+    @property
+    def total(self) -> np.ndarray:
+        return sum(self.wakes.values())
+
+    @property
+    def concurrency(self) -> np.ndarray:
+        """Offered LLM concurrency per minute (decisions in flight on average)."""
+        return self.total * self.decision_seconds / 60.0
+
+    def hourly(self) -> List[dict]:
+        rows = []
+        total = self.total
+        for h in range(len(total) // MINUTES_PER_HOUR):
+            minutes = slice(h * MINUTES_PER_HOUR, (h + 1) * MINUTES_PER_HOUR)
+            hour_wakes = total[minutes]
+            rows.append({
+                "hour": (self.start_hour + h) % planning.HOURS,
+                **{track: int(self.wakes[track][minutes].sum()) for track in TRACKS},
+                "wakes": int(hour_wakes.sum()),
+                "peak_per_min": int(hour_wakes.max()),
+                "peak_to_mean": float(hour_wakes.max() / hour_wakes.mean()) if hour_wakes.sum() else 0.0,
+                "llm_seconds": float(hour_wakes.sum() * self.decision_seconds),
+                "peak_concurrency": float(self.concurrency[minutes].max()),
+            })
+        return rows
+
+
+class SchedulerSimulator:
+
+    def __init__(
+        self,
+        schedules: np.ndarray,
+        is_pro: np.ndarray,
+        capacity_per_minute: int = 0,
+        spill_minutes: int = 120,
+        decision_seconds: float = 4.0,
+        worker_slots: Optional[int] = None,
+        seed: Optional[int] = None
+    ):
+        self.schedules = schedules
+        self.is_pro = is_pro
+        self.capacity_per_minute = capacity_per_minute
+        self.spill_minutes = spill_minutes
+        self.decision_seconds = decision_seconds
+        self.worker_slots = worker_slots
+        self.seed = seed
+
+    def run(self, hours: int = 24, start_hour: int = 0) -> SimulationResult:
+        n = len(self.is_pro)
+        window_minutes = planning.MAX_JITTER_SECONDS // 60 + 1
+        horizon = hours * MINUTES_PER_HOUR + window_minutes + self.spill_minutes
+        wakes = {track: np.zeros(horizon, dtype=np.int64) for track in TRACKS}
+        # Pending wake-up minute per agent, -1 = none
+        pending_minute = np.full(n, -1, dtype=np.int64)
+        result = SimulationResult(start_hour, self.decision_seconds, wakes)
+        result.planned = {track: 0 for track in TRACKS}
+
+        for h in range(hours):
+            hour = (start_hour + h) % planning.HOURS
+            hour_start = h * MINUTES_PER_HOUR
+            rng = planning.make_rng(self.seed, h)
+            indices, serendipity = planning.select_wakes(self.schedules, self.is_pro, hour, rng)
+            # One pending wake-up per agent: a re-plan keeps a wake-up that hasn't fired
+            fresh = pending_minute[indices] < hour_start
+            result.kept += int((~fresh).sum())
+            indices, serendipity = indices[fresh], serendipity[fresh]
+            tracks = np.where(serendipity, 2, np.where(self.is_pro[indices], 0, 1)).astype(np.int8)
+
+            minutes = np.full(len(indices), -1, dtype=np.int64)
+            if self.capacity_per_minute > 0:
+                load = sum(wakes.values())[hour_start:hour_start + window_minutes + self.spill_minutes]
+                shaper = planning.LoadShaper(
+                    window_start=0.0,
+                    load=load,
+                    capacity_per_minute=self.capacity_per_minute,
+                    window_minutes=window_minutes,
+                    rng=rng
+                )
+                for track_index in range(len(TRACKS)):
+                    members = np.flatnonzero(tracks == track_index)
+                    rng.shuffle(members)
+                    stamps = shaper.place(len(members), sheddable=track_index == 2)
+                    minutes[members[:len(stamps)]] = hour_start + (stamps // 60).astype(np.int64)
+                result.shed += shaper.shed
+                result.spilled += shaper.spilled
+            else:
+                offsets = rng.integers(0, planning.MAX_JITTER_SECONDS, size=len(indices), endpoint=True)
+                minutes[:] = hour_start + offsets // 60
+
+            placed = minutes >= 0
+            indices, tracks, minutes = indices[placed], tracks[placed], minutes[placed]
+
+            for track_index, track in enumerate(TRACKS):
+                in_track = tracks == track_index
+                np.add.at(wakes[track], minutes[in_track], 1)
+                result.planned[track] += int(in_track.sum())
+            pending_minute[indices] = minutes
+
+        # Ticker releases at the due minute; report the simulated hours only
+        for track in TRACKS:
+            wakes[track] = wakes[track][:hours * MINUTES_PER_HOUR]
+        if self.worker_slots:
+            self._run_workers(result)
+        return result
+
+    def _run_workers(self, result: SimulationResult):
+        """Fluid queue: `worker_slots` decisions in parallel, FIFO backlog carried across minutes."""
+        per_minute = self.worker_slots * 60.0 / self.decision_seconds
+        backlog = np.zeros(len(result.total))
+        queued = 0.0
+        for minute, arrivals in enumerate(result.total):
+            queued = max(0.0, queued + arrivals - per_minute)
+            backlog[minute] = queued
+        result.backlog = backlog
+        result.max_wait_seconds = float(backlog.max() / per_minute * 60.0) if len(backlog) else 0.0
@@ -0,0 +1,489 @@
+"""
+Schedule stores: where planned wake-ups wait until they are due.
+
+RedisScheduleStore is a timing wheel. Each shard's wake-ups are spread over
+per-minute bucket ZSETs (`scheduler:{sN}:wheel:<minute>`), so no single key
+grows with the whole population and every command touches a small key:
+- buckets expire on their own (EXPIREAT minute end + SCHEDULER_BUCKET_TTL_SECONDS)
+- a per-shard cursor remembers the oldest bucket that may still hold work, and
+  the ticker drains from there up to the current minute
+- a per-shard index (member -> bucket) keeps one wake-up per agent, like the
+  single ZSET did. An entry is only trusted while its bucket still holds the
+  member; entries whose bucket expired are dropped when met, and each claim
+  sweeps a slice of the index (and of the routes hash) so they can't pile up
+- a per-shard planned-hour watermark records the last hour the planner
+  covered, so restarts neither re-plan nor skip hours
+- a per-shard routes hash carries each pending agent's routing key (its tier),
+  returned with the claim so the ticker never has to look agents up in Postgres
+
+All of a shard's keys share its hash tag, so the Lua scripts stay on one
+Redis Cluster slot even though they derive bucket names from a prefix.
+
+MemoryScheduleStore keeps the same interface on heapq, for tests and benchmarks.
+
+Deliberately free of DB imports (the brain's residency manager uses it).
+"""
+import heapq
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.redis import RedisClient
+
+BUCKET_SECONDS = 60
+# Buckets a single claim may walk past (empty) before returning
+MAX_BUCKETS_PER_CLAIM = 120
+# Index / routes entries a single claim checks for expired wake-ups (HSCAN COUNT)
+SWEEP_PER_CLAIM = 100
+
+
+def bucket_prefix(shard: int) -> str:
+    return f"scheduler:{{s{shard}}}:wheel:"
+
+
+def cursor_key(shard: int) -> str:
+    return f"scheduler:{{s{shard}}}:cursor"
+
+
+def index_key(shard: int) -> str:
+    return f"scheduler:{{s{shard}}}:index"
+
+
+def claimed_key(shard: int) -> str:
+    return f"scheduler:{{s{shard}}}:claimed"
+
+
+def routes_key(shard: int) -> str:
+    return f"scheduler:{{s{shard}}}:routes"
+
+
+def planned_hour_key(shard: int) -> str:
+    return f"scheduler:{{s{shard}}}:planned_hour"
+
+
+def sweep_key(shard: int) -> str:
+    return f"scheduler:{{s{shard}}}:sweep"
+
+
+def bucket_of(ts: float) -> int:
+    return int(ts // BUCKET_SECONDS)
+
+
+@dataclass
+class ClaimResult:
+    due: List[str] = field(default_factory=list)
+    routes: Dict[str, Optional[str]] = field(default_factory=dict)  # Routing key per due agent
+    backlog: int = 0                   # Due wake-ups left behind (batch was full)
+    next_due: Optional[float] = None   # Earliest future wake-up in the next bucket or two
+
+
+class ScheduleStore(ABC):
+    """Per-shard wake-up store used by the TimeEngine planner and ticker."""
+
+    @abstractmethod
+    async def add(
+        self,
+        shard: int,
+        wakes: Dict[str, float],
+        routes: Optional[Dict[str, str]] = None,
+        mode: str = ""
+    ) -> int:
+        """
+        Schedules {agent_id: wake timestamp}. `routes` ({agent_id: routing key})
+        travel with the wake-up. An agent's pending wake-up is replaced, or with
+        mode "nx" kept, or with mode "gt" only moved later (ZADD NX / GT).
+        Returns the number of wake-ups written.
+        """
+
+    @abstractmethod
+    async def claim_due(self, shard: int, now: float, limit: int, lease: float) -> ClaimResult:
+        """
+        Atomically takes up to `limit` due wake-ups. They stay claimed until
+        `ack`; claims older than `lease` seconds are put back (at-least-once).
+        """
+
+    @abstractmethod
+    async def ack(self, shard: int, agent_ids: List[str]):
+        """Drops claims that were published, and their routes unless re-added since."""
+
+    @abstractmethod
+    async def count_between(self, shards: List[int], start: float, end: float) -> int:
+        """Pending wake-ups due in [start, end] over the given shards."""
+
+    @abstractmethod
+    async def bucket_counts(self, shard: int, first_minute: int, minutes: int) -> List[int]:
+        """Pending wake-ups per minute (epoch minutes), for load shaping."""
+
+    @abstractmethod
+    async def get_planned_hour(self, shard: int) -> Optional[int]:
+        """Last epoch hour the planner covered for this shard (None = never planned)."""
+
+    @abstractmethod
+    async def set_planned_hour(self, shard: int, hour: int):
+        """Advances the watermark (never moves it back)."""
+
+
+# Shared by ADD / CLAIM.
+# pending_minute: bucket of `member`'s pending wake-up, or nil. An index entry
+# whose bucket expired (or no longer holds the member) is stale and dropped.
+# place: put `member` in bucket `minute` and index it, moving it out of its
+# previous bucket if it had one.
+_LUA_PLACE = """
+local function pending_minute(prefix, index, member)
+    local old = redis.call('HGET', index, member)
+    if not old then
+        return nil
+    end
+    if not redis.call('ZSCORE', prefix .. old, member) then
+        redis.call('HDEL', index, member)
+        return nil
+    end
+    return tonumber(old)
+end
+
+local function place(prefix, index, member, score, minute, ttl)
+    local old = pending_minute(prefix, index, member)
+    if old and old ~= minute then
+        redis.call('ZREM', prefix .. old, member)
+    end
+    local bucket = prefix .. minute
+    redis.call('ZADD', bucket, score, member)
+    redis.call('EXPIREAT', bucket, (minute + 1) * 60 + ttl)
+    redis.call('HSET', index, member, minute)
+end
+"""
+
+# KEYS: index, routes, cursor. ARGV: prefix, current minute, bucket ttl, mode ('', 'nx', 'gt'),
+# then member/score/route triples (empty route = keep the current one).
+# Past wake-ups land in the current bucket, and never behind the shard's cursor:
+# a ticker (other host, clock skew) may have drained past the caller's minute.
+ADD_LUA = _LUA_PLACE + """
+local prefix = ARGV[1]
+local current = tonumber(ARGV[2])
+current = math.max(current, tonumber(redis.call('GET', KEYS[3]) or current))
+local ttl = tonumber(ARGV[3])
+local mode = ARGV[4]
+local added = 0
+for i = 5, #ARGV, 3 do
+    local member = ARGV[i]
+    local score = tonumber(ARGV[i + 1])
+    local write = true
+    if mode ~= '' then
+        -- A wake-up whose bucket expired is not pending: NX / GT add it again
+        local old = pending_minute(prefix, KEYS[1], member)
+        if old then
+            write = mode == 'gt' and score > tonumber(redis.call('ZSCORE', prefix .. old, member))
+        end
+    end
+    if write then
+        place(prefix, KEYS[1], member, score, math.max(current, math.floor(score / 60)), ttl)
+        if ARGV[i + 2] ~= '' then
+            redis.call('HSET', KEYS[2], member, ARGV[i + 2])
+        end
+        added = added + 1
+    end
+end
+return added
+"""
+
+# KEYS: watermark. ARGV: hour. Only ever moves forward.
+SET_PLANNED_HOUR_LUA = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '-1')
+if tonumber(ARGV[1]) > current then
+    redis.call('SET', KEYS[1], ARGV[1])
+    return 1
+end
+return 0
+"""
+
+# KEYS: claimed, index, routes. ARGV: prefix, then agent ids.
+# Drops the claims and their routes, unless the agent was re-added between claim
+# and ack: its route then belongs to the new wake-up.
+ACK_LUA = _LUA_PLACE + """
+local prefix = ARGV[1]
+for i = 2, #ARGV do
+    local member = ARGV[i]
+    redis.call('ZREM', KEYS[1], member)
+    if not pending_minute(prefix, KEYS[2], member) then
+        redis.call('HDEL', KEYS[3], member)
+    end
+end
+"""
+
+# KEYS: cursor, claimed, index, routes, sweep. ARGV: prefix, now, limit, lease, bucket ttl,
+# max buckets, sweep count.
+# 1. Re-queues claims whose lease expired (publisher crashed before acking)
+# 2. Drains due members from the cursor bucket up to the current one into the
+#    claimed set, advancing the cursor past emptied past buckets
+# 3. Sweeps a slice of the index and routes hashes (HSCAN, cursors kept in the
+#    sweep hash): entries of wake-ups that expired with their bucket, unclaimed,
+#    would otherwise stay forever
+# Returns {claimed agent ids, their routes, due agents still waiting, next due score or false}
+CLAIM_DUE_LUA = _LUA_PLACE + """
+local prefix = ARGV[1]
+local now = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+local lease = tonumber(ARGV[4])
+local ttl = tonumber(ARGV[5])
+local max_buckets = tonumber(ARGV[6])
+local sweep_count = tonumber(ARGV[7])
+local current = math.floor(now / 60)
+local stored_cursor = tonumber(redis.call('GET', KEYS[1]) or current)
+
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now, 'LIMIT', 0, limit)
+for _, member in ipairs(expired) do
+    redis.call('ZREM', KEYS[2], member)
+    if not pending_minute(prefix, KEYS[3], member) then
+        -- Never behind the cursor (a skewed ticker may have moved it past our minute)
+        place(prefix, KEYS[3], member, now, math.max(current, stored_cursor), ttl)
+    end
+end
+
+-- Buckets older than the TTL are gone: never walk further back than that
+local oldest = current - math.floor(ttl / 60) - 1
+local cursor = math.max(stored_cursor, oldest)
+local last = math.min(current, cursor + max_buckets - 1)
+
+local due = {}
+local backlog = 0
+for minute = cursor, last do
+    local bucket = prefix .. minute
+    local room = limit - #due
+    if room > 0 then
+        local members = redis.call('ZRANGEBYSCORE', bucket, '-inf', now, 'LIMIT', 0, room)
+        for _, member in ipairs(members) do
+            redis.call('ZREM', bucket, member)
+            redis.call('HDEL', KEYS[3], member)
+            redis.call('ZADD', KEYS[2], now + lease, member)
+            due[#due + 1] = member
+        end
+    end
+    backlog = backlog + redis.call('ZCOUNT', bucket, '-inf', now)
+    if minute == cursor and minute < current and redis.call('EXISTS', bucket) == 0 then
+        cursor = minute + 1
+    end
+end
+redis.call('SET', KEYS[1], cursor)
+if last < current then
+    -- Still catching up on old buckets: report them as backlog
+    backlog = math.max(backlog, 1)
+end
+
+local next_due = false
+for minute = current, current + 1 do
+    local head = redis.call('ZRANGEBYSCORE', prefix .. minute, '(' .. now, '+inf', 'WITHSCORES', 'LIMIT', 0, 1)
+    if head[2] then
+        next_due = head[2]
+        break
+    end
+end
+
+local routes = {}
+for i, member in ipairs(due) do
+    routes[i] = redis.call('HGET', KEYS[4], member)
+end
+
+local function sweep(hash, field, keep)
+    local scan = redis.call('HSCAN', hash, redis.call('HGET', KEYS[5], field) or '0', 'COUNT', sweep_count)
+    local entries = scan[2]
+    for i = 1, #entries, 2 do
+        if not keep(entries[i], entries[i + 1]) then
+            redis.call('HDEL', hash, entries[i])
+        end
+    end
+    redis.call('HSET', KEYS[5], field, scan[1])
+end
+sweep(KEYS[3], 'index', function(member, minute)
+    return redis.call('ZSCORE', prefix .. minute, member)
+end)
+-- Routes live until ack: keep them for claimed members and pending wake-ups
+sweep(KEYS[4], 'routes', function(member)
+    return redis.call('ZSCORE', KEYS[2], member) or pending_minute(prefix, KEYS[3], member)
+end)
+
+return {due, routes, backlog, next_due}
+"""
+
+
+class RedisScheduleStore(ScheduleStore):
+
+    def __init__(self, bucket_ttl: int = settings.SCHEDULER_BUCKET_TTL_SECONDS):
+        self.bucket_ttl = bucket_ttl
+        self._add = None
+        self._claim = None
+        self._set_planned_hour = None
+        self._ack = None
+
+    def _scripts(self, redis):
+        if self._add is None:
+            self._add = redis.register_script(ADD_LUA)
+            self._claim = redis.register_script(CLAIM_DUE_LUA)
+            self._set_planned_hour = redis.register_script(SET_PLANNED_HOUR_LUA)
+            self._ack = redis.register_script(ACK_LUA)
+        return self._add, self._claim
+
+    async def add(
+        self,
+        shard: int,
+        wakes: Dict[str, float],
+        routes: Optional[Dict[str, str]] = None,
+        mode: str = ""
+    ) -> int:
+        if not wakes:
+            return 0
+        redis = RedisClient.get_instance()
+        add, _ = self._scripts(redis)
+        routes = routes or {}
+        args = [bucket_prefix(shard), bucket_of(time.time()), self.bucket_ttl, mode]
+        for member, score in wakes.items():
+            args.extend((member, score, routes.get(member, "")))
+        return int(await add(keys=[index_key(shard), routes_key(shard), cursor_key(shard)], args=args))
+
+    async def claim_due(self, shard: int, now: float, limit: int, lease: float) -> ClaimResult:
+        redis = RedisClient.get_instance()
+        _, claim = self._scripts(redis)
+        due, routes, backlog, next_due = await claim(
+            keys=[cursor_key(shard), claimed_key(shard), index_key(shard), routes_key(shard), sweep_key(shard)],
+            args=[bucket_prefix(shard), now, limit, lease, self.bucket_ttl, MAX_BUCKETS_PER_CLAIM, SWEEP_PER_CLAIM]
+        )
+        return ClaimResult(
+            list(due), dict(zip(due, routes)), int(backlog), float(next_due) if next_due else None
+        )
+
+    async def ack(self, shard: int, agent_ids: List[str]):
+        if not agent_ids:
+            return
+        redis = RedisClient.get_instance()
+        self._scripts(redis)
+        await self._ack(
+            keys=[claimed_key(shard), index_key(shard), routes_key(shard)],
+            args=[bucket_prefix(shard), *agent_ids]
+        )
+
+    async def count_between(self, shards: List[int], start: float, end: float) -> int:
+        redis = RedisClient.get_instance()
+        async with redis.pipeline(transaction=False) as pipe:
+            for shard in shards:
+                for minute in range(bucket_of(start), bucket_of(end) + 1):
+                    pipe.zcount(f"{bucket_prefix(shard)}{minute}", start, end)
+            counts = await pipe.execute()
+        return sum(counts)
+
+    async def bucket_counts(self, shard: int, first_minute: int, minutes: int) -> List[int]:
+        redis = RedisClient.get_instance()
+        async with redis.pipeline(transaction=False) as pipe:
+            for minute in range(first_minute, first_minute + minutes):
+                pipe.zcard(f"{bucket_prefix(shard)}{minute}")
+            return [int(count) for count in await pipe.execute()]
+
+    async def get_planned_hour(self, shard: int) -> Optional[int]:
+        value = await RedisClient.get_instance().get(planned_hour_key(shard))
+        return int(value) if value is not None else None
+
+    async def set_planned_hour(self, shard: int, hour: int):
+        redis = RedisClient.get_instance()
+        self._scripts(redis)
+        await self._set_planned_hour(keys=[planned_hour_key(shard)], args=[hour])
+
+
+class MemoryScheduleStore(ScheduleStore):
+    """
+    In-process heapq store with the same semantics (one pending wake-up per
+    agent, claims with leases). Stale heap entries are skipped lazily.
+    """
+
+    def __init__(self):
+        self._heaps: Dict[int, List[Tuple[float, str]]] = {}
+        self._pending: Dict[int, Dict[str, float]] = {}
+        self._claimed: Dict[int, Dict[str, float]] = {}
+        self._routes: Dict[int, Dict[str, str]] = {}
+        self._planned_hours: Dict[int, int] = {}
+
+    def _shard(self, shard: int):
+        return (
+            self._heaps.setdefault(shard, []),
+            self._pending.setdefault(shard, {}),
+            self._claimed.setdefault(shard, {})
+        )
+
+    async def add(
+        self,
+        shard: int,
+        wakes: Dict[str, float],
+        routes: Optional[Dict[str, str]] = None,
+        mode: str = ""
+    ) -> int:
+        heap, pending, _ = self._shard(shard)
+        shard_routes = self._routes.setdefault(shard, {})
+        routes = routes or {}
+        added = 0
+        for member, score in wakes.items():
+            if mode and member in pending and (mode == "nx" or score <= pending[member]):
+                continue
+            pending[member] = score
+            heapq.heappush(heap, (score, member))
+            if member in routes:
+                shard_routes[member] = routes[member]
+            added += 1
+        return added
+
+    def _pop_stale(self, heap, pending):
+        while heap and pending.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+
+    async def claim_due(self, shard: int, now: float, limit: int, lease: float) -> ClaimResult:
+        heap, pending, claimed = self._shard(shard)
+
+        for member, deadline in list(claimed.items()):
+            if deadline <= now:
+                del claimed[member]
+                if member not in pending:
+                    await self.add(shard, {member: now})
+
+        result = ClaimResult()
+        self._pop_stale(heap, pending)
+        while heap and heap[0][0] <= now and len(result.due) < limit:
+            _, member = heapq.heappop(heap)
+            del pending[member]
+            claimed[member] = now + lease
+            result.due.append(member)
+            result.routes[member] = self._routes.get(shard, {}).get(member)
+            self._pop_stale(heap, pending)
+
+        if heap and heap[0][0] <= now:
+            result.backlog = sum(1 for score in pending.values() if score <= now)
+        elif heap:
+            result.next_due = heap[0][0]
+        return result
+
+    async def ack(self, shard: int, agent_ids: List[str]):
+        _, pending, claimed = self._shard(shard)
+        routes = self._routes.get(shard, {})
+        for member in agent_ids:
+            claimed.pop(member, None)
+            if member not in pending:
+                routes.pop(member, None)
+
+    async def count_between(self, shards: List[int], start: float, end: float) -> int:
+        return sum(
+            1
+            for shard in shards
+            for score in self._pending.get(shard, {}).values()
+            if start <= score <= end
+        )
+
+    async def bucket_counts(self, shard: int, first_minute: int, minutes: int) -> List[int]:
+        counts = [0] * minutes
+        for score in self._pending.get(shard, {}).values():
+            offset = bucket_of(score) - first_minute
+            if 0 <= offset < minutes:
+                counts[offset] += 1
+        return counts
+
+    async def get_planned_hour(self, shard: int) -> Optional[int]:
+        return self._planned_hours.get(shard)
+
+    async def set_planned_hour(self, shard: int, hour: int):
+        self._planned_hours[shard] = max(hour, self._planned_hours.get(shard, hour))
@@ -1,15 +1,22 @@
 import asyncio
 import logging
-import random
+import math
 import time
+import uuid
 from datetime import datetime, timedelta, timezone
-from typing import List, Optional
+from itertools import islice
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+import numpy as np
 from sqlalchemy import select
 
+from app.core.config import settings
 from app.core.database import AsyncSessionLocal
 from app.core.redis import RedisClient
-from app.core.queue import RabbitMQClient
+from app.core.queue import QUEUE_HIGH_PRIORITY, QUEUE_LOW_PRIORITY, RabbitMQClient
+from app.core.backpressure import BackpressureController, backpressure
 from app.modules.identity.models import User
+from app.modules.scheduler import planning, sharding
+from app.modules.scheduler.store import RedisScheduleStore, ScheduleStore
 
 # Configure Structured Logging
 logging.basicConfig(
@@ -19,9 +26,17 @@ logging.basicConfig(
 logger = logging.getLogger("qoneqt.scheduler")
 
 # CONSTANTS
-REDIS_KEY_SCHEDULE = "scheduler:queue"
-QUEUE_HIGH_PRIORITY = "queue.high_priority"
-QUEUE_LOW_PRIORITY = "queue.low_priority"
+# Pre-wheel keys (single ZSET, then one ZSET per shard), drained into the store at startup
+LEGACY_KEY_SCHEDULE = "scheduler:queue"
+LEGACY_KEY_CLAIMED = "scheduler:claimed"
+LEGACY_SHARD_KEY_SCHEDULE = "scheduler:{{s{shard}}}:queue"
+# Wake-ups per ScheduleStore.add call (one script round-trip each)
+ZADD_BATCH_SIZE = 1000
+
+def _batched(items: Iterable, size: int):
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
 
 class TimeEngine:
     """
@@ -30,107 +45,316 @@ class TimeEngine:
     - Track A: Trigger-Based (Handled via API Gateway)
     - Track B: Deterministic (Tier-Based Interval)
     - Track C: Background (Low Priority Filler)
+
+    Horizontally scalable: the agent-ID space is split into shards, each with
+    its own timing-wheel keys in the ScheduleStore, and every instance plans and ticks only the shards
+    it holds a lease on (see sharding.ShardCoordinator). Start more processes
+    to scale out; shards move automatically when instances join or leave.
     """
 
+    def __init__(
+        self,
+        coordinator: Optional[sharding.ShardCoordinator] = None,
+        store: Optional[ScheduleStore] = None,
+        pressure: Optional[BackpressureController] = None
+    ):
+        self.coordinator = coordinator or sharding.ShardCoordinator()
+        self.store = store or RedisScheduleStore()
+        self.backpressure = pressure or backpressure
+
     async def start(self):
         """
-        Main Entry Point. Starts Planner and Ticker concurrently.
+        Main Entry Point. Starts the shard coordinator, Planner and Ticker concurrently.
         """
-        logger.info(" Time Engine (Production Tier) Starting...")
-        await asyncio.gather(
-            self.run_planner_loop(),
-            self.run_ticker_loop()
-        )
+        logger.info(f" Time Engine (Production Tier) Starting as {self.coordinator.instance_id}...")
+        await self._migrate_legacy_schedule()
+        # Take our first shards before planning (the coordinator loop renews them)
+        await self.coordinator.heartbeat()
+        try:
+            await asyncio.gather(
+                self.coordinator.run(),
+                self.run_planner_loop(),
+                self.run_ticker_loop()
+            )
+        finally:
+            # Hand our shards over now instead of after the lease TTL
+            await self.coordinator.release_all()
+
+    async def _migrate_legacy_schedule(self):
+        """
+        Moves wake-ups from the pre-wheel ZSETs into the schedule store.
+        ZPOPMIN is atomic, so concurrent instances can run this safely.
+        """
+        redis = RedisClient.get_instance()
+        legacy_keys = [LEGACY_KEY_SCHEDULE, LEGACY_KEY_CLAIMED] + [
+            LEGACY_SHARD_KEY_SCHEDULE.format(shard=shard) for shard in range(self.coordinator.num_shards)
+        ]
+        moved = 0
+        for legacy_key in legacy_keys:
+            while members := await redis.zpopmin(legacy_key, ZADD_BATCH_SIZE):
+                by_shard = {}
+                for member, score in members:
+                    # Old claims go back to the schedule: their publish was never acked
+                    by_shard.setdefault(sharding.shard_for(member, self.coordinator.num_shards), {})[member] = score
+                for shard, wakes in by_shard.items():
+                    await self.store.add(shard, wakes)
+                moved += len(members)
+        if moved:
+            logger.info(f"Migrated {moved} wake-ups from the legacy schedule into the timing wheel")
 
     # -------------------------------------------------------------------------
     # 1. THE PLANNER (Tier-Based Scheduling)
     # -------------------------------------------------------------------------
     async def run_planner_loop(self):
         """
-        Runs continuously. Plans the next hour's activities.
+        Runs continuously. Plans each hour's activities once per shard.
+
+        Idempotent: a per-shard watermark records the last planned hour, so a
+        restart (or a shard moving to this instance) mid-hour doesn't re-plan
+        it, and wake-ups are added with NX semantics. Hours missed while no
+        scheduler was running are caught up (at most SCHEDULER_CATCHUP_MAX_HOURS),
+        spread over SCHEDULER_CATCHUP_SPREAD_MINUTES instead of firing at once.
         """
         logger.info("Planner Loop Initiated.")
         
         while True:
             try:
-                # Calculate time until next planning window (Start of next hour)
+                # Execute Planning Logic (no-op for shards already planned this hour)
+                await self._plan_agent_activities(int(time.time() // 3600))
+
+                # Poll until the next planning window (Start of next hour), so newly
+                # acquired shards are planned without waiting for it
                 now = datetime.now(timezone.utc)
                 next_run = (now + timedelta(hours=1)).replace(minute=0, second=0, microsecond=0)
-                sleep_seconds = (next_run - now).total_seconds()
-                
-                # Execute Planning Logic
-                await self._plan_agent_activities(now.hour)
-                
-                logger.info(f"Planner sleeping for {int(sleep_seconds)}s until next cycle...")
-                await asyncio.sleep(sleep_seconds)
+                sleep_seconds = min((next_run - now).total_seconds(), settings.SCHEDULER_PLANNER_POLL_SECONDS)
+                await asyncio.sleep(max(1.0, sleep_seconds))
                 
             except Exception as e:
                 logger.error(f"Planner Error: {e}")
                 await asyncio.sleep(60) # Safety backoff
 
-    async def _plan_agent_activities(self, current_hour: int):
-        """
-        Scans DB and schedules agents based on Tier and Active Hours.
-        """
-        logger.info(f"Planning batch for Hour: {current_hour}:00")
-
-        async with AsyncSessionLocal() as session:
-            # Optimization: Fetch only active users
-            stmt = select(User).where(User.is_active == True)
-            result = await session.execute(stmt)
-            agents = result.scalars().all()
-
-            scheduled_count = 0
-            redis = RedisClient.get_instance()
-
-            async with redis.pipeline() as pipe:
-                for agent in agents:
-                    # 1. Check if Agent is "Awake" (Based on Bio-Rhythm)
-                    # We assume 0.0 in schedule means "Deep Sleep" (Do not disturb)
-                    schedule = agent.activity_schedule or [0.1] * 24
-                    if len(schedule) != 24: schedule = [0.1] * 24
-                    
-                    if schedule[current_hour] <= 0.0:
-                        continue # Skip sleeping agents
-
-                    # 2. DETERMINISTIC TIER LOGIC
-                    # TODO: In future, fetch 'tier' from DB. For now, we mock logic.
-                    # Assumption: We define 'Pro' users logic dynamically or via a future column.
-                    # Let's assume 'tier' is a property we will add. For now, everyone is 'Free'
-                    # unless we hardcode specific IDs or logic.
-                    
-                    is_pro = False # Change this to `agent.tier == 'pro'` after migration
-                    
-                    should_schedule = False
-
-                    if is_pro:
-                        # PRO TIER: Schedule EVERY hour they are active.
-                        should_schedule = True
-                    else:
-                        # FREE TIER: Schedule only every 6 hours (0, 6, 12, 18)
-                        # This saves 80% of compute costs.
-                        if current_hour % 6 == 0:
-                            should_schedule = True
-                        
-                        # "Serendipity" Fallback (Track C):
-                        # Give Free users a small random chance (10%) to wake up off-schedule
-                        # to keep the network feeling alive.
-                        elif random.random() < 0.10:
-                            should_schedule = True
-
-                    if should_schedule:
-                        # 3. Apply Jitter (Spread load across the hour)
-                        # We don't want 10k agents firing at Minute 0.
-                        delay_seconds = random.randint(0, 3500) # 0 to 58 mins
-                        wake_timestamp = time.time() + delay_seconds
-                        
-                        # Store in Redis: Score=Timestamp, Member=AgentID
-                        pipe.zadd(REDIS_KEY_SCHEDULE, {str(agent.id): wake_timestamp})
-                        scheduled_count += 1
-                
-                await pipe.execute()
+    async def _iter_active_agents(
+        self,
+        chunk_size: int,
+        low: Optional[uuid.UUID] = None,
+        high: Optional[uuid.UUID] = None
+    ) -> AsyncIterator[List[Tuple[uuid.UUID, Optional[List[float]], str]]]:
+        """
+        Streams active agents as (id, activity_schedule, tier) tuples, one
+        keyset-paginated chunk at a time. Only the three planner columns are
+        read (no ORM objects, no 768-dim vectors), and each page is a short
+        query on the primary key, so memory stays flat at any user count.
+        `low` / `high` bound the id range (a shard).
+
+        Keyset pages instead of a server-side cursor (stream_results): a
+        cursor pins one connection and one transaction for the whole scan,
+        while the planner awaits Redis between chunks. Short page queries
+        return the connection to the pool each time, and a failure only
+        re-reads one page. The result is the same flat memory.
+        """
+        last_id: Optional[uuid.UUID] = None
+        while True:
+            stmt = (
+                select(User.id, User.activity_schedule, User.tier)
+                .where(User.is_active == True)
+                .order_by(User.id)
+                .limit(chunk_size)
+            )
+            if last_id is not None:
+                stmt = stmt.where(User.id > last_id)
+            elif low is not None:
+                stmt = stmt.where(User.id >= low)
+            if high is not None:
+                stmt = stmt.where(User.id < high)
+
+            async with AsyncSessionLocal() as session:
+                rows = (await session.execute(stmt)).all()
+            if not rows:
+                return
+
+            yield rows
+            if len(rows) < chunk_size:
+                return
+            last_id = rows[-1][0]
+
+    async def _plan_agent_activities(self, plan_hour: int):
+        """
+        Scans DB and schedules agents based on Tier and Active Hours, for the
+        shards this instance owns that haven't been planned for `plan_hour`
+        (epoch hours) yet, including their bounded catch-up.
+        """
+        scheduled_count = 0
+        scanned = 0
+        planned_shards = []
+        for shard in sorted(self.coordinator.owned_shards):
+            last_planned = await self.store.get_planned_hour(shard)
+            if last_planned is not None and last_planned >= plan_hour:
+                continue
+
+            catch_up: List[int] = []
+            if last_planned is not None:
+                missed = list(range(last_planned + 1, plan_hour))
+                catch_up = missed[-settings.SCHEDULER_CATCHUP_MAX_HOURS:] if settings.SCHEDULER_CATCHUP_MAX_HOURS > 0 else []
+                if len(missed) > len(catch_up):
+                    logger.warning(f"Shard {shard}: skipping {len(missed) - len(catch_up)} missed hour(s) beyond the catch-up limit")
+                if catch_up:
+                    logger.info(f"Shard {shard}: catching up {len(catch_up)} missed hour(s)")
+
+            shard_scheduled, shard_scanned = await self._plan_shard(shard, plan_hour, catch_up)
+            # Only after the wake-ups are stored: a crash mid-plan re-plans the hour (NX keeps it idempotent)
+            await self.store.set_planned_hour(shard, plan_hour)
+            scheduled_count += shard_scheduled
+            scanned += shard_scanned
+            planned_shards.append(shard)
+
+        if planned_shards:
+            logger.info(
+                f"✅ Hour {plan_hour % 24}:00 — scheduled {scheduled_count}/{scanned} agents "
+                f"(Tier-Adjusted, shards {planned_shards})."
+            )
+
+    async def _plan_shard(self, shard: int, plan_hour: int, catch_up: List[int]) -> Tuple[int, int]:
+        """
+        Plans one shard's id range into the schedule store. Returns (scheduled, scanned).
+
+        Without a capacity model each chunk is jittered and stored as it is read.
+        With one, a first pass only counts the wake-ups per priority group (pro,
+        free slot, serendipity), which are then water-filled into this shard's
+        share of the per-minute capacity, on top of what is already scheduled;
+        a second pass re-selects the same agents (same random streams) and
+        places and stores them chunk by chunk, so memory stays one chunk deep.
+        Catch-up hours are planned by their own hour's rules, rank below the
+        current hour and are spread over the catch-up window; an agent wakes at
+        most once.
+        """
+        scheduled_count = 0
+        low, high = sharding.shard_range(shard, self.coordinator.num_shards)
+        hours = [plan_hour] + catch_up
+        # Per-shard streams: the plan does not depend on how shards are spread over instances.
+        # Unseeded plans draw their seed once, so both passes select the same agents
+        seed = settings.SCHEDULER_RNG_SEED
+        seed = int(np.random.SeedSequence().entropy) if seed is None else seed + shard
+        rng = planning.make_rng(seed, plan_hour).spawn(1)[0]
+        catch_up_seconds = settings.SCHEDULER_CATCHUP_SPREAD_MINUTES * 60
+        shaper = await self._load_shaper(shard, rng, catch_up_minutes=settings.SCHEDULER_CATCHUP_SPREAD_MINUTES if catch_up else 0)
+
+        plans = None
+        if shaper is not None:
+            counts = {(late, group): 0 for late in (False, True) for group in ("pro", "slot", "serendipity")}
+            async for _, chosen, _ in self._select_wakes(low, high, plan_hour, hours, seed):
+                for key in chosen.values():
+                    counts[key] += 1
+            # Priority order: current hour before catch-up, pro before free slot before serendipity
+            plans = {
+                (late, group): shaper.allocate(
+                    count,
+                    sheddable=group == "serendipity",
+                    window_minutes=settings.SCHEDULER_CATCHUP_SPREAD_MINUTES if late else None
+                )
+                for (late, group), count in counts.items()
+            }
+
+        scanned = 0
+        async for chunk_size, chosen, chunk_routes in self._select_wakes(low, high, plan_hour, hours, seed):
+            scanned += chunk_size
+            if not chosen:
+                continue
 
-            logger.info(f"✅ Scheduled {scheduled_count}/{len(agents)} agents (Tier-Adjusted).")
+            if plans is not None:
+                wakes = {}
+                for (late, group), plan in plans.items():
+                    ids = [agent_id for agent_id, key in chosen.items() if key == (late, group)]
+                    if not ids:
+                        continue
+                    stamps = shaper.draw(
+                        plan,
+                        len(ids),
+                        sheddable=group == "serendipity",
+                        window_minutes=settings.SCHEDULER_CATCHUP_SPREAD_MINUTES if late else None
+                    )
+                    # Random order: which agents spill, or are shed, is not decided by id
+                    rng.shuffle(ids)
+                    wakes.update(zip(ids, stamps.tolist()))
+                scheduled_count += await self._store_wakes(shard, wakes, chunk_routes)
+                continue
+
+            # Jitter (spreads load across the hour; we don't want 10k agents firing at Minute 0).
+            # Catch-up work is spread over its own, wider window
+            now_ts = time.time()
+            late = np.fromiter((late for late, _ in chosen.values()), dtype=bool, count=len(chosen))
+            offsets = np.where(
+                late,
+                rng.integers(0, catch_up_seconds, size=len(chosen), endpoint=True),
+                rng.integers(0, planning.MAX_JITTER_SECONDS, size=len(chosen), endpoint=True)
+            )
+            wakes = {agent_id: now_ts + float(offset) for agent_id, offset in zip(chosen, offsets.tolist())}
+            scheduled_count += await self._store_wakes(shard, wakes, chunk_routes)
+
+        if shaper is not None and (shaper.spilled or shaper.shed):
+            logger.info(
+                f"Shard {shard}: {shaper.spilled} wake-up(s) spilled past the window, "
+                f"{shaper.shed} serendipity wake-up(s) shed (capacity)"
+            )
+
+        return scheduled_count, scanned
+
+    async def _select_wakes(self, low: int, high: int, plan_hour: int, hours: List[int], seed: int):
+        """
+        Yields (chunk size, {agent id: (catch-up?, priority group)}, routes) per
+        chunk of the id range. Fresh random streams per call: every pass over
+        the same rows selects the same agents.
+        """
+        rngs = {hour: planning.make_rng(seed, hour) for hour in hours}
+        async for chunk in self._iter_active_agents(settings.SCHEDULER_PLAN_CHUNK_SIZE, low, high):
+            agent_ids, schedules, tiers = zip(*chunk)
+
+            # Whole chunk at once: awake mask, activity-weighted tier rates (current hour first)
+            matrix = planning.schedules_matrix(schedules)
+            is_pro = np.fromiter((t == "pro" for t in tiers), dtype=bool, count=len(tiers))
+            chosen: Dict[str, Tuple[bool, str]] = {}
+            for hour in hours:
+                indices, serendipity = planning.select_wakes(matrix, is_pro, hour % 24, rngs[hour])
+                for i, is_serendipity in zip(indices.tolist(), serendipity.tolist()):
+                    group = "serendipity" if is_serendipity else ("pro" if is_pro[i] else "slot")
+                    chosen.setdefault(str(agent_ids[i]), (hour != plan_hour, group))
+
+            # Routing is decided now and stored with the wake-up (the ticker never reads Postgres)
+            tier_of = dict(zip(map(str, agent_ids), tiers))
+            yield len(chunk), chosen, {agent_id: tier_of[agent_id] for agent_id in chosen}
+
+    async def _load_shaper(
+        self,
+        shard: int,
+        rng: np.random.Generator,
+        catch_up_minutes: int = 0
+    ) -> Optional[planning.LoadShaper]:
+        """Capacity model for this shard's plan, seeded with the per-minute load already scheduled."""
+        if settings.SCHEDULER_CAPACITY_PER_MINUTE <= 0:
+            return None
+        now_ts = time.time()
+        first_minute = int(now_ts // 60)
+        window_minutes = planning.MAX_JITTER_SECONDS // 60 + 1
+        horizon = max(window_minutes, catch_up_minutes) + settings.SCHEDULER_SPILL_MINUTES
+        load = await self.store.bucket_counts(shard, first_minute, horizon)
+        return planning.LoadShaper(
+            window_start=first_minute * 60.0,
+            load=np.asarray(load),
+            # Agent ids are uniform over shards, so each gets an equal share (fractions carried over)
+            capacity_per_minute=planning.minute_capacity(
+                first_minute, horizon, settings.SCHEDULER_CAPACITY_PER_MINUTE, shard, self.coordinator.num_shards
+            ),
+            window_minutes=window_minutes,
+            rng=rng,
+            not_before=now_ts
+        )
+
+    async def _store_wakes(self, shard: int, wakes: Dict[str, float], routes: Dict[str, str]) -> int:
+        # Bounded script calls (Score=Timestamp, Member=AgentID). NX: an agent's pending
+        # wake-up is kept, so re-planning an hour never duplicates or reshuffles it
+        added = 0
+        for member_batch in _batched(wakes.items(), ZADD_BATCH_SIZE):
+            added += await self.store.add(shard, dict(member_batch), routes, mode="nx")
+        return added
 
     # -------------------------------------------------------------------------
     # 2. THE TICKER (Priority Routing)
@@ -138,70 +362,133 @@ class TimeEngine:
     async def run_ticker_loop(self):
         """
         High-frequency loop. Moves tasks from Redis -> RabbitMQ (Specific Queues).
+
+        Ticks every shard this instance owns. Due agents are claimed
+        atomically (ScheduleStore.claim_due drains the shard's timing wheel
+        from its cursor), so an instance that still ticks a shard
+        it just lost cannot double-publish with the new owner. Claims are
+        acked after publishing; a crash in between leaves them in the claimed
+        set, and they are re-queued once their lease expires (at-least-once).
+        Each shard's batch grows with its backlog, and the loop sleeps until
+        the earliest next wake-up across shards instead of polling.
+
+        Backpressure: when the wake queues back up, fewer due agents are
+        released per round, and nothing is claimed while every queue is
+        paused. The throttle is applied once: the claim is sized by the most
+        open queue's release fraction, and only a queue that is more throttled
+        than that defers its excess (by the expected drain time).
         """
         logger.info(" Ticker Loop Initiated.")
-        redis = RedisClient.get_instance()
+        batch_sizes = {}
         
         while True:
             try:
-                now_ts = time.time()
-                
-                # 1. Fetch Due Tasks
-                due_agents = await redis.zrangebyscore(
-                    REDIS_KEY_SCHEDULE, 
-                    min=0, 
-                    max=now_ts, 
-                    start=0, 
-                    num=50 
-                )
+                backlog_shards = 0
+                earliest_due: Optional[float] = None
+                fractions = {
+                    q: await self.backpressure.release_fraction(q) for q in (QUEUE_HIGH_PRIORITY, QUEUE_LOW_PRIORITY)
+                }
+                release = max(fractions.values())
+                if release <= 0.0:
+                    # Workers are behind on every queue: leave the wake-ups where they are
+                    await asyncio.sleep(self.backpressure.sample_interval)
+                    continue
+
+                for shard in sorted(self.coordinator.owned_shards):
+                    batch_size = batch_sizes.get(shard, settings.SCHEDULER_TICKER_MIN_BATCH)
+
+                    # 1. Claim Due Tasks (one round-trip: recover expired claims, claim, backlog, next due)
+                    claim = await self.store.claim_due(
+                        shard, time.time(), max(1, int(batch_size * release)), settings.SCHEDULER_CLAIM_LEASE_SECONDS
+                    )
+
+                    if claim.due:
+                        # The claim already carries `release`: each queue keeps its share of that
+                        shares = {q: fraction / release for q, fraction in fractions.items()}
+                        published = await self._process_due_agents(shard, claim.due, claim.routes, shares)
 
-                if due_agents:
-                    await self._process_due_agents(due_agents)
-                    
-                    # Remove processed tasks from Redis
-                    await redis.zrem(REDIS_KEY_SCHEDULE, *due_agents)
+                        # Ack: published, drop the claims (deferred ones were re-scheduled)
+                        await self.store.ack(shard, published)
 
-                await asyncio.sleep(1) # Tick frequency
+                    if claim.backlog > 0:
+                        # Burst: double this shard's batch (capped), no sleep this round
+                        batch_sizes[shard] = min(settings.SCHEDULER_TICKER_MAX_BATCH, batch_size * 2)
+                        backlog_shards += 1
+                        continue
+
+                    batch_sizes[shard] = settings.SCHEDULER_TICKER_MIN_BATCH
+                    if claim.next_due is not None:
+                        earliest_due = claim.next_due if earliest_due is None else min(earliest_due, claim.next_due)
+
+                if release < 1.0:
+                    # Throttled: one round per queue depth sample, not a burst
+                    await asyncio.sleep(self.backpressure.sample_interval)
+                    continue
+                if backlog_shards:
+                    continue
+
+                # Sleep until the next wake-up (capped: the planner may add earlier ones,
+                # and newly acquired shards get picked up on the next round)
+                sleep_for = settings.SCHEDULER_TICKER_MAX_SLEEP_SECONDS
+                if earliest_due is not None:
+                    sleep_for = min(sleep_for, max(0.0, earliest_due - time.time()))
+                await asyncio.sleep(sleep_for)
 
             except Exception as e:
                 logger.error(f" Ticker Error: {e}")
                 await asyncio.sleep(5)
 
-    async def _process_due_agents(self, agent_ids: List[str]):
+    async def _process_due_agents(
+        self,
+        shard: int,
+        agent_ids: List[str],
+        routes: Dict[str, Optional[str]],
+        shares: Optional[Dict[str, float]] = None
+    ) -> List[str]:
         """
         Routes agents to the correct Priority Queue based on Tier.
+        The tier was stored with the wake-up at planning time, so no DB lookup
+        happens here; each queue's messages go out as one confirmed batch.
+        `shares` is the fraction of each queue's agents to release (default
+        all); the rest are re-scheduled for when the queue should have
+        drained. Returns the agents that were published.
         """
         logger.info(f"⚡ Processing {len(agent_ids)} due agents...")
-        
-        # We need to fetch agents again to check their Tier for routing
-        # (Redis only had the ID).
-        async with AsyncSessionLocal() as session:
-            stmt = select(User).where(User.id.in_(agent_ids))
-            result = await session.execute(stmt)
-            agents = result.scalars().all()
-            
-            for agent in agents:
-                # 1. Determine Priority
-                # TODO: Replace with `agent.tier`
-                is_pro = False 
-                
-                target_queue = QUEUE_HIGH_PRIORITY if is_pro else QUEUE_LOW_PRIORITY
-                
-                payload = {
-                    "agent_id": str(agent.id),
-                    "action": "WAKE_UP",
-                    "timestamp": time.time(),
-                    "tier": "pro" if is_pro else "free",
-                    "source": "scheduler"
-                }
 
-                # 2. Publish to RabbitMQ
-                await RabbitMQClient.publish(
-                    queue_name=target_queue,
-                    message=payload
+        by_queue: Dict[str, List[dict]] = {}
+        now_ts = time.time()
+        for agent_id in agent_ids:
+            # 1. Determine Priority (wake-ups planned before routes existed count as free)
+            is_pro = routes.get(agent_id) == "pro"
+
+            target_queue = QUEUE_HIGH_PRIORITY if is_pro else QUEUE_LOW_PRIORITY
+
+            by_queue.setdefault(target_queue, []).append({
+                "agent_id": agent_id,
+                "action": "WAKE_UP",
+                "timestamp": now_ts,
+                "tier": "pro" if is_pro else "free",
+                "source": "scheduler"
+            })
+
+        published: List[str] = []
+        for target_queue, payloads in by_queue.items():
+            # 2. Backpressure: release only this queue's share, defer the rest
+            release = math.ceil(len(payloads) * (shares or {}).get(target_queue, 1.0))
+            deferred = payloads[release:]
+            if deferred:
+                retry_at = now_ts + self.backpressure.retry_after(target_queue)
+                await self.store.add(
+                    shard,
+                    {p["agent_id"]: retry_at for p in deferred},
+                    {p["agent_id"]: p["tier"] for p in deferred}
                 )
-                
-                # logger.info(f"   -> Pushed {agent.full_name} to {target_queue}")
+                logger.info(f"   Deferred {len(deferred)} wake-up(s) for {target_queue} (backpressure)")
+
+            # 3. Publish to RabbitMQ (raises unless every message was confirmed: the claims then expire and retry)
+            await RabbitMQClient.publish_batch(target_queue, payloads[:release])
+            published.extend(p["agent_id"] for p in payloads[:release])
+        return published
 
 if __name__ == "__main__":
     # Allow running this file directly to start the engine
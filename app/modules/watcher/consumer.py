@@ -0,0 +1,81 @@
+import sys
+from pathlib import Path
+
+# Ensure project root is on `sys.path` so running this file directly works
+# e.g. `python ./app/modules/watcher/consumer.py` from the repository root
+ROOT = Path(__file__).resolve().parents[3]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import asyncio
+import json
+import logging
+import aio_pika
+from uuid import UUID
+
+from app.core.config import settings
+from app.core.queue import QUEUE_AUDIT, RabbitMQClient
+from app.modules.watcher.sampling import FlagRateEstimator
+from app.modules.watcher.service import AuditBackendUnavailable, auditor_service
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("qoneqt.auditor.consumer")
+
+# Log the running flag-rate estimate every N audited traces
+REPORT_EVERY = 100
+
+
+class AuditConsumer:
+    """
+    Long-running auditor: audits each trace seconds after the worker saves it.
+    Prefetch bounds the events in flight; AUDIT_CONCURRENCY bounds the LLM calls.
+    """
+
+    def __init__(self, prefetch: int = settings.AUDIT_CONSUMER_PREFETCH):
+        self.prefetch = prefetch
+        self.estimator = FlagRateEstimator()
+        self.audited = 0
+
+    async def start(self):
+        connection = await RabbitMQClient.get_connection()
+        # Own channel: the auditor's prefetch is independent of the publisher channel's
+        channel = await connection.channel()
+        await channel.set_qos(prefetch_count=self.prefetch)
+
+        queue = await channel.declare_queue(QUEUE_AUDIT, durable=True)
+        # Eject / re-admit audit backends in the background (stopped with the consumer)
+        async with auditor_service.health_checks():
+            await queue.consume(self.process_message)
+            logger.info(f" Audit Consumer Listening (prefetch {self.prefetch})...")
+            await asyncio.Future()
+
+    async def process_message(self, message: aio_pika.IncomingMessage):
+        async with message.process(ignore_processed=True):
+            try:
+                trace_id = UUID(json.loads(message.body)["trace_id"])
+            except (ValueError, KeyError, TypeError) as e:
+                logger.error(f"Dropping malformed audit event: {e}")
+                return
+
+            try:
+                audited = await auditor_service.audit_traces([trace_id], self.estimator)
+            except AuditBackendUnavailable as e:
+                # Back off before handing the event back, or a down LLM turns into a hot loop
+                logger.warning(f"{e}; requeueing in {settings.AUDIT_RETRY_DELAY_SECONDS:.0f}s")
+                await asyncio.sleep(settings.AUDIT_RETRY_DELAY_SECONDS)
+                await message.nack(requeue=True)
+                return
+            except Exception as e:
+                # Not retryable here; the trace stays PENDING for the audit cycle
+                logger.error(f"Audit Consumer Error ({trace_id}): {e}")
+                return
+
+            if audited:
+                self.audited += audited
+                if self.audited % REPORT_EVERY == 0:
+                    logger.info(f" Estimated flag rates: {self.estimator.report()}")
+
+
+if __name__ == "__main__":
+    consumer = AuditConsumer()
+    asyncio.run(consumer.start())
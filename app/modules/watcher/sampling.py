@@ -0,0 +1,141 @@
+"""
+Risk-weighted audit sampling.
+
+Scores each trace from cheap features (no LLM) and decides whether it is
+audited:
+- high-risk traces (score >= AUDIT_HIGH_RISK_SCORE) are always audited
+- the rest are audited with probability AUDIT_SAMPLE_RATE
+
+The weights are calibrated for AUDIT_HIGH_RISK_SCORE = 0.5: one strong signal
+or any two weak ones make a trace high-risk.
+- strong: a previously flagged candidate; confidence below half of
+  AUDIT_LOW_CONFIDENCE
+- weak (advisory on their own): ACCEPT with a message, new agent, confidence
+  just under AUDIT_LOW_CONFIDENCE
+
+Expected audited fraction, assuming independent features: with 20% ACCEPTs,
+5% new-agent traces, 10% low confidence (half of it strong) and 1% flagged
+candidates, ~8% of traces are high-risk. Adding the 5% sample of the rest
+audits ~13% of traces, against 100% without sampling.
+
+Every audit carries its inverse inclusion probability (`sample_weight`), so
+population-level flag rates can be estimated from the sample (Horvitz-Thompson).
+"""
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+
+# Feature weights (summed, capped at 1.0). Low confidence scales from
+# WEIGHT_LOW_CONFIDENCE_MIN (just under the cut-off) to _MAX (zero confidence)
+WEIGHT_LOW_CONFIDENCE_MIN = 0.25
+WEIGHT_LOW_CONFIDENCE_MAX = 0.75
+WEIGHT_ACCEPT_WITH_MESSAGE = 0.25
+WEIGHT_NEW_AGENT = 0.25
+WEIGHT_FLAGGED_CANDIDATE = 0.6
+
+
+@dataclass
+class SamplingDecision:
+    audit: bool
+    high_risk: bool
+    risk_score: float
+    sample_weight: float  # 1 / inclusion probability
+    reasons: List[str] = field(default_factory=list)
+
+
+class RiskSampler:
+
+    def __init__(
+        self,
+        sample_rate: float = settings.AUDIT_SAMPLE_RATE,
+        high_risk_score: float = settings.AUDIT_HIGH_RISK_SCORE,
+        low_confidence: float = settings.AUDIT_LOW_CONFIDENCE,
+        new_agent_days: int = settings.AUDIT_NEW_AGENT_DAYS
+    ):
+        self.sample_rate = min(1.0, max(0.0, sample_rate))
+        self.high_risk_score = high_risk_score
+        self.low_confidence = low_confidence
+        self.new_agent_age = timedelta(days=new_agent_days)
+
+    def score(
+        self,
+        reasoning_log: Optional[Dict[str, Any]],
+        decision: Optional[str],
+        agent_created_at: Optional[datetime],
+        candidate_flagged: bool,
+        now: Optional[datetime] = None
+    ) -> tuple:
+        """Returns (risk score in [0, 1], list of tripped features)."""
+        log = reasoning_log or {}
+        now = now or datetime.utcnow()
+        score, reasons = 0.0, []
+
+        confidence = log.get("confidence_score")
+        if confidence is not None and confidence < self.low_confidence:
+            # The less sure the agent was, the riskier
+            score += WEIGHT_LOW_CONFIDENCE_MIN + (WEIGHT_LOW_CONFIDENCE_MAX - WEIGHT_LOW_CONFIDENCE_MIN) * (
+                1.0 - confidence / self.low_confidence
+            )
+            reasons.append("low_confidence")
+
+        if decision == "ACCEPT" and log.get("generated_message"):
+            # Outbound text reaches another user: tone / hallucination risk
+            score += WEIGHT_ACCEPT_WITH_MESSAGE
+            reasons.append("accept_with_message")
+
+        if agent_created_at is not None and now - agent_created_at < self.new_agent_age:
+            score += WEIGHT_NEW_AGENT
+            reasons.append("new_agent")
+
+        if candidate_flagged:
+            score += WEIGHT_FLAGGED_CANDIDATE
+            reasons.append("flagged_candidate")
+
+        return min(1.0, score), reasons
+
+    def decide(self, trace_id, risk_score: float, reasons: List[str]) -> SamplingDecision:
+        if risk_score >= self.high_risk_score:
+            return SamplingDecision(True, True, risk_score, 1.0, reasons)
+        if self.sample_rate <= 0.0:
+            return SamplingDecision(False, False, risk_score, 0.0, reasons)
+        # Deterministic draw from the trace id: a re-run makes the same choice
+        draw = int(trace_id.hex[:8], 16) / 0xFFFFFFFF
+        return SamplingDecision(draw < self.sample_rate, False, risk_score, 1.0 / self.sample_rate, reasons)
+
+
+class FlagRateEstimator:
+    """
+    Horvitz-Thompson estimate of the population flag rate from weighted audits,
+    overall and per stratum (high-risk census vs. random sample).
+    """
+
+    def __init__(self):
+        self.strata = {
+            "high_risk": {"audited": 0, "flagged": 0, "weight": 0.0, "flagged_weight": 0.0},
+            "sampled": {"audited": 0, "flagged": 0, "weight": 0.0, "flagged_weight": 0.0},
+        }
+        self.skipped = 0
+
+    def add(self, high_risk: bool, sample_weight: float, flagged: bool):
+        stratum = self.strata["high_risk" if high_risk else "sampled"]
+        stratum["audited"] += 1
+        stratum["weight"] += sample_weight
+        if flagged:
+            stratum["flagged"] += 1
+            stratum["flagged_weight"] += sample_weight
+
+    def report(self) -> Dict[str, Any]:
+        weight = sum(s["weight"] for s in self.strata.values())
+        flagged_weight = sum(s["flagged_weight"] for s in self.strata.values())
+        return {
+            "estimated_population": round(weight),
+            "estimated_flag_rate": round(flagged_weight / weight, 4) if weight else None,
+            "skipped": self.skipped,
+            **{
+                f"{name}_flag_rate": round(s["flagged"] / s["audited"], 4) if s["audited"] else None
+                for name, s in self.strata.items()
+            },
+            **{f"{name}_audited": s["audited"] for name, s in self.strata.items()},
+        }
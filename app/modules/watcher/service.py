@@ -1,48 +1,331 @@
+import asyncio
 import json
 import logging
-from sqlalchemy import select, desc
+import time
+from contextlib import asynccontextmanager, suppress
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+from uuid import UUID
+from pydantic import ValidationError
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import aliased
+from app.core.config import settings
 from app.core.database import AsyncSessionLocal
-from app.modules.identity.models import AgentTrace, User
-from app.modules.agent_brain.inference import llm_client
+from app.modules.identity.models import AgentAudit, AgentTrace, ProfileSnapshot, User
+from app.modules.agent_brain.router import InferenceRouter
 from app.modules.agent_brain.prompts import PromptTemplates
+from app.modules.agent_brain.schemas import AuditBatch, AuditVerdict, BatchAuditItem, llm_output_schema
+from app.modules.watcher.sampling import FlagRateEstimator, RiskSampler, SamplingDecision
 
 logger = logging.getLogger("qoneqt.auditor")
 
+
+class AuditBackendUnavailable(Exception):
+    """Raised when audits could not reach the LLM (the traces stay PENDING)."""
+
+
 class AuditorService:
-    async def run_audit_cycle(self):
+    def __init__(
+        self,
+        batch_size: int = settings.AUDIT_BATCH_SIZE,
+        concurrency: int = settings.AUDIT_CONCURRENCY,
+        traces_per_prompt: int = settings.AUDIT_TRACES_PER_PROMPT
+    ):
+        self.batch_size = batch_size
+        self.concurrency = max(1, concurrency)
+        self.traces_per_prompt = max(1, traces_per_prompt)
+        # Bounds audit prompts in flight across cycles and queue consumers
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        # Audits share the worker's backend pool (LLM_BACKENDS)
+        self.client = InferenceRouter.from_settings()
+        # Sampling disabled = audit everything (rate 1.0), still scored and weighted
+        self.sampler = RiskSampler(
+            sample_rate=settings.AUDIT_SAMPLE_RATE if settings.AUDIT_SAMPLING_ENABLED else 1.0
+        )
+        # Malformed auditor output (should stay ~0 with constrained decoding)
+        self.parse_failures = 0
+        self.wasted_tokens = 0
+
+    @asynccontextmanager
+    async def health_checks(self):
+        """
+        Runs the router's health loop for the duration of the block, so audit
+        backends ejected after failures are re-admitted once they recover.
+        """
+        task = asyncio.create_task(self.client.run_health_loop())
+        try:
+            yield
+        finally:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+
+    async def run_audit_cycle(self, max_batches: Optional[int] = None) -> int:
+        """
+        Works through every trace still PENDING, oldest first, in keyset-paginated
+        batches; the cost of a run scales with the new traces since the last run.
+        Risk sampling picks which ones reach the LLM (the rest are SKIPPED). Up to
+        `concurrency` audit prompts run in parallel, each covering `traces_per_prompt`
+        traces. Returns the number of traces audited.
+
+        With the audit queue consumer running this is only a backstop (missed
+        events, backfills).
+        """
         logger.info(" Starting AI Audit Cycle...")
-        
+        started = time.perf_counter()
+        estimator = FlagRateEstimator()
+        audited = 0
+        cursor: Optional[Tuple[datetime, UUID]] = None
+        batches = 0
+
+        while max_batches is None or batches < max_batches:
+            async with AsyncSessionLocal() as session:
+                # 1. Next page of unaudited traces + the profiles the agent saw, in one query
+                #    (served by the partial index on PENDING rows)
+                stmt = (
+                    self._pending_traces_query()
+                    .order_by(AgentTrace.created_at, AgentTrace.id)
+                    .limit(self.batch_size)
+                )
+                if cursor:
+                    stmt = stmt.where(tuple_(AgentTrace.created_at, AgentTrace.id) > cursor)
+                rows = (await session.execute(stmt)).all()
+                if not rows:
+                    break
+
+                page_audited, backend_down = await self._audit_rows(session, rows, estimator)
+                audited += page_audited
+
+                # Verdicts + status flips commit together, so a crash re-audits at most one batch
+                await session.commit()
+                if backend_down:
+                    logger.error("Stopping audit cycle: LLM backend unavailable")
+                    break
+                last = rows[-1][0]
+                cursor = (last.created_at, last.id)
+                batches += 1
+
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f" Audit cycle done: {audited} trace(s) audited in {elapsed:.1f}s "
+            f"({audited / elapsed if elapsed else 0:.2f} audits/sec)"
+        )
+        logger.info(f" Estimated flag rates: {estimator.report()}")
+        return audited
+
+    async def audit_traces(self, trace_ids: List[UUID], estimator: Optional[FlagRateEstimator] = None) -> int:
+        """
+        Audits the given traces if they are still PENDING and not being audited
+        by another session (event-driven path).
+        Raises AuditBackendUnavailable if the LLM could not be reached; those
+        traces stay PENDING.
+        """
         async with AsyncSessionLocal() as session:
-            # 1. Fetch recent traces (e.g., last 10 for demo)
-            # In production, you would flag 'audited=False' columns
-            stmt = select(AgentTrace).order_by(desc(AgentTrace.created_at)).limit(10)
-            result = await session.execute(stmt)
-            traces = result.scalars().all()
-            
-            for trace in traces:
-                # 2. Reconstruct Context ( Simplified for demo )
-                # Ideally, we should store snapshots of profiles, but we'll fetch current state
-                agent = await session.get(User, trace.agent_id)
-                
-                audit_payload = {
-                    "agent_bio": agent.bio if agent else "Unknown",
-                    "candidate_context": "Stored in trace logs in v2", # Placeholder
-                    "decision": trace.decision,
-                    "reasoning_log": trace.reasoning_log
-                }
-                
-                # 3. Ask the Brain to Audit
-                messages = PromptTemplates.build_auditor_prompt(audit_payload)
-                response = await llm_client.chat(messages, temperature=0.0)
-                
-                # 4. Parse & Log
-                try:
-                    audit_result = json.loads(response)
-                    if audit_result.get("status") == "FLAGGED":
-                        logger.warning(f"FLAGGED INTERACTION ({trace.id}): {audit_result['audit_reasoning']}")
-                    else:
-                        logger.info(f"PASSED ({trace.id}): Logic seems sound.")
-                except Exception:
-                    logger.error(f"Failed to parse audit for {trace.id}")
-
-auditor_service = AuditorService()
\ No newline at end of file
+            stmt = self._pending_traces_query().where(AgentTrace.id.in_(trace_ids))
+            rows = (await session.execute(stmt)).all()
+            if not rows:
+                return 0  # Already handled or claimed (redelivery, or the cycle got there first)
+
+            audited, backend_down = await self._audit_rows(session, rows, estimator or FlagRateEstimator())
+            await session.commit()
+
+        if backend_down:
+            raise AuditBackendUnavailable(f"Audit of {len(rows)} trace(s) could not reach the LLM")
+        return audited
+
+    @staticmethod
+    def _pending_traces_query():
+        """
+        PENDING traces with their snapshots, claimed for this transaction: rows
+        another session is auditing (queue consumer vs. backstop cycle) are
+        skipped instead of audited twice.
+        """
+        agent_snap = aliased(ProfileSnapshot)
+        candidate_snap = aliased(ProfileSnapshot)
+        return (
+            select(
+                AgentTrace,
+                agent_snap.profile,
+                candidate_snap.profile,
+                User.bio,
+                User.created_at
+            )
+            .outerjoin(agent_snap, agent_snap.hash == AgentTrace.agent_snapshot_hash)
+            .outerjoin(candidate_snap, candidate_snap.hash == AgentTrace.candidate_snapshot_hash)
+            .outerjoin(User, User.id == AgentTrace.agent_id)
+            .where(AgentTrace.audit_status == "PENDING")
+            .with_for_update(skip_locked=True, of=AgentTrace)
+        )
+
+    async def _audit_rows(self, session, rows, estimator: FlagRateEstimator) -> Tuple[int, bool]:
+        """
+        Samples, audits and stores verdicts for rows of `_pending_traces_query()`
+        (uncommitted). Returns (audited count, backend_down).
+        """
+        # 1. Risk sampling (cheap features only)
+        flagged_candidates = await self._flagged_candidates(
+            session, {row[0].candidate_id for row in rows if row[0].candidate_id}
+        )
+        selected = []
+        for trace, agent_profile, candidate_profile, agent_bio, agent_created_at in rows:
+            risk_score, reasons = self.sampler.score(
+                trace.reasoning_log, trace.decision, agent_created_at,
+                trace.candidate_id in flagged_candidates
+            )
+            sampling = self.sampler.decide(trace.id, risk_score, reasons)
+            if sampling.audit:
+                payload = self._payload(trace, agent_profile, candidate_profile, agent_bio)
+                selected.append((trace, payload, sampling))
+            else:
+                trace.audit_status = "SKIPPED"
+                estimator.skipped += 1
+
+        # 2. Fan the selection out to the LLM (bounded), one prompt per group of traces
+        groups = [
+            selected[i:i + self.traces_per_prompt]
+            for i in range(0, len(selected), self.traces_per_prompt)
+        ]
+
+        async def audit_bounded(group):
+            async with self.semaphore:
+                return await self._audit_group([payload for _, payload, _ in group])
+
+        results = await asyncio.gather(*(audit_bounded(g) for g in groups), return_exceptions=True)
+
+        # 3. Apply verdicts (the session is not shared across tasks)
+        audited = 0
+        backend_down = False
+        audits: List[Dict[str, Any]] = []
+        for group, verdicts in zip(groups, results):
+            if isinstance(verdicts, Exception):
+                # LLM unreachable: these traces stay PENDING
+                logger.error(f"Audit of {len(group)} trace(s) failed: {verdicts}")
+                backend_down = True
+                continue
+            for (trace, _, sampling), verdict in zip(group, verdicts):
+                if self._store_verdict(audits, trace, verdict, sampling):
+                    audited += 1
+                    estimator.add(sampling.high_risk, sampling.sample_weight, verdict.status == "FLAGGED")
+
+        if audits:
+            # A verdict that is already stored (audited elsewhere) is kept, not a page-wide IntegrityError
+            await session.execute(insert(AgentAudit).on_conflict_do_nothing(index_elements=["trace_id"]), audits)
+        return audited, backend_down
+
+    @staticmethod
+    async def _flagged_candidates(session, candidate_ids: Set[UUID]) -> Set[UUID]:
+        """Candidates of this page that already appear in a FLAGGED audit (one query)."""
+        if not candidate_ids:
+            return set()
+        stmt = (
+            select(AgentTrace.candidate_id)
+            .join(AgentAudit, AgentAudit.trace_id == AgentTrace.id)
+            .where(AgentAudit.status == "FLAGGED", AgentTrace.candidate_id.in_(candidate_ids))
+            .distinct()
+        )
+        return set((await session.execute(stmt)).scalars().all())
+
+    @staticmethod
+    def _payload(
+        trace: AgentTrace,
+        agent_profile: Optional[dict],
+        candidate_profile: Optional[dict],
+        agent_bio: Optional[str]
+    ) -> Dict[str, Any]:
+        # Profiles as the agent saw them; traces older than snapshots fall back to the live bio
+        if candidate_profile and trace.match_score is not None:
+            candidate_profile = {**candidate_profile, "match_score": trace.match_score}
+        return {
+            "agent_context": json.dumps(agent_profile) if agent_profile else (agent_bio or "Unknown"),
+            "candidate_context": json.dumps(candidate_profile) if candidate_profile else "Unknown",
+            "decision": trace.decision,
+            "reasoning_log": trace.reasoning_log
+        }
+
+    def _store_verdict(
+        self,
+        audits: List[Dict[str, Any]],
+        trace: AgentTrace,
+        verdict: Optional[AuditVerdict],
+        sampling: SamplingDecision
+    ) -> bool:
+        """Flips the trace's status and queues its agent_audits row in `audits`."""
+        if verdict is None:
+            trace.audit_status = "FAILED"
+            return False
+
+        audits.append({
+            "trace_id": trace.id,
+            "status": verdict.status,
+            "risk_level": verdict.risk_level,
+            "audit_reasoning": verdict.audit_reasoning,
+            "model": self.client.model,
+            "risk_score": sampling.risk_score,
+            "sample_weight": sampling.sample_weight,
+        })
+        trace.audit_status = "AUDITED"
+
+        if verdict.status == "FLAGGED":
+            logger.warning(f"FLAGGED INTERACTION ({trace.id}, risk {sampling.reasons}): {verdict.audit_reasoning}")
+        else:
+            logger.info(f"PASSED ({trace.id}): Logic seems sound.")
+        return True
+
+    async def _audit_group(self, payloads: List[Dict[str, Any]]) -> List[Optional[AuditVerdict]]:
+        """
+        Audits a group of traces, returning one verdict (None = unparseable) per payload.
+        """
+        if len(payloads) == 1:
+            return [await self._audit_single(payloads[0])]
+
+        # Batched mode: one prompt, a list of verdicts validated item by item
+        response = await self.client.chat_raw(
+            PromptTemplates.build_batch_auditor_prompt(payloads),
+            temperature=0.0,
+            format=llm_output_schema(AuditBatch)
+        )
+        verdicts: List[Optional[AuditVerdict]] = [None] * len(payloads)
+        try:
+            items = json.loads(response["message"]["content"]).get("verdicts", [])
+        except (json.JSONDecodeError, AttributeError):
+            self.parse_failures += 1
+            self.wasted_tokens += response.get("eval_count", 0)
+            items = []
+
+        for item in items:
+            try:
+                verdict = BatchAuditItem.model_validate(item)
+            except ValidationError:
+                continue
+            if 0 <= verdict.trace_index < len(payloads) and verdicts[verdict.trace_index] is None:
+                verdicts[verdict.trace_index] = AuditVerdict(**verdict.model_dump(exclude={"trace_index"}))
+
+        # Anything the batch missed or garbled gets its own prompt, one at a time:
+        # the caller's semaphore slot covers a single prompt in flight
+        missing = [i for i, verdict in enumerate(verdicts) if verdict is None]
+        if missing:
+            logger.info(f"Batched audit covered {len(payloads) - len(missing)}/{len(payloads)}, retrying the rest singly")
+            for i in missing:
+                verdicts[i] = await self._audit_single(payloads[i])
+        return verdicts
+
+    async def _audit_single(self, payload: Dict[str, Any]) -> Optional[AuditVerdict]:
+        # Ask the Brain to Audit (schema-constrained output)
+        messages = PromptTemplates.build_auditor_prompt(payload)
+        response = await self.client.chat_raw(
+            messages,
+            temperature=0.0,
+            format=llm_output_schema(AuditVerdict)
+        )
+
+        # Parse (single pass)
+        try:
+            return AuditVerdict.model_validate_json(response["message"]["content"])
+        except ValidationError:
+            self.parse_failures += 1
+            self.wasted_tokens += response.get("eval_count", 0)
+            logger.error("Failed to parse audit verdict")
+            return None
+
+auditor_service = AuditorService()
@@ -10,42 +10,98 @@ if str(ROOT) not in sys.path:
 import asyncio
 import json
 import logging
+import time
 import aio_pika
+from typing import Callable, Optional
 from uuid import UUID
+from prometheus_client import Histogram, start_http_server
 
 from app.core.config import settings
-from app.core.queue import RabbitMQClient
+from app.core.queue import QUEUE_AUDIT, QUEUE_HIGH_PRIORITY, QUEUE_LOW_PRIORITY, RabbitMQClient
 from app.core.database import AsyncSessionLocal
 from app.modules.identity.models import User, AgentTrace
+from app.modules.identity.snapshots import agent_snapshot, candidate_snapshot, snapshot_store
 from app.modules.recsys.service import recsys_service
 
 # IMPORT THE NEW BRAIN
 from app.modules.agent_brain.service import inference_service
+from app.modules.agent_brain.limiter import CircuitOpenError
+from app.modules.agent_brain.telemetry import summarize_calls
+from app.modules.agent_brain.residency import ModelResidencyManager
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("qoneqt.worker")
 
+STAGE_SECONDS = Histogram(
+    "worker_stage_seconds", "Time spent per message in each worker stage", ["stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+
 class AgentWorker:
+    def __init__(self, stage_observer: Optional[Callable[[str, float], None]] = None):
+        # Optional hook (e.g. scripts/bench_worker.py) receiving every (stage, seconds) sample
+        self.stage_observer = stage_observer
+
+    def _observe(self, stage: str, started: float) -> float:
+        now = time.perf_counter()
+        STAGE_SECONDS.labels(stage=stage).observe(now - started)
+        if self.stage_observer:
+            self.stage_observer(stage, now - started)
+        return now
+
     async def start(self):
+        # Expose inference telemetry (the worker is not behind the API's /metrics)
+        start_http_server(settings.WORKER_METRICS_PORT)
+
+        # Load models before taking work so cold loads stay off the request path
+        routers = [c for c in (inference_service.client, inference_service.small_client) if c]
+        residency = ModelResidencyManager(routers)
+        await residency.preload()
+        self._residency_task = asyncio.create_task(residency.run())
+
         # ... (Same connection logic as before) ...
         connection = await RabbitMQClient.get_connection()
         channel = await connection.channel()
-        await channel.set_qos(prefetch_count=1)
+        # prefetch > 1 lets one worker keep several inference backends busy
+        await channel.set_qos(prefetch_count=settings.WORKER_PREFETCH)
+
+        # Eject / re-admit inference backends in the background
+        self._health_tasks = [asyncio.create_task(router.run_health_loop()) for router in routers]
         
-        queue = await channel.declare_queue("queue.high_priority", durable=True)
+        queue = await channel.declare_queue(QUEUE_HIGH_PRIORITY, durable=True)
         await queue.consume(self.process_message)
+
+        # Free-tier wake-ups: own channel, so its prefetch is a separate, smaller budget
+        low_channel = await connection.channel()
+        await low_channel.set_qos(prefetch_count=settings.WORKER_LOW_PRIORITY_PREFETCH)
+        low_queue = await low_channel.declare_queue(QUEUE_LOW_PRIORITY, durable=True)
+        await low_queue.consume(self.process_message)
         logger.info(" Agent Worker (Inference Enabled) Listening...")
         await asyncio.Future()
 
+    async def _publish_audit_event(self, trace: AgentTrace):
+        if not settings.AUDIT_QUEUE_ENABLED:
+            return
+        try:
+            await RabbitMQClient.publish(QUEUE_AUDIT, {"trace_id": str(trace.id)})
+        except Exception as e:
+            # The trace is already saved as PENDING: the audit cycle picks it up later
+            logger.warning(f"Could not publish audit event for {trace.id}: {e}")
+
     async def process_message(self, message: aio_pika.IncomingMessage):
-        async with message.process():
+        # Messages that hit an open circuit are nacked back to the queue below
+        async with message.process(ignore_processed=True):
+            # Pause consumption while the LLM backend is down (prefetch bounds the backlog)
+            await inference_service.breaker.wait_until_available()
             try:
                 payload = json.loads(message.body)
                 agent_id_str = payload.get("agent_id")
+                started = time.perf_counter()
                 
                 async with AsyncSessionLocal() as session:
                     # 1. Hydrate Context
                     agent = await session.get(User, UUID(agent_id_str))
+                    started = self._observe("hydrate", started)
                     if not agent: return
 
                     # 2. Get Candidates (Layer 3)
@@ -54,6 +110,7 @@ class AgentWorker:
                         query_text="Find relevant peers",
                         limit=1
                     )
+                    started = self._observe("recall", started)
                     
                     if not recommendations:
                         logger.info("No candidates found.")
@@ -74,20 +131,40 @@ class AgentWorker:
                         agent_profile=agent_profile,
                         candidate_profile=candidate
                     )
+                    started = self._observe("inference", started)
 
                     # 4. Save Trace (Observability)
                     if decision:
+                        # Snapshot what the agent saw (deduplicated by content hash)
+                        agent_hash, candidate_hash = await snapshot_store.ensure(session, [
+                            agent_snapshot(agent_profile),
+                            candidate_snapshot(candidate),
+                        ])
                         trace = AgentTrace(
                             agent_id=agent.id,
+                            candidate_id=UUID(candidate["user_id"]) if candidate.get("user_id") else None,
                             interaction_type="SCREENING",
+                            agent_snapshot_hash=agent_hash,
+                            candidate_snapshot_hash=candidate_hash,
+                            match_score=candidate.get("match_score"),
                             reasoning_log=decision.model_dump(), # Saves full JSON
-                            decision=decision.decision
+                            decision=decision.decision,
+                            decision_stage=decision.meta.stage,
+                            inference_stats=summarize_calls(decision.meta.calls) if decision.meta.calls else None
                         )
                         session.add(trace)
                         await session.commit()
+                        snapshot_store.remember((agent_hash, candidate_hash))
+                        self._observe("persist", started)
                         
                         logger.info(f" Trace saved. Agent decided: {decision.decision}")
 
+                        # 5. Hand the trace to the auditor consumer
+                        await self._publish_audit_event(trace)
+
+            except CircuitOpenError:
+                logger.warning("LLM circuit open, requeueing message")
+                await message.nack(requeue=True)
             except Exception as e:
                 logger.error(f"Worker Error: {e}")
 
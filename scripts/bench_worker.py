@@ -0,0 +1,181 @@
+"""
+End-to-end worker throughput benchmark.
+
+Publishes N wake messages for active agents, runs an in-process AgentWorker
+against the local Postgres / Redis / RabbitMQ (docker-compose) and a fake LLM
+backend, then reports decisions/sec, per-stage latency percentiles and
+resource usage. Run it before and after a change to measure it.
+
+Usage:
+    python scripts/bench_worker.py --messages 500 --spawn-fake "--slots 8 --tokens-per-second 40"
+    python scripts/bench_worker.py --messages 500 --backends http://localhost:11435
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import shlex
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+sys.path.append(os.getcwd())
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark AgentWorker throughput")
+    parser.add_argument("--messages", type=int, default=200, help="Wake messages to publish")
+    parser.add_argument("--queue", default="queue.high_priority")
+    parser.add_argument("--backends", default=None, help="LLM_BACKENDS override (default: the spawned fake)")
+    parser.add_argument("--spawn-fake", default=None, metavar="ARGS",
+                        help="Start scripts/fake_llm_server.py with these arguments")
+    parser.add_argument("--fake-port", type=int, default=11435)
+    parser.add_argument("--prefetch", type=int, default=None, help="WORKER_PREFETCH override")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Give up after this many seconds")
+    parser.add_argument("--bypass-cache", action="store_true", help="Flush decision cache keys first")
+    return parser.parse_args()
+
+
+def percentile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(samples: Dict[str, List[float]], processed: int, wall: float, usage_before, usage_after, extra: dict):
+    cpu_user = usage_after.ru_utime - usage_before.ru_utime
+    cpu_sys = usage_after.ru_stime - usage_before.ru_stime
+
+    print("\n📊 Worker benchmark")
+    print(f"   Messages processed : {processed}")
+    print(f"   Wall time          : {wall:.2f}s")
+    print(f"   Throughput         : {processed / wall if wall else 0:.2f} msg/s")
+    print(f"\n   {'stage':<12}{'n':>7}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}{'max ms':>11}")
+    for stage in ("hydrate", "recall", "inference", "persist", "handle", "end_to_end"):
+        values = samples.get(stage, [])
+        if not values:
+            continue
+        print(
+            f"   {stage:<12}{len(values):>7}"
+            f"{percentile(values, 50) * 1000:>11.1f}{percentile(values, 95) * 1000:>11.1f}"
+            f"{percentile(values, 99) * 1000:>11.1f}{max(values) * 1000:>11.1f}"
+        )
+    print("\n   Resources (worker process)")
+    print(f"   CPU user / sys     : {cpu_user:.2f}s / {cpu_sys:.2f}s ({(cpu_user + cpu_sys) / wall * 100 if wall else 0:.0f}% of one core)")
+    print(f"   Peak RSS           : {usage_after.ru_maxrss / 1024:.0f} MiB")
+    for key, value in extra.items():
+        print(f"   {key:<19}: {value}")
+
+
+async def run(args: argparse.Namespace):
+    # App modules read settings at import time, so the environment is set up first
+    import aio_pika
+    from app.core.database import engine
+    from app.core.queue import RabbitMQClient
+    from app.core.redis import RedisClient
+    from app.modules.identity.models import User
+    from app.modules.agent_brain.service import inference_service
+    from app.worker import AgentWorker
+    from sqlalchemy import select
+    from app.core.database import AsyncSessionLocal
+
+    engine.echo = False  # SQL logging would dominate the measurement
+
+    samples: Dict[str, List[float]] = defaultdict(list)
+    processed = 0
+    done = asyncio.Event()
+
+    class BenchWorker(AgentWorker):
+        async def process_message(self, message: aio_pika.IncomingMessage):
+            nonlocal processed
+            started = time.perf_counter()
+            await super().process_message(message)
+            samples["handle"].append(time.perf_counter() - started)
+            published_at = json.loads(message.body).get("published_at")
+            if published_at:
+                samples["end_to_end"].append(time.time() - published_at)
+            processed += 1
+            if processed >= args.messages:
+                done.set()
+
+    # 1. Agents to wake
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(select(User.id).where(User.is_active == True))
+        agent_ids = [str(row[0]) for row in result.all()]
+    if not agent_ids:
+        print("❌ No active users. Run scripts/seed_db.py first.")
+        return
+
+    if args.bypass_cache:
+        redis = RedisClient.get_instance()
+        keys = [key async for key in redis.scan_iter("brain:decision:*")]
+        if keys:
+            await redis.delete(*keys)
+
+    # 2. Clean queue, then publish the burst
+    channel = await RabbitMQClient.get_channel()
+    queue = await channel.declare_queue(args.queue, durable=True)
+    await queue.purge()
+    print(f"📨 Publishing {args.messages} wake messages for {len(agent_ids)} agents...")
+    for i in range(args.messages):
+        await RabbitMQClient.publish(args.queue, {
+            "agent_id": agent_ids[i % len(agent_ids)],
+            "published_at": time.time(),
+        })
+
+    # 3. Consume with an in-process worker
+    worker = BenchWorker(stage_observer=lambda stage, seconds: samples[stage].append(seconds))
+    usage_before = resource.getrusage(resource.RUSAGE_SELF)
+    started = time.perf_counter()
+    worker_task = asyncio.create_task(worker.start())
+    try:
+        await asyncio.wait_for(done.wait(), timeout=args.timeout)
+    except asyncio.TimeoutError:
+        print(f"⚠️ Timed out after {args.timeout:.0f}s with {processed}/{args.messages} processed")
+    wall = time.perf_counter() - started
+    usage_after = resource.getrusage(resource.RUSAGE_SELF)
+    worker_task.cancel()
+
+    report(samples, processed, wall, usage_before, usage_after, {
+        "Limiter": inference_service.limiter.stats(),
+        "Breaker": inference_service.breaker.state,
+        "Decision cache": inference_service.decision_cache.stats(),
+        "Parse stats": inference_service.parse_stats,
+        "Backends": inference_service.client.stats(),
+    })
+
+
+def main():
+    args = parse_args()
+    fake: Optional[subprocess.Popen] = None
+
+    if args.spawn_fake is not None:
+        fake = subprocess.Popen([
+            sys.executable, "scripts/fake_llm_server.py",
+            "--port", str(args.fake_port), *shlex.split(args.spawn_fake)
+        ])
+        os.environ["LLM_BACKENDS"] = args.backends or f"http://127.0.0.1:{args.fake_port}"
+        time.sleep(2.0)  # Let uvicorn bind
+    elif args.backends:
+        os.environ["LLM_BACKENDS"] = args.backends
+
+    if args.prefetch:
+        os.environ["WORKER_PREFETCH"] = str(args.prefetch)
+    # Don't clash with a worker already exposing metrics on this host
+    os.environ.setdefault("WORKER_METRICS_PORT", "9109")
+
+    try:
+        asyncio.run(run(args))
+    finally:
+        if fake:
+            fake.terminate()
+            fake.wait()
+
+
+if __name__ == "__main__":
+    main()
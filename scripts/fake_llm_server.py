@@ -0,0 +1,300 @@
+"""
+Fake LLM backend for load tests (no GPU needed).
+
+Speaks enough of the Ollama API (/api/chat, /api/generate, /api/tags) and the
+OpenAI API (/v1/chat/completions, /v1/models) for the worker, the auditor and
+the router health checks. Latency, decode speed, errors and GPU slots are
+configurable so throughput changes can be measured reproducibly.
+
+Usage:
+    python scripts/fake_llm_server.py --port 11435 --prefill-median 0.3 --tokens-per-second 40
+    LLM_BACKENDS=http://localhost:11435 python app/worker.py
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+NS = 1_000_000_000
+
+CANNED_DECISIONS = {
+    "ACCEPT": {
+        "decision": "ACCEPT",
+        "confidence_score": 0.86,
+        "reasoning": "Strong overlap in skills and goals; the candidate's work complements my own.",
+        "generated_message": "Hi! I noticed we both work on similar problems and would love to connect and swap notes.",
+    },
+    "REJECT": {
+        "decision": "REJECT",
+        "confidence_score": 0.91,
+        "reasoning": "The candidate's focus does not overlap with my skills or current goals.",
+        "generated_message": None,
+    },
+    "HOLD": {
+        "decision": "HOLD",
+        "confidence_score": 0.55,
+        "reasoning": "Some overlap, but the profile is too thin to decide with confidence.",
+        "generated_message": None,
+    },
+}
+CANNED_AUDIT = {
+    "status": "PASS",
+    "risk_level": "LOW",
+    "audit_reasoning": "The decision follows from the profiles and the reasoning is consistent.",
+}
+CANNED_MESSAGE = "Hi! Your work caught my eye and I think we'd have a lot to talk about. Up for connecting?"
+
+
+class FakeLLM:
+    """Simulated GPU: a fixed number of slots, lognormal prefill, steady decode rate."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.slots = asyncio.Semaphore(args.slots)
+        self.loaded: Dict[str, float] = {}
+        self.stats = {"requests": 0, "errors": 0, "cancelled": 0, "tokens": 0}
+
+    # -------------------------------------------------------------------------
+    # Simulation
+    # -------------------------------------------------------------------------
+    def prefill_seconds(self) -> float:
+        return self.args.prefill_median * self.rng.lognormvariate(0.0, self.args.prefill_sigma)
+
+    def maybe_fail(self):
+        self.stats["requests"] += 1
+        if self.rng.random() < self.args.error_rate:
+            self.stats["errors"] += 1
+            raise HTTPException(status_code=503, detail="fake backend overloaded")
+
+    async def load(self, model: str) -> float:
+        """Returns the load time paid by this request (0 if already resident)."""
+        now = time.monotonic()
+        resident_until = self.loaded.get(model)
+        load_s = 0.0
+        if resident_until is None or resident_until < now:
+            load_s = self.args.load_seconds
+            await asyncio.sleep(load_s)
+        self.loaded[model] = time.monotonic() + self.args.keep_alive
+        return load_s
+
+    def pick_output(self, body: Dict[str, Any]) -> str:
+        schema = body.get("format") or (body.get("response_format") or {}).get("json_schema", {}).get("schema")
+        properties = schema.get("properties", {}) if isinstance(schema, dict) else {}
+        if "decision" in properties:
+            roll = self.rng.random()
+            if roll < self.args.accept_ratio:
+                choice = "ACCEPT"
+            elif roll < self.args.accept_ratio + self.args.hold_ratio:
+                choice = "HOLD"
+            else:
+                choice = "REJECT"
+            return json.dumps(CANNED_DECISIONS[choice])
+        if "status" in properties:
+            return json.dumps(CANNED_AUDIT)
+        if "verdicts" in properties:
+            # Batched audit: one verdict per "[i]" interaction in the prompt
+            prompt = " ".join(m.get("content") or "" for m in body.get("messages", []))
+            count = len(re.findall(r"^\[\d+\]$", prompt, re.MULTILINE)) or 1
+            return json.dumps({"verdicts": [{**CANNED_AUDIT, "trace_index": i} for i in range(count)]})
+        if body.get("format") == "json" or body.get("response_format"):
+            return json.dumps(CANNED_DECISIONS["REJECT"])
+        return CANNED_MESSAGE
+
+    @staticmethod
+    def tokenize(text: str, limit: Optional[int]) -> List[str]:
+        # ~4 characters per token, close enough for timing purposes
+        tokens = [text[i:i + 4] for i in range(0, len(text), 4)]
+        return tokens[:limit] if limit else tokens
+
+    @staticmethod
+    def prompt_tokens(messages: List[dict]) -> int:
+        return sum(len(m.get("content") or "") for m in messages) // 4
+
+    async def generate(self, body: Dict[str, Any], limit: Optional[int]) -> AsyncIterator[tuple]:
+        """
+        Yields (token, None) pairs, then (None, stats). Holds a GPU slot throughout.
+        """
+        model = body.get("model", "fake")
+        async with self.slots:
+            load_s = await self.load(model)
+            prefill_s = self.prefill_seconds()
+            await asyncio.sleep(prefill_s)
+
+            tokens = self.tokenize(self.pick_output(body), limit)
+            started = time.monotonic()
+            try:
+                for i, token in enumerate(tokens):
+                    # Sleep until this token is due (keeps the rate steady under load)
+                    delay = started + (i + 1) / self.args.tokens_per_second - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    self.stats["tokens"] += 1
+                    yield token, None
+            except (asyncio.CancelledError, GeneratorExit):
+                # Client hung up (early exit): the slot frees immediately, like a real server
+                self.stats["cancelled"] += 1
+                raise
+
+            yield None, {
+                "load_duration": int(load_s * NS),
+                "prompt_eval_count": self.prompt_tokens(body.get("messages", [])),
+                "prompt_eval_duration": int(prefill_s * NS),
+                "eval_count": len(tokens),
+                "eval_duration": int((time.monotonic() - started) * NS),
+            }
+
+
+def create_app(args: argparse.Namespace) -> FastAPI:
+    app = FastAPI(title="Fake LLM")
+    llm = FakeLLM(args)
+
+    # -------------------------------------------------------------------------
+    # Ollama API
+    # -------------------------------------------------------------------------
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": [{"name": m} for m in args.models]}
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        body = await request.json()
+        model = body.get("model", "fake")
+        if not body.get("prompt"):
+            # Load / keep-alive request (no prompt): report the load time only
+            load_s = await llm.load(model)
+            return {"model": model, "response": "", "done": True, "load_duration": int(load_s * NS)}
+
+        llm.maybe_fail()
+        body["messages"] = [{"role": "user", "content": body["prompt"]}]
+        text, stats = [], {}
+        async for token, final in llm.generate(body, body.get("options", {}).get("num_predict")):
+            if final:
+                stats = final
+            else:
+                text.append(token)
+        return {"model": model, "response": "".join(text), "done": True, **stats}
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        body = await request.json()
+        model = body.get("model", "fake")
+        limit = body.get("options", {}).get("num_predict")
+        llm.maybe_fail()
+
+        if not body.get("stream", True):
+            text, stats = [], {}
+            async for token, final in llm.generate(body, limit):
+                if final:
+                    stats = final
+                else:
+                    text.append(token)
+            return {
+                "model": model,
+                "message": {"role": "assistant", "content": "".join(text)},
+                "done": True,
+                **stats,
+            }
+
+        async def ndjson():
+            async for token, final in llm.generate(body, limit):
+                if final:
+                    chunk = {"model": model, "message": {"role": "assistant", "content": ""}, "done": True, **final}
+                else:
+                    chunk = {"model": model, "message": {"role": "assistant", "content": token}, "done": False}
+                yield json.dumps(chunk) + "\n"
+
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    # -------------------------------------------------------------------------
+    # OpenAI-compatible API
+    # -------------------------------------------------------------------------
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": m, "object": "model"} for m in args.models]}
+
+    @app.post("/v1/chat/completions")
+    async def completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "fake")
+        limit = body.get("max_tokens")
+        llm.maybe_fail()
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+        def usage(stats: dict) -> dict:
+            return {
+                "prompt_tokens": stats["prompt_eval_count"],
+                "completion_tokens": stats["eval_count"],
+                "total_tokens": stats["prompt_eval_count"] + stats["eval_count"],
+            }
+
+        if not body.get("stream"):
+            text, stats = [], {}
+            async for token, final in llm.generate(body, limit):
+                if final:
+                    stats = final
+                else:
+                    text.append(token)
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(text)},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage(stats),
+            }
+
+        async def sse():
+            async for token, final in llm.generate(body, limit):
+                if final:
+                    chunk = {"id": completion_id, "model": model, "choices": [], "usage": usage(final)}
+                else:
+                    chunk = {
+                        "id": completion_id,
+                        "model": model,
+                        "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+                    }
+                yield f"data: {json.dumps(chunk)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(sse(), media_type="text/event-stream")
+
+    @app.get("/_stats")
+    async def stats():
+        return JSONResponse(llm.stats)
+
+    return app
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Fake Ollama / OpenAI-compatible LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--models", nargs="+", default=["qwen2.5:7b", "qwen2.5:1.5b"])
+    parser.add_argument("--slots", type=int, default=4, help="Concurrent generations (GPU batch slots)")
+    parser.add_argument("--prefill-median", type=float, default=0.25, help="Median prefill latency (s)")
+    parser.add_argument("--prefill-sigma", type=float, default=0.4, help="Lognormal sigma of the prefill latency")
+    parser.add_argument("--tokens-per-second", type=float, default=40.0, help="Decode rate per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--load-seconds", type=float, default=0.0, help="Cold-load time of a non-resident model")
+    parser.add_argument("--keep-alive", type=float, default=1800.0, help="Seconds a model stays resident")
+    parser.add_argument("--accept-ratio", type=float, default=0.2)
+    parser.add_argument("--hold-ratio", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    uvicorn.run(create_app(args), host=args.host, port=args.port, log_level="warning")
@@ -6,5 +6,10 @@ sys.path.append(os.getcwd())
 
 from app.modules.watcher.service import auditor_service
 
+async def main():
+    # Backends ejected mid-cycle are re-admitted once their health check passes
+    async with auditor_service.health_checks():
+        await auditor_service.run_audit_cycle()
+
 if __name__ == "__main__":
-    asyncio.run(auditor_service.run_audit_cycle())
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
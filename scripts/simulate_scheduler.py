@@ -0,0 +1,160 @@
+"""
+Scheduler load forecast (dry run, virtual time).
+
+Runs the TimeEngine wake rules over a synthetic or snapshotted population
+without Redis or RabbitMQ, and reports wake-ups per hour / minute, peak LLM
+concurrency and LLM-seconds per hour. Use it to tune tier rates and
+SCHEDULER_CAPACITY_PER_MINUTE against worker capacity offline.
+
+Usage:
+    python scripts/simulate_scheduler.py --agents 1000000 --hours 24 --decision-seconds 4
+    python scripts/simulate_scheduler.py --agents 1000000 --capacity-per-minute 20000 --workers 1200
+    python scripts/simulate_scheduler.py --from-db --save-population population.npz
+    python scripts/simulate_scheduler.py --population population.npz --histogram
+"""
+import argparse
+import asyncio
+import csv
+import os
+import sys
+from typing import Dict, Optional
+
+import numpy as np
+
+sys.path.append(os.getcwd())
+
+from app.modules.scheduler import planning
+from app.modules.scheduler.simulator import TRACKS, SchedulerSimulator, SimulationResult, synthetic_population
+
+SPARK = " ▁▂▃▄▅▆▇█"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Dry-run the scheduler and forecast worker / LLM load")
+    population = parser.add_argument_group("population")
+    population.add_argument("--agents", type=int, default=100_000, help="Synthetic population size")
+    population.add_argument("--pro-share", type=float, default=0.1, help="Share of pro-tier agents (synthetic)")
+    population.add_argument("--population", default=None, help="Load a population snapshot (.npz)")
+    population.add_argument("--from-db", action="store_true", help="Snapshot the active agents from Postgres")
+    population.add_argument("--save-population", default=None, help="Write the population to this .npz")
+
+    policy = parser.add_argument_group("policy")
+    policy.add_argument("--hours", type=int, default=24)
+    policy.add_argument("--start-hour", type=int, default=0, help="UTC hour the simulation starts at")
+    policy.add_argument("--capacity-per-minute", type=int, default=0,
+                        help="Water-fill into this many wake-ups/min (0 = uniform jitter)")
+    policy.add_argument("--spill-minutes", type=int, default=120)
+    policy.add_argument("--seed", type=int, default=0)
+
+    workers = parser.add_argument_group("workers")
+    workers.add_argument("--decision-seconds", type=float, default=4.0, help="LLM time per wake-up")
+    workers.add_argument("--workers", type=int, default=None, help="Concurrent decision slots (queue model)")
+
+    output = parser.add_argument_group("output")
+    output.add_argument("--histogram", action="store_true", help="Print a per-minute sparkline per hour")
+    output.add_argument("--csv", default=None, help="Write per-minute wake-ups per track to this file")
+    return parser.parse_args()
+
+
+async def snapshot_from_db() -> Dict[str, np.ndarray]:
+    # Same projection / paging as the planner (needs the usual DB settings)
+    from app.modules.scheduler.time_engine import TimeEngine
+    from app.core.config import settings
+
+    schedules, is_pro = [], []
+    engine = TimeEngine(coordinator=object())
+    async for chunk in engine._iter_active_agents(settings.SCHEDULER_PLAN_CHUNK_SIZE):
+        _, chunk_schedules, tiers = zip(*chunk)
+        schedules.append(planning.schedules_matrix(chunk_schedules))
+        is_pro.append(np.fromiter((t == "pro" for t in tiers), dtype=bool, count=len(tiers)))
+    if not schedules:
+        return {"schedules": np.zeros((0, planning.HOURS), dtype=np.float32), "is_pro": np.zeros(0, dtype=bool)}
+    return {"schedules": np.concatenate(schedules), "is_pro": np.concatenate(is_pro)}
+
+
+def sparkline(values: np.ndarray, top: float) -> str:
+    if top <= 0:
+        return " " * len(values)
+    levels = np.minimum((values / top * (len(SPARK) - 1)).round().astype(int), len(SPARK) - 1)
+    return "".join(SPARK[level] for level in levels)
+
+
+def report(result: SimulationResult, agents: int, args: argparse.Namespace):
+    total = result.total
+    print(f"\n🕒 Scheduler dry run: {agents} agents, {args.hours}h from {args.start_hour:02d}:00 UTC")
+    print(f"   Policy   : {'water-fill at ' + str(args.capacity_per_minute) + '/min' if args.capacity_per_minute else 'uniform jitter'}")
+    print(f"   Planned  : " + ", ".join(f"{track} {count}" for track, count in result.planned.items()))
+    print(f"   Shed {result.shed}, spilled {result.spilled}, still pending when re-planned {result.kept}")
+
+    print(f"\n   {'hour':>4}{'pro':>9}{'slot':>9}{'seren.':>9}{'wakes':>10}{'peak/min':>10}{'peak/mean':>10}"
+          f"{'LLM-s':>12}{'peak conc.':>12}")
+    for row in result.hourly():
+        print(
+            f"   {row['hour']:>4}{row['pro']:>9}{row['slot']:>9}{row['serendipity']:>9}{row['wakes']:>10}"
+            f"{row['peak_per_min']:>10}{row['peak_to_mean']:>10.2f}{row['llm_seconds']:>12.0f}{row['peak_concurrency']:>12.1f}"
+        )
+
+    hours = max(1, len(total) // 60)
+    print(f"\n   Peak wake-ups/min   : {int(total.max()) if len(total) else 0}")
+    print(f"   Mean wake-ups/min   : {total.mean() if len(total) else 0:.1f}")
+    print(f"   Peak concurrency    : {result.concurrency.max() if len(total) else 0:.1f} decisions in flight")
+    print(f"   LLM-seconds / hour  : {total.sum() * result.decision_seconds / hours:.0f} (mean)")
+    if result.backlog is not None:
+        print(f"   Workers ({args.workers} slots): max backlog {result.backlog.max():.0f}, "
+              f"max wait {result.max_wait_seconds:.0f}s")
+
+    if args.histogram:
+        top = float(total.max()) if len(total) else 0.0
+        print(f"\n   Wake-ups per minute (█ = {top:.0f})")
+        for h in range(len(total) // 60):
+            hour = (args.start_hour + h) % 24
+            print(f"   {hour:02d} |{sparkline(total[h * 60:(h + 1) * 60], top)}|")
+
+
+def write_csv(path: str, result: SimulationResult):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["minute", *TRACKS, "total", "backlog"])
+        for minute in range(len(result.total)):
+            writer.writerow([
+                minute,
+                *(int(result.wakes[track][minute]) for track in TRACKS),
+                int(result.total[minute]),
+                "" if result.backlog is None else round(float(result.backlog[minute]), 1),
+            ])
+
+
+def main():
+    args = parse_args()
+
+    population: Optional[Dict[str, np.ndarray]] = None
+    if args.population:
+        with np.load(args.population) as data:
+            population = {"schedules": data["schedules"], "is_pro": data["is_pro"]}
+    elif args.from_db:
+        population = asyncio.run(snapshot_from_db())
+    else:
+        population = synthetic_population(args.agents, args.pro_share, np.random.default_rng(args.seed))
+
+    if args.save_population:
+        np.savez_compressed(args.save_population, **population)
+        print(f"💾 Population saved to {args.save_population}")
+
+    simulator = SchedulerSimulator(
+        population["schedules"],
+        population["is_pro"],
+        capacity_per_minute=args.capacity_per_minute,
+        spill_minutes=args.spill_minutes,
+        decision_seconds=args.decision_seconds,
+        worker_slots=args.workers,
+        seed=args.seed
+    )
+    result = simulator.run(hours=args.hours, start_hour=args.start_hour)
+    report(result, len(population["is_pro"]), args)
+    if args.csv:
+        write_csv(args.csv, result)
+        print(f"\n📄 Per-minute series written to {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+AdaptiveLimiter / CircuitBreaker checks (no LLM needed).
+
+Usage:
+    python scripts/test_limiter.py
+"""
+import asyncio
+import os
+import sys
+
+import httpx
+
+sys.path.append(os.getcwd())
+
+from app.modules.agent_brain.limiter import AdaptiveLimiter, CircuitBreaker, CircuitOpenError
+from app.modules.agent_brain.service import InferenceService
+
+
+async def check_limiter():
+    limiter = AdaptiveLimiter(initial=4, min_limit=1, max_limit=8, target_latency=1.0)
+    over_limit = []
+
+    async def call(seconds: float):
+        async with limiter.acquire():
+            if limiter.in_flight > int(limiter.limit):
+                over_limit.append(limiter.stats())
+            await asyncio.sleep(seconds)
+
+    # Never more than the limit in flight; fast, fully used calls grow it
+    await asyncio.gather(*(call(0.01) for _ in range(40)))
+    assert not over_limit, over_limit
+    assert 4 < limiter.limit <= 8, limiter.stats()
+
+    # An overload failure backs off multiplicatively
+    before = limiter.limit
+    async with limiter.acquire() as permit:
+        permit.drop()
+    assert limiter.limit == max(1, before * limiter.backoff), limiter.stats()
+    print("✅ Limiter caps concurrency, grows when used, backs off on overload")
+
+
+async def check_breaker():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    assert breaker.before_call() is False
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.is_open
+    try:
+        breaker.before_call()
+        raise AssertionError("open circuit let a call through")
+    except CircuitOpenError:
+        pass
+
+    # After the cool-down exactly one probe goes through; its success closes the circuit
+    await asyncio.sleep(0.06)
+    assert breaker.before_call() is True
+    try:
+        breaker.before_call()
+        raise AssertionError("second probe let through")
+    except CircuitOpenError:
+        pass
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    print("✅ Breaker opens, lets one probe through, closes on success")
+
+
+async def check_cancelled_probe():
+    service = InferenceService()
+    service.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+
+    async def failing():
+        raise httpx.ConnectError("down")
+
+    try:
+        await service._guarded(failing())
+    except httpx.ConnectError:
+        pass
+    assert service.breaker.is_open
+    await asyncio.sleep(0.06)
+
+    # The probe is cancelled mid-call (e.g. consumers torn down on reconnect)
+    probe = asyncio.create_task(service._guarded(asyncio.sleep(10)))
+    await asyncio.sleep(0.01)
+    probe.cancel()
+    try:
+        await probe
+    except asyncio.CancelledError:
+        pass
+    await asyncio.wait_for(service.breaker.wait_until_available(), timeout=1.0)
+
+    async def ok():
+        return "ok"
+
+    assert await service._guarded(ok()) == "ok"
+    assert service.breaker.state == CircuitBreaker.CLOSED
+    print("✅ A cancelled probe is released, the next call probes again")
+
+
+def test_limiter():
+    asyncio.run(check_limiter())
+    asyncio.run(check_breaker())
+    asyncio.run(check_cancelled_probe())
+
+
+if __name__ == "__main__":
+    test_limiter()
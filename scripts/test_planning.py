@@ -0,0 +1,89 @@
+"""
+Wake planning checks: water_fill, minute_capacity, LoadShaper (no DB, no Redis).
+
+Usage:
+    python scripts/test_planning.py
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.getcwd())
+
+from app.modules.scheduler import planning
+
+
+def test_water_fill():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        slots = int(rng.integers(1, 60))
+        load = rng.integers(0, 20, size=slots)
+        capacity = rng.integers(0, 25, size=slots).astype(float)
+        count = int(rng.integers(0, 400))
+        alloc = planning.water_fill(load, capacity, count)
+        room = np.maximum(capacity - load, 0)
+        # Never past the room, and everything placed while there is room
+        assert (alloc >= 0).all() and (alloc <= room).all(), (load, capacity, alloc)
+        assert alloc.sum() == min(count, room.sum()), (count, room.sum(), alloc.sum())
+        # Levelled: a slot only gets items while some slot with room is lower
+        level = load + alloc
+        open_slots = alloc < room
+        if open_slots.any() and (alloc > 0).any():
+            assert level[alloc > 0].max() <= level[open_slots].min() + 1, (load, alloc)
+    print("✅ water_fill conserves capacity and fills the lowest slots first")
+
+
+def test_minute_capacity():
+    for capacity, shards in ((10, 3), (7, 16), (100, 1), (1, 4)):
+        per_shard = [planning.minute_capacity(1_000_000, 120, capacity, share, shards) for share in range(shards)]
+        # Shards add up to the full capacity every minute, and each gets its fair share over time
+        assert (np.sum(per_shard, axis=0) == capacity).all(), (capacity, shards)
+        for share in per_shard:
+            assert abs(share.sum() - 120 * capacity / shards) <= 1, (capacity, shards, share.sum())
+    print("✅ minute_capacity shares add up to the full capacity")
+
+
+def test_load_shaper():
+    rng = np.random.default_rng(1)
+    load = np.zeros(90, dtype=np.int64)
+    load[:10] = 5
+    shaper = planning.LoadShaper(0.0, load, 5.0, window_minutes=60, rng=rng)
+
+    # Fits the window: never above capacity, all inside the window
+    stamps = shaper.place(200)
+    assert len(stamps) == 200 and stamps.max() < 60 * 60
+    assert shaper.load[:60].max() <= 5 and shaper.spilled == 0
+    # Window full (room for 50 more): pro work spills past it, serendipity is shed
+    assert len(shaper.place(100)) == 100 and shaper.spilled == 50
+    assert shaper.load[:60].max() <= 5
+    assert len(shaper.place(50, sheddable=True)) == 0 and shaper.shed == 50
+    # Everything full (100 spill slots left): levelled over the horizon above capacity
+    assert len(shaper.place(150)) == 150 and shaper.spilled == 150
+    assert shaper.load.min() >= 5 and shaper.load.max() - shaper.load.min() <= 1
+    print("✅ LoadShaper fills the window, spills, sheds serendipity, then levels")
+
+
+def test_draw_matches_place():
+    # Counted once, drawn chunk by chunk: same per-minute load as one placement
+    load = np.arange(80, dtype=np.int64) % 7
+    one = planning.LoadShaper(0.0, load, 6.0, window_minutes=60, rng=np.random.default_rng(2))
+    one.place(500, sheddable=True)
+
+    parts = planning.LoadShaper(0.0, load, 6.0, window_minutes=60, rng=np.random.default_rng(2))
+    plan = parts.allocate(500, sheddable=True)
+    kept = sum(len(parts.draw(plan, n, sheddable=True)) for n in (120, 200, 180))
+    assert plan.sum() == 0 and kept == 500 - parts.shed
+    assert (parts.load == one.load).all() and parts.shed == one.shed
+
+    # The group grew since it was counted: the extra items are placed on the spot
+    assert len(parts.draw(plan, 10)) == 10
+    assert parts.load.sum() == one.load.sum() + 10
+    print("✅ LoadShaper.draw places a counted group chunk by chunk")
+
+
+if __name__ == "__main__":
+    test_water_fill()
+    test_minute_capacity()
+    test_load_shaper()
+    test_draw_matches_place()
@@ -0,0 +1,98 @@
+"""
+InferenceRouter against two local fake backends (scripts/fake_llm_server.py).
+
+Checks that a failing backend is retried around and ejected, that the health
+loop ejects a backend that went away and re-admits it once it is back.
+
+Usage:
+    python scripts/test_router.py
+"""
+import asyncio
+import os
+import sys
+
+import uvicorn
+
+sys.path.append(os.getcwd())
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import fake_llm_server
+from app.modules.agent_brain.router import InferenceRouter
+
+PORTS = (11491, 11492)
+MESSAGES = [{"role": "user", "content": "Say hi."}]
+
+
+async def start_backend(port: int, error_rate: float = 0.0):
+    args = fake_llm_server.parse_args([
+        "--port", str(port), "--prefill-median", "0.01", "--tokens-per-second", "10000",
+        "--error-rate", str(error_rate), "--seed", "0",
+    ])
+    server = uvicorn.Server(uvicorn.Config(fake_llm_server.create_app(args), host="127.0.0.1", port=port, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    return args, server, task
+
+
+async def stop_backend(server: uvicorn.Server, task: asyncio.Task):
+    server.should_exit = True
+    await task
+
+
+async def wait_for(condition, timeout: float = 5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out waiting for the health loop"
+        await asyncio.sleep(0.05)
+
+
+async def run():
+    _, server_a, task_a = await start_backend(PORTS[0])
+    args_b, server_b, task_b = await start_backend(PORTS[1], error_rate=1.0)
+    router = InferenceRouter.from_urls(
+        [f"http://127.0.0.1:{port}" for port in PORTS],
+        max_attempts=2,
+        failure_threshold=2,
+        health_check_interval=0.1
+    )
+    a, b = router.backends
+
+    # 1. Backend B answers 503: every request is retried on A, B is ejected
+    for _ in range(4):
+        assert await router.chat(MESSAGES)
+    assert a.healthy and not b.healthy, router.stats()
+    print("✅ Failing backend retried around and ejected")
+
+    health_loop = asyncio.create_task(router.run_health_loop())
+    try:
+        # 2. B recovers: the health loop re-admits it and it serves again
+        args_b.error_rate = 0.0
+        await wait_for(lambda: b.healthy)
+        b.ewma_latency = None  # Unknown latency sorts first: next request probes B
+        assert await router.chat(MESSAGES)
+        assert b.ewma_latency is not None, router.stats()
+        print("✅ Recovered backend re-admitted by the health loop")
+
+        # 3. B goes away: the health loop ejects it, A keeps serving
+        await stop_backend(server_b, task_b)
+        await wait_for(lambda: not b.healthy)
+        assert await router.chat(MESSAGES)
+        print("✅ Unreachable backend ejected by the health loop")
+
+        # 4. B comes back
+        args_b, server_b, task_b = await start_backend(PORTS[1])
+        await wait_for(lambda: b.healthy)
+        print("✅ Restarted backend re-admitted")
+    finally:
+        health_loop.cancel()
+        await stop_backend(server_a, task_a)
+        await stop_backend(server_b, task_b)
+
+
+def test_router():
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_router()
@@ -0,0 +1,92 @@
+"""
+RiskSampler / FlagRateEstimator checks (no DB, no LLM).
+
+Usage:
+    python scripts/test_sampling.py
+"""
+import os
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.append(os.getcwd())
+
+from app.modules.watcher.sampling import FlagRateEstimator, RiskSampler
+
+NOW = datetime(2026, 1, 1)
+OLD_AGENT = NOW - timedelta(days=90)
+NEW_AGENT = NOW - timedelta(days=1)
+
+
+def high_risk(sampler: RiskSampler, confidence=0.9, accept_message=False, new_agent=False, flagged=False) -> bool:
+    log = {"confidence_score": confidence, "generated_message": "Hi!" if accept_message else None}
+    score, reasons = sampler.score(
+        log, "ACCEPT" if accept_message else "REJECT", NEW_AGENT if new_agent else OLD_AGENT, flagged, now=NOW
+    )
+    return sampler.decide(uuid.uuid4(), score, reasons).high_risk
+
+
+def test_rules():
+    sampler = RiskSampler(sample_rate=0.05, high_risk_score=0.5, low_confidence=0.7)
+    assert not high_risk(sampler)
+    # Strong signals alone
+    assert high_risk(sampler, flagged=True)
+    assert high_risk(sampler, confidence=0.3)
+    # Weak signals are advisory alone...
+    assert not high_risk(sampler, accept_message=True)
+    assert not high_risk(sampler, new_agent=True)
+    assert not high_risk(sampler, confidence=0.6)
+    # ...and high-risk in pairs
+    assert high_risk(sampler, accept_message=True, new_agent=True)
+    assert high_risk(sampler, accept_message=True, confidence=0.6)
+    assert high_risk(sampler, new_agent=True, confidence=0.6)
+    print("✅ One strong signal or two weak ones make a trace high-risk")
+
+
+def test_audited_fraction_and_estimate():
+    # The traffic mix documented in sampling.py
+    rng = random.Random(7)
+    sampler = RiskSampler(sample_rate=0.05, high_risk_score=0.5, low_confidence=0.7)
+    estimator = FlagRateEstimator()
+    traces, audited, flagged_total = 50_000, 0, 0
+    for _ in range(traces):
+        roll = rng.random()
+        confidence = rng.uniform(0.0, 0.35) if roll < 0.05 else rng.uniform(0.35, 0.7) if roll < 0.10 else 0.9
+        accept = rng.random() < 0.20
+        new_agent = rng.random() < 0.05
+        candidate_flagged = rng.random() < 0.01
+        log = {"confidence_score": confidence, "generated_message": "Hi!" if accept else None}
+        score, reasons = sampler.score(
+            log, "ACCEPT" if accept else "REJECT", NEW_AGENT if new_agent else OLD_AGENT, candidate_flagged, now=NOW
+        )
+        decision = sampler.decide(uuid.UUID(int=rng.getrandbits(128)), score, reasons)
+        # Ground truth: risky traces are flagged more often
+        is_flagged = rng.random() < (0.3 if decision.high_risk else 0.02)
+        flagged_total += is_flagged
+        if decision.audit:
+            audited += 1
+            estimator.add(decision.high_risk, decision.sample_weight, is_flagged)
+        else:
+            estimator.skipped += 1
+
+    fraction = audited / traces
+    assert 0.10 < fraction < 0.16, fraction
+    report = estimator.report()
+    assert abs(report["estimated_population"] - traces) / traces < 0.1, report
+    assert abs(report["estimated_flag_rate"] - flagged_total / traces) < 0.01, report
+    print(f"✅ {fraction:.1%} of traces audited; flag rate estimate {report['estimated_flag_rate']:.3f} "
+          f"(true {flagged_total / traces:.3f})")
+
+
+def test_deterministic_draw():
+    sampler = RiskSampler(sample_rate=0.5)
+    trace_id = uuid.uuid4()
+    assert len({sampler.decide(trace_id, 0.0, []).audit for _ in range(5)}) == 1
+    print("✅ Sampling draw is deterministic per trace")
+
+
+if __name__ == "__main__":
+    test_rules()
+    test_audited_fraction_and_estimate()
+    test_deterministic_draw()
@@ -0,0 +1,187 @@
+"""
+ScheduleStore checks.
+
+The interface contract (NX / GT / plain adds, claim / ack, leases, backlog,
+counts, planned-hour watermark) runs against MemoryScheduleStore, and against
+RedisScheduleStore when a Redis is reachable (REDIS_HOST), on a shard id no
+deployment uses.
+
+Redis only: expired buckets are simulated by deleting the bucket key, which
+is all EXPIREAT does. A wake-up whose bucket expired no longer counts as
+pending: NX re-adds it (planner catch-up after an outage longer than the
+bucket TTL), lease recovery re-queues it, and the claim sweep drops its
+index / routes entries. No wake-up is written behind the shard's cursor.
+
+Usage:
+    python scripts/test_schedule_store.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.getcwd())
+
+from app.core.redis import RedisClient
+from app.modules.scheduler.store import (
+    MemoryScheduleStore,
+    RedisScheduleStore,
+    ScheduleStore,
+    bucket_of,
+    bucket_prefix,
+    claimed_key,
+    cursor_key,
+    index_key,
+    planned_hour_key,
+    routes_key,
+    sweep_key,
+)
+
+SHARD = 9999
+LEASE = 60
+
+
+async def expire_bucket(ts: float):
+    await RedisClient.get_instance().delete(f"{bucket_prefix(SHARD)}{bucket_of(ts)}")
+
+
+async def cleanup():
+    redis = RedisClient.get_instance()
+    buckets = [key async for key in redis.scan_iter(f"{bucket_prefix(SHARD)}*")]
+    await redis.delete(
+        *buckets, cursor_key(SHARD), claimed_key(SHARD), index_key(SHARD),
+        routes_key(SHARD), planned_hour_key(SHARD), sweep_key(SHARD)
+    )
+
+
+async def check_contract(store: ScheduleStore, name: str):
+    now = time.time()
+
+    # Adds: plain replaces, NX keeps, GT only moves later
+    assert await store.add(SHARD, {"a": now + 600, "b": now + 600}, {"a": "pro", "b": "free"}) == 2
+    assert await store.add(SHARD, {"a": now + 300}, mode="nx") == 0
+    assert await store.add(SHARD, {"a": now + 300}, mode="gt") == 0
+    assert await store.add(SHARD, {"a": now + 900}, mode="gt") == 1
+    assert await store.add(SHARD, {"b": now + 120}) == 1
+    assert await store.count_between([SHARD], now, now + 1000) == 2
+    assert await store.count_between([SHARD], now + 800, now + 1000) == 1
+    counts = await store.bucket_counts(SHARD, bucket_of(now), 20)
+    assert counts[bucket_of(now + 120) - bucket_of(now)] == 1 and sum(counts) == 2, counts
+
+    # Claims: due only, up to the limit, with routes and the backlog left behind
+    due = {f"d{i}": now - 10 + i for i in range(5)}
+    await store.add(SHARD, due, {member: "pro" for member in due})
+    claim = await store.claim_due(SHARD, now, 3, LEASE)
+    assert claim.due == ["d0", "d1", "d2"] and claim.backlog == 2, claim
+    assert claim.routes == {"d0": "pro", "d1": "pro", "d2": "pro"}, claim
+    await store.ack(SHARD, claim.due)
+    claim = await store.claim_due(SHARD, now, 10, LEASE)
+    assert claim.due == ["d3", "d4"] and claim.backlog == 0, claim
+    await store.ack(SHARD, ["d3"])
+
+    # A route written by a re-add between claim and ack survives the ack
+    await store.add(SHARD, {"r": now - 1}, {"r": "free"})
+    claim = await store.claim_due(SHARD, now, 10, LEASE)
+    assert claim.due == ["r"], claim
+    await store.add(SHARD, {"r": now - 1}, {"r": "pro"})
+    await store.ack(SHARD, claim.due)
+    claim = await store.claim_due(SHARD, now, 10, LEASE)
+    assert claim.routes == {"r": "pro"}, claim
+    await store.ack(SHARD, claim.due)
+
+    # Nothing due: the next wake-up is reported (within the next bucket or two)
+    await store.add(SHARD, {"soon": now + 30})
+    claim = await store.claim_due(SHARD, now, 10, LEASE)
+    assert claim.due == [] and claim.next_due is not None and claim.next_due <= now + 30, claim
+
+    # Leases: the unacked claim (d4) comes back once its lease expires, acked ones don't
+    claim = await store.claim_due(SHARD, now + LEASE + 1, 10, LEASE)
+    assert "d4" in claim.due and not {"d0", "d1", "d2", "d3"} & set(claim.due), claim
+    await store.ack(SHARD, claim.due)
+
+    # Planned-hour watermark never moves back
+    assert await store.get_planned_hour(SHARD) is None
+    await store.set_planned_hour(SHARD, 100)
+    await store.set_planned_hour(SHARD, 99)
+    assert await store.get_planned_hour(SHARD) == 100
+    print(f"✅ {name}: store contract holds")
+
+
+async def redis_available() -> bool:
+    try:
+        return await RedisClient.get_instance().ping()
+    except Exception:
+        return False
+
+
+async def run():
+    await check_contract(MemoryScheduleStore(), "MemoryScheduleStore")
+    if not await redis_available():
+        print("⏭️  No Redis reachable: RedisScheduleStore checks skipped")
+        return
+
+    store = RedisScheduleStore()
+    redis = RedisClient.get_instance()
+    await cleanup()
+    try:
+        await check_contract(store, "RedisScheduleStore")
+    finally:
+        await cleanup()
+
+    now = time.time()
+    try:
+        # 1. NX keeps a pending wake-up...
+        assert await store.add(SHARD, {"a": now + 600}, {"a": "pro"}, mode="nx") == 1
+        assert await store.add(SHARD, {"a": now + 900}, mode="nx") == 0
+        # ...but not one whose bucket expired (scheduler down for longer than the TTL)
+        await expire_bucket(now + 600)
+        assert await store.add(SHARD, {"a": now + 900}, mode="nx") == 1
+        assert await store.count_between([SHARD], now, now + 1000) == 1
+        print("✅ NX re-adds a wake-up whose bucket expired")
+
+        # 2. GT treats it the same way
+        await expire_bucket(now + 900)
+        assert await store.add(SHARD, {"a": now + 300}, mode="gt") == 1
+        print("✅ GT re-adds a wake-up whose bucket expired")
+
+        # 3. Lease recovery: claimed, re-planned into a bucket that then expired
+        await store.add(SHARD, {"b": now - 1}, {"b": "free"})
+        claim = await store.claim_due(SHARD, now, 10, LEASE)
+        assert claim.due == ["b"] and claim.routes == {"b": "free"}, claim
+        await store.add(SHARD, {"b": now + 1200}, mode="nx")
+        await expire_bucket(now + 1200)
+        claim = await store.claim_due(SHARD, now + LEASE + 1, 10, LEASE)
+        assert "b" in claim.due, claim
+        await store.ack(SHARD, claim.due)
+        print("✅ Expired claim re-queued despite a stale index entry")
+
+        # 4. The claim sweep drops index / routes entries of expired, never claimed wake-ups
+        stale = {f"x{i}": now + 7200 for i in range(250)}
+        await store.add(SHARD, stale, {member: "free" for member in stale})
+        await expire_bucket(now + 7200)
+        for _ in range(10):
+            await store.claim_due(SHARD, now + LEASE + 2, 10, LEASE)
+        assert not any(await redis.hmget(index_key(SHARD), *stale)), "stale index entries left"
+        assert not any(await redis.hmget(routes_key(SHARD), *stale)), "stale routes left"
+        assert await redis.hget(index_key(SHARD), "a"), "pending wake-up swept"
+        print("✅ Claim sweep drops entries of expired buckets")
+
+        # 5. A ticker ahead of our clock moved the cursor past our minute: a past
+        #    wake-up must land at the cursor, where it is still drained
+        ahead = now + 600
+        await store.claim_due(SHARD, ahead, 10, LEASE)
+        assert await store.add(SHARD, {"c": now - 30}, {"c": "pro"}) == 1
+        assert int(await redis.hget(index_key(SHARD), "c")) >= bucket_of(ahead)
+        claim = await store.claim_due(SHARD, ahead + 1, 10, LEASE)
+        assert claim.due == ["c"] and claim.routes == {"c": "pro"}, claim
+        print("✅ Wake-ups are never written behind the cursor")
+    finally:
+        await cleanup()
+
+
+def test_schedule_store():
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_schedule_store()
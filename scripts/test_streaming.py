@@ -0,0 +1,73 @@
+"""
+IncrementalJSONParser checks (no LLM needed).
+
+Usage:
+    python scripts/test_streaming.py
+"""
+import json
+import os
+import sys
+
+sys.path.append(os.getcwd())
+
+from app.modules.agent_brain.streaming import IncrementalJSONParser
+
+REJECT = {
+    "decision": "REJECT",
+    "confidence_score": 0.91,
+    "reasoning": "No overlap with my goals.",
+    "generated_message": None,
+}
+
+
+def chunks(text: str, size: int):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_early_exit():
+    # Fields are published as soon as their value closes, before the object ends
+    text = json.dumps(REJECT)
+    cut = text.index('"generated_message"')
+    parser = IncrementalJSONParser()
+    completed = []
+    for chunk in chunks(text[:cut], 3):
+        completed.extend(parser.feed(chunk))
+    assert [key for key, _ in completed] == ["decision", "confidence_score", "reasoning"], completed
+    assert parser.fields == {k: REJECT[k] for k in ("decision", "confidence_score", "reasoning")}
+    assert not parser.done and parser.chunks_seen == len(chunks(text[:cut], 3))
+
+    for chunk in chunks(text[cut:], 3):
+        parser.feed(chunk)
+    assert parser.done and parser.fields == REJECT, parser.fields
+    print("✅ Fields published as they complete, object end detected")
+
+
+def test_escapes():
+    value = {
+        "reasoning": 'Said "hi" \\ then left}\nCafé ✓',
+        "decision": "ACCEPT",
+        "meta": {"tags": ["a}", "b\"]"], "n": {"x": 1}},
+        "confidence_score": 1e-1,
+        "ok": True,
+    }
+    # Escaped quotes, backslashes, braces inside strings, \u escapes, nested values
+    text = "```json\n" + json.dumps(value, ensure_ascii=True) + "\n```"
+    for size in (1, 2, 7, len(text)):
+        parser = IncrementalJSONParser()
+        for chunk in chunks(text, size):
+            parser.feed(chunk)
+        assert parser.done and parser.fields == value, (size, parser.fields)
+    print("✅ Escapes, nested values and leading junk handled at every chunk size")
+
+
+def test_malformed_value():
+    parser = IncrementalJSONParser()
+    parser.feed('{"decision": "REJECT", "confidence_score": 0.9x, "reasoning": "ok"}')
+    assert parser.done and parser.fields == {"decision": "REJECT", "reasoning": "ok"}, parser.fields
+    print("✅ Malformed values are left out")
+
+
+if __name__ == "__main__":
+    test_early_exit()
+    test_escapes()
+    test_malformed_value()